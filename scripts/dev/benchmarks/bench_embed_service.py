@@ -0,0 +1,114 @@
+"""
+⏱️ bench_embed_service.py
+EN: Compares concurrent single-text encodes (several producers + one bulk writer) directly against the
+    embedder vs. through the micro-batching EmbeddingService: throughput, query latency, batch sizes.
+DE: Vergleicht gleichzeitige Einzel-Encodes (mehrere Erzeuger + ein Bulk-Schreiber) direkt am Embedder
+    mit dem Micro-Batching-Dienst (EmbeddingService): Durchsatz, Query-Latenz, Batchgrößen.
+
+Aufruf: python scripts/dev/benchmarks/bench_embed_service.py [--embedder simulated|hashing|onnx|sentence-transformers]
+        [--producers 8] [--seconds 5] [--window-ms 5]
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")))
+from src.kimba_ai.core.memory.embedders import make_embedder, EMBED_DIM
+from src.kimba_ai.core.memory.embed_service import EmbeddingService
+
+
+class SimulatedEmbedder:
+    """Forward-Pass-Kosten ohne Modell: fixer Anteil pro Aufruf + Anteil pro Text, ein Modell (serialisiert)."""
+
+    def __init__(self, call_ms: float = 8.0, text_ms: float = 0.3):
+        self.name = "simulated"
+        self.dim = EMBED_DIM
+        self.config = None
+        self.call = call_ms / 1000.0
+        self.per_text = text_ms / 1000.0
+        self._lock = threading.Lock()
+
+    def encode(self, texts, batch_size=64):
+        with self._lock:
+            time.sleep(self.call + self.per_text * len(texts))
+        return np.ones((len(texts), self.dim), dtype="float32")
+
+
+def _run(encode, producers: int, seconds: float) -> dict:
+    """`producers` Threads encodieren je einen Text (interaktiv), ein Thread Blöcke zu 32 (bulk)."""
+    deadline = time.monotonic() + seconds
+    latencies, bulk_texts = [], [0]
+    lock = threading.Lock()
+
+    def query(i):
+        n = 0
+        local = []
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            encode([f"frage {i} nummer {n}"], "interactive")
+            local.append(time.perf_counter() - start)
+            n += 1
+        with lock:
+            latencies.extend(local)
+
+    def bulk():
+        n = 0
+        while time.monotonic() < deadline:
+            encode([f"eintrag {n + j} mit etwas mehr text" for j in range(32)], "bulk")
+            n += 32
+        bulk_texts[0] = n
+
+    threads = [threading.Thread(target=query, args=(i,)) for i in range(producers)]
+    threads.append(threading.Thread(target=bulk))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    lat = np.sort(np.array(latencies)) * 1000.0
+    return {
+        "queries": len(lat),
+        "bulk_texts": bulk_texts[0],
+        "texts_per_s": (len(lat) + bulk_texts[0]) / seconds,
+        "p50": float(lat[len(lat) // 2]) if len(lat) else 0.0,
+        "p95": float(lat[int(len(lat) * 0.95)]) if len(lat) else 0.0,
+    }
+
+
+def _report(label: str, r: dict):
+    print(f"{label:<10} {r['texts_per_s']:>9,.0f} Texte/s  Queries {r['queries']:>7,}  Bulk {r['bulk_texts']:>8,}  "
+          f"Query-Latenz p50 {r['p50']:7.2f} ms  p95 {r['p95']:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-Batching vs. direkte Encodes")
+    parser.add_argument("--embedder", default="simulated", help="simulated oder ein Backend aus embedders.py")
+    parser.add_argument("--producers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    embedder = SimulatedEmbedder() if args.embedder == "simulated" else make_embedder(args.embedder)
+    embedder.encode(["warmup"])  # Modell-Laden nicht mitmessen
+
+    direct = _run(lambda texts, prio: embedder.encode(texts), args.producers, args.seconds)
+    service = EmbeddingService(embedder, window_ms=args.window_ms)
+    batched = _run(lambda texts, prio: service.encode(texts, priority=prio), args.producers, args.seconds)
+    service.close()
+
+    print(f"\n== {args.embedder}, {args.producers} Erzeuger + 1 Bulk-Schreiber, {args.seconds:.0f}s ==")
+    _report("direkt", direct)
+    _report("batched", batched)
+    stats = service.stats()
+    print(f"Batches {stats['batches']:,}  Größe Ø {stats['batch_size_mean']}  max {stats['batch_size_max']}  "
+          f"Backpressure {stats['blocked_submits']}x")
+    for prio, q in stats["queues"].items():
+        print(f"  {prio:<12} Queue-Wartezeit Ø {q['wait_ms_mean']} ms  p95 {q['wait_ms_p95']} ms  max {q['wait_ms_max']} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+⏱️ bench_hybrid_search.py
+EN: Measures BM25 (lexical-only) and hybrid recall latency at growing store sizes.
+DE: Misst die Latenz der BM25-Suche (nur lexikalisch) und der hybriden Suche bei wachsender Speichergröße.
+
+Aufruf: python scripts/dev/benchmarks/bench_hybrid_search.py [10000 100000]
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")))
+from src.kimba_ai.core.memory.longterm import LongTermMemory, EMBED_DIM
+
+PROBES = 500
+VOCAB = 20_000
+WORDS_PER_MEMORY = 24
+
+
+class RandomEncoder:
+    """Ersetzt das SentenceTransformer-Modell, damit nur die Suchkosten gemessen werden."""
+
+    def __init__(self):
+        self.rng = np.random.default_rng(0)
+
+    def encode(self, texts, batch_size=64, convert_to_numpy=True):
+        return self.rng.standard_normal((len(texts), EMBED_DIM), dtype="float32")
+
+
+def _texts(rng, start, n):
+    # Zipf-verteiltes Vokabular (wie natürliche Sprache) + ein eindeutiger Bezeichner je Eintrag
+    words = np.minimum(rng.zipf(1.2, size=(n, WORDS_PER_MEMORY)), VOCAB)
+    for i, row in enumerate(words):
+        yield " ".join(f"w{w}" for w in row) + f" see module_{start + i}.py"
+
+
+def _percentile_us(samples, q):
+    return float(np.percentile(samples, q)) * 1e6
+
+
+def _measure(fn, queries):
+    samples = []
+    for q in queries:
+        t = time.perf_counter()
+        fn(q)
+        samples.append(time.perf_counter() - t)
+    return _percentile_us(samples, 50), _percentile_us(samples, 99)
+
+
+def run(sizes):
+    rng = np.random.default_rng(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        mem = LongTermMemory(memory_dir=tmp, model=RandomEncoder())
+        print(f"{'size':>9} | {'ident p50':>9} | {'ident p99':>9} | {'words p50':>9} | {'words p99':>9} | {'hybrid p50':>10}")
+        for size in sizes:
+            n = len(mem.memories)
+            while n < size:
+                step = min(50_000, size - n)
+                mem.add_memories(_texts(rng, n, step))
+                n += step
+            mem.lexical_search("warmup", 1)  # BM25-Index ggf. erstmalig aufbauen (nicht gemessen)
+
+            idents = [f"module_{i}.py" for i in rng.integers(0, size, PROBES)]
+            phrases = [" ".join(f"w{w}" for w in np.minimum(rng.zipf(1.2, 4), VOCAB)) for _ in range(PROBES)]
+            ident = _measure(lambda q: mem.hybrid_search(q, 5), idents)
+            words = _measure(lambda q: mem.lexical_search(q, 5), phrases)
+            # Ergebnis-Cache umgehen: jede Phrase nur einmal
+            hybrid = _measure(lambda q: mem.hybrid_search(q, 5), phrases[:100])
+
+            print(f"{size:>9} | {ident[0]:>7.1f}µs | {ident[1]:>7.1f}µs | "
+                  f"{words[0]:>7.1f}µs | {words[1]:>7.1f}µs | {hybrid[0]:>8.1f}µs")
+        mem.close()
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]] or [10_000, 100_000]
+    run(args)
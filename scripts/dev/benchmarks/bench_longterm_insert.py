@@ -0,0 +1,65 @@
+"""
+⏱️ bench_longterm_insert.py
+EN: Measures LongTermMemory insert cost (dedupe + append) at growing store sizes.
+DE: Misst die Einfügekosten von LongTermMemory (Dedupe + Append) bei wachsender Speichergröße.
+
+Aufruf: python scripts/dev/benchmarks/bench_longterm_insert.py [1000 10000 100000 1000000]
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")))
+from src.kimba_ai.core.memory.longterm import LongTermMemory, EMBED_DIM
+
+PROBES = 500
+
+
+class RandomEncoder:
+    """Ersetzt das SentenceTransformer-Modell, damit nur die Speicherkosten gemessen werden."""
+
+    def __init__(self):
+        self.rng = np.random.default_rng(0)
+
+    def encode(self, texts, batch_size=64, convert_to_numpy=True):
+        return self.rng.standard_normal((len(texts), EMBED_DIM), dtype="float32")
+
+
+def _percentile_us(samples, q):
+    return float(np.percentile(samples, q)) * 1e6
+
+
+def run(sizes):
+    with tempfile.TemporaryDirectory() as tmp:
+        mem = LongTermMemory(memory_dir=tmp, model=RandomEncoder())
+        print(f"{'size':>9} | {'insert p50':>10} | {'insert p99':>10} | {'dup p50':>8}")
+        for size in sizes:
+            # Auffüllen bis zur Zielgröße (Batch-API, nicht gemessen)
+            n = len(mem.memories)
+            while n < size:
+                step = min(50_000, size - n)
+                mem.add_memories(f"fill {i}" for i in range(n, n + step))
+                n += step
+
+            inserts, dups = [], []
+            for i in range(PROBES):
+                t = time.perf_counter()
+                mem.add_memory(f"probe {size} {i}")
+                inserts.append(time.perf_counter() - t)
+
+                t = time.perf_counter()
+                mem.add_memory(f"fill {i}")  # Duplikat -> nur Fingerprint-Lookup
+                dups.append(time.perf_counter() - t)
+
+            print(f"{size:>9} | {_percentile_us(inserts, 50):>8.1f}µs | "
+                  f"{_percentile_us(inserts, 99):>8.1f}µs | {_percentile_us(dups, 50):>6.1f}µs")
+        mem.close()
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]] or [1_000, 10_000, 100_000, 1_000_000]
+    run(args)
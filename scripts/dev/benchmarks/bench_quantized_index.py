@@ -0,0 +1,82 @@
+"""
+⏱️ bench_quantized_index.py
+EN: Compares float32, int8 (sq8) and PQ index storage: index footprint, latency and recall@k,
+    with and without full-precision re-ranking from a memmapped vector file.
+DE: Vergleicht float32-, int8- (sq8) und PQ-Indexspeicher: Platzbedarf, Latenz und Recall@k,
+    mit und ohne exaktes Nachsortieren aus einer memmap-Vektordatei.
+
+Aufruf: python scripts/dev/benchmarks/bench_quantized_index.py [100000 1000000] [--mode flat|hnsw|ivf]
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")))
+from src.kimba_ai.core.memory.vector_index import VectorIndex, quant_of
+from bench_ann_index import synthetic, DIM, QUERIES, K
+
+
+def measure(index: VectorIndex, queries: np.ndarray, truth: np.ndarray):
+    lat, hits = [], 0
+    for qi, q in enumerate(queries):
+        t = time.perf_counter()
+        _, ids = index.search(q, K)
+        lat.append(time.perf_counter() - t)
+        hits += len(np.intersect1d(ids[0], truth[qi]))
+    return np.percentile(lat, 50) * 1e3, np.percentile(lat, 99) * 1e3, hits / (len(queries) * K)
+
+
+def run(n: int, mode: str):
+    data = synthetic(n)
+    rng = np.random.default_rng(1)
+    queries = data[rng.choice(n, QUERIES, replace=False)] + 0.1 * rng.standard_normal((QUERIES, DIM), dtype="float32")
+    ids = np.arange(n, dtype="int64")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Originalvektoren wie im Store: float32-Datei, per memmap gelesen (nicht im Index)
+        path = os.path.join(tmp, "vectors.f32")
+        data.tofile(path)
+        mapped = np.memmap(path, dtype="float32", mode="r", shape=(n, DIM))
+        fetch = lambda rids: mapped[np.sort(rids)][np.argsort(np.argsort(rids))]
+        source = lambda: (mapped, ids)
+
+        exact = VectorIndex(DIM, source, mode="flat", background=False)
+        exact.rebuild(mapped, ids)
+        _, truth = exact.search(queries, K)
+        del exact
+
+        rows = []
+        for quantize in (None, "sq8", "pq"):
+            for rerank in ((None,) if quantize is None else (None, 4)):
+                index = VectorIndex(
+                    DIM, source, mode=mode, background=False, quantize=quantize,
+                    fetch=fetch if rerank else None, rerank=rerank or 1
+                )
+                t = time.perf_counter()
+                index.rebuild(mapped, ids)
+                build = time.perf_counter() - t
+                size = len(index.serialize())  # ~ residenter Index (Codes + Graph/Listen)
+                p50, p99, recall = measure(index, queries, truth)
+                label = (quant_of(index.index) or "float32") + (f"+rerank{rerank}" if rerank else "")
+                rows.append((label, size, build, p50, p99, recall))
+
+    print(f"\n== {n:,} Vektoren, mode={mode}, {QUERIES} Queries, recall@{K} (vs. exakt float32) ==")
+    print(f"{'storage':<14} | {'index':>9} | {'B/vec':>6} | {'build':>7} | {'p50':>8} | {'p99':>8} | {'recall':>6}")
+    for label, size, build, p50, p99, recall in rows:
+        print(f"{label:<14} | {size / 2**20:>7.1f}MB | {size / n:>6.0f} | {build:>6.1f}s | "
+              f"{p50:>6.2f}ms | {p99:>6.2f}ms | {recall:>6.3f}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    mode = "flat"
+    if "--mode" in args:
+        i = args.index("--mode")
+        mode = args[i + 1]
+        del args[i:i + 2]
+    for size in [int(a) for a in args] or [100_000, 1_000_000]:
+        run(size, mode)
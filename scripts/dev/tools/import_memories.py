@@ -0,0 +1,47 @@
+"""
+📚 import_memories.py
+EN: Streams external texts, chats and transcripts into Kimba's long-term memory (resumable).
+DE: Importiert externe Texte, Chats und Transkripte gestreamt ins Langzeitgedächtnis (fortsetzbar).
+
+Aufruf: python scripts/dev/tools/import_memories.py buch.txt chats/ --format chat --workers 2 --project lore
+"""
+
+import os
+import sys
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")))
+from src.kimba_ai.core.memory.longterm import LongTermMemory, MEMORY_DIR
+from src.kimba_ai.core.memory.importer import import_paths, FORMATS, CHUNK_CHARS, CHUNK_OVERLAP, IMPORT_BATCH
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming-Import ins Langzeitgedächtnis")
+    parser.add_argument("paths", nargs="+", help="Dateien oder Ordner")
+    parser.add_argument("--format", choices=FORMATS, help="Standard: nach Dateiendung")
+    parser.add_argument("--category", default="import")
+    parser.add_argument("--project")
+    parser.add_argument("--tag", action="append", dest="tags", help="mehrfach möglich")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_CHARS)
+    parser.add_argument("--overlap", type=int, default=CHUNK_OVERLAP)
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH)
+    parser.add_argument("--workers", type=int, default=0, help="Embedding-Prozesse (0 = im Hauptprozess)")
+    parser.add_argument("--restart", action="store_true", help="Checkpoints ignorieren, von vorn beginnen")
+    parser.add_argument("--memory-dir", default=MEMORY_DIR)
+    args = parser.parse_args()
+
+    memory = LongTermMemory(memory_dir=args.memory_dir, durability="async")
+    try:
+        results = import_paths(
+            memory, args.paths, fmt=args.format, category=args.category, project=args.project,
+            tags=args.tags, chunk_size=args.chunk_size, overlap=args.overlap,
+            batch_size=args.batch_size, workers=args.workers, resume=not args.restart
+        )
+    finally:
+        memory.close()
+    total = sum(r["imported"] for r in results)
+    print(f"[INFO] Fertig: {len(results)} Datei(en), {total} neue Erinnerungen")
+
+
+if __name__ == "__main__":
+    main()
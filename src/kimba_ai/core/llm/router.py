@@ -3,13 +3,18 @@ import os, requests
 from dotenv import load_dotenv
 from transformers import AutoModelForCausalLM, AutoTokenizer
 from src.kimba_ai.core.personas.persona_manager import PersonaManager
+from src.kimba_ai.core.memory.manager import MEMORY_BLOCK
 
 load_dotenv()
 
+# Cosine-Schwelle für Recall: schwächere Erinnerungen kosten nur Prompt-Tokens
+MEMORY_MIN_SCORE = 0.35
+
 class KimbaLLMRouter:
     def __init__(self, persona_manager=None, memory_manager=None, model_choice="Phi-3-mini-4k-instruct"):
         self.persona_manager = persona_manager or PersonaManager()
         self.memory_manager = memory_manager    # ✅ neu
+        self.memory_min_score = MEMORY_MIN_SCORE
 
         self.active_persona = "Iuno"
         self.model_map = {
@@ -43,22 +48,17 @@ class KimbaLLMRouter:
         )
 
     def _augment_with_memories(self, user_text: str) -> str:
-        """Fügt Top-Recall dem Prompt hinzu (falls MemoryManager vorhanden)."""
+        """Fügt Top-Recall dem Prompt hinzu (falls MemoryManager vorhanden) - der einzige Recall pro
+        Anfrage, mit Schwelle (memory_min_score) und Ranking der aktiven Persona."""
         if not self.memory_manager:
             return user_text
         try:
-            hits = self.memory_manager.recall(user_text, limit=3)  # [(sim, mem), ...]
-            if not hits:
-                return user_text
-            lines = []
-            for sim, mem in hits:
-                txt = mem.get("text", "")
-                cat = mem.get("category", "general")
-                prj = mem.get("project") or ""
-                lines.append(f"- {txt} ({cat}{', ' + prj if prj else ''}; rel: {sim:.2f})")
-            return "[Memories]\n" + "\n".join(lines) + f"\n\n[User]\n{user_text}"
+            return self.memory_manager.memory_prompt(
+                user_text, limit=3, min_score=self.memory_min_score,
+                ranking=self.persona_manager.get_memory_ranking()
+            )
         except Exception as e:
-            return f"[Memories]\n- (recall error: {e})\n\n[User]\n{user_text}"
+            return f"{MEMORY_BLOCK}\n- (recall error: {e})\n\n[User]\n{user_text}"
 
     def ask_local(self, prompt, max_tokens=512):
         persona_prompt = self.persona_manager.get_active_prompt()
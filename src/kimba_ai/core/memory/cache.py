@@ -0,0 +1,62 @@
+# cache.py
+# Kleine thread-sichere LRU-Caches für das Langzeitgedächtnis
+# - Query-Embeddings (ohne Ablauf, nur LRU)
+# - Suchergebnisse (kurzlebig per TTL, bei Änderungen am Store geleert)
+# - Hit/Miss-Zähler zur Kontrolle (z.B. "ein Encode pro Chat-Turn")
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+QUERY_CACHE_SIZE  = 256
+RESULT_CACHE_SIZE = 128
+RESULT_CACHE_TTL  = 30.0  # Sekunden
+
+
+def normalize_query(text: str) -> str:
+    """Cache-Schlüssel: Whitespace vereinheitlicht (Groß-/Kleinschreibung bleibt - modellabhängig)."""
+    return " ".join(text.split())
+
+
+class LRUCache:
+    """OrderedDict-LRU mit optionaler Lebensdauer pro Eintrag."""
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (self.ttl is None or time.monotonic() - entry[1] < self.ttl):
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._data[key]  # abgelaufen
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
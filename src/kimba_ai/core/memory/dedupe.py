@@ -0,0 +1,129 @@
+# dedupe.py
+# Near-Duplikat-Erkennung beim Einfügen (optional, LongTermMemory(dedupe={...}))
+# - Vektor-Pfad: Probe im ANN-Index, Cosine >= threshold -> Merge in den bestehenden Eintrag
+# - Text-Pfad für lange Texte: MinHash über Wort-Shingles + LSH-Bänder, ohne Encode
+# - Merge = Zähler `seen` + `last_seen` am bestehenden Eintrag statt einer neuen Zeile
+# - Nur innerhalb desselben Bereichs (category + project) - gleiche Texte in anderen Projekten bleiben getrennt
+
+import re
+import zlib
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+NEAR_DUP_THRESHOLD = 0.95  # Cosine-Ähnlichkeit ab der ein Eintrag als Near-Duplikat gilt
+NEAR_DUP_PROBE     = 4     # Nachbarn je Probe (der nächste kann in einem anderen Bereich liegen)
+MINHASH_THRESHOLD  = 0.85  # geschätzte Jaccard-Ähnlichkeit der Shingle-Mengen
+MINHASH_MIN_CHARS  = 400   # kürzere Texte nur über den Vektor-Pfad
+NUM_PERM           = 64
+BANDS              = 16    # 16 Bänder x 4 Zeilen: Kandidat ab J ~ 0.5, geprüft wird gegen MINHASH_THRESHOLD
+SHINGLE            = 3     # Wörter pro Shingle
+
+_WORD = re.compile(r"\w+")
+_MASK32 = np.uint64(0xFFFFFFFF)
+_SHINGLE_MUL = np.uint64(0x9E3779B97F4A7C15)
+
+
+def same_scope(a: dict, b: dict) -> bool:
+    """Nur Einträge mit gleicher Kategorie und gleichem Projekt werden zusammengeführt."""
+    return a.get("category") == b.get("category") and a.get("project") == b.get("project")
+
+
+class DedupePolicy:
+    """Schwellwerte für die Near-Duplikat-Erkennung; None schaltet den jeweiligen Pfad ab."""
+
+    def __init__(
+        self,
+        threshold: Optional[float] = NEAR_DUP_THRESHOLD,
+        minhash_threshold: Optional[float] = MINHASH_THRESHOLD,
+        min_chars: int = MINHASH_MIN_CHARS,
+        probe: int = NEAR_DUP_PROBE
+    ):
+        for name, value in (("threshold", threshold), ("minhash_threshold", minhash_threshold)):
+            if value is not None and not 0 < value <= 1:
+                raise ValueError(f"{name} muss in (0, 1] liegen")
+        self.threshold = threshold
+        self.minhash_threshold = minhash_threshold
+        self.min_chars = min_chars
+        self.probe = max(1, probe)
+
+    @classmethod
+    def from_dict(cls, cfg: Optional[dict]) -> "DedupePolicy":
+        """Aus einer Konfiguration (unbekannte Schlüssel -> ValueError)."""
+        cfg = dict(cfg or {})
+        allowed = {"threshold", "minhash_threshold", "min_chars", "probe"}
+        unknown = set(cfg) - allowed
+        if unknown:
+            raise ValueError(f"Unbekannte Dedupe-Optionen: {sorted(unknown)}")
+        return cls(**cfg)
+
+    def use_minhash(self, text: str) -> bool:
+        return self.minhash_threshold is not None and len(text) >= self.min_chars
+
+
+class MinHashLSH:
+    """MinHash-Signaturen + LSH-Bänder (Band-Bucket -> rids); Kandidaten werden per
+    geschätzter Jaccard-Ähnlichkeit (Anteil gleicher Signatur-Positionen) bestätigt.
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = BANDS, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm muss durch bands teilbar sein")
+        rng = np.random.default_rng(seed)
+        # Multiply-Shift-Hashing auf uint64 (Überlauf = mod 2^64), obere 32 Bit als Wert
+        self._a = rng.integers(1, 2**63, size=num_perm, dtype="uint64") | np.uint64(1)
+        self._b = rng.integers(0, 2**63, size=num_perm, dtype="uint64")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.buckets: Dict[Tuple[int, bytes], Set[int]] = {}
+        self.sigs: Dict[int, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.sigs)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """Signatur über die Wort-Shingles (casefold); None ohne ein einziges Wort."""
+        words = _WORD.findall(text.casefold())
+        if not words:
+            return None
+        # Shingle-Hash aus den Wort-Hashes kombiniert (keine Shingle-Strings); Wiederholungen stören das Minimum nicht
+        w = np.fromiter((zlib.crc32(x.encode("utf-8")) for x in words), dtype="uint64", count=len(words))
+        n = max(1, len(w) - SHINGLE + 1)
+        h = np.zeros(n, dtype="uint64")
+        for j in range(min(SHINGLE, len(w))):
+            h = h * _SHINGLE_MUL + w[j:j + n]
+        hashed = (h[:, None] * self._a[None, :] + self._b[None, :]) >> np.uint64(32)
+        return (hashed & _MASK32).min(axis=0).astype("uint32")
+
+    def _keys(self, sig: np.ndarray):
+        r = self.rows
+        return [(b, sig[b * r:(b + 1) * r].tobytes()) for b in range(self.bands)]
+
+    def add(self, rid: int, sig: np.ndarray):
+        self.sigs[rid] = sig
+        for key in self._keys(sig):
+            self.buckets.setdefault(key, set()).add(rid)
+
+    def remove(self, rid: int):
+        sig = self.sigs.pop(rid, None)
+        if sig is None:
+            return
+        for key in self._keys(sig):
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                bucket.discard(rid)
+                if not bucket:
+                    del self.buckets[key]
+
+    def candidates(self, sig: np.ndarray, threshold: float) -> List[Tuple[float, int]]:
+        """(geschätzte Jaccard, rid) aller Kandidaten >= threshold, absteigend."""
+        found: Set[int] = set()
+        for key in self._keys(sig):
+            found.update(self.buckets.get(key, ()))
+        out = []
+        for rid in found:
+            est = float(np.count_nonzero(self.sigs[rid] == sig)) / len(sig)
+            if est >= threshold:
+                out.append((est, rid))
+        out.sort(reverse=True)
+        return out
@@ -0,0 +1,266 @@
+# embed_service.py
+# Micro-Batching für Embeddings: ein Encode-Thread für alle Erzeuger im Prozess
+# - Chat-Recall, Promotion, Vision, Analyzer, Ziele ... encodieren gleichzeitig, meist je 1 Text
+#   -> Anfragen innerhalb eines kurzen Fensters (window_ms) zu einem Forward-Pass zusammenfassen
+# - Jeder Aufrufer bekommt ein Future (submit) oder wartet blockierend (encode, Embedder-Protokoll)
+# - Priorität: "interactive" (Suchanfragen) vor "bulk" (Einfügen/Import); große Bulk-Anfragen
+#   werden in Scheiben zu max_batch Texten zerlegt, interaktive Anfragen überholen dazwischen
+# - Backpressure: mehr als max_pending wartende Bulk-Texte -> submit blockiert (optional Timeout)
+# - Gleiche Texte im selben Batch werden nur einmal encodiert
+# - Metriken: Batchgrößen, Wartezeit in der Queue (je Priorität), Encode-Zeit, Backpressure
+# - shared_service(): ein Dienst je Embedder-Konfiguration, von allen Stores im Prozess geteilt
+
+import json
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Deque, Dict, List, Optional
+
+import numpy as np
+
+PRIORITIES        = ("interactive", "bulk")
+BATCH_WINDOW_MS   = 5.0    # so lange wird nach der ersten Anfrage auf weitere gewartet
+MAX_BATCH         = 64     # Texte pro Forward-Pass
+MAX_PENDING       = 4096   # wartende Bulk-Texte, ab denen submit() blockiert
+WAIT_SAMPLES      = 1024   # Wartezeiten je Priorität für die Perzentile in stats()
+
+
+class _Request:
+    """Eine Anfrage: Ergebnis-Matrix wird scheibenweise gefüllt, Future am Ende erfüllt."""
+
+    __slots__ = ("texts", "out", "remaining", "future")
+
+    def __init__(self, texts: List[str], dim: int):
+        self.texts = texts
+        self.out = np.empty((len(texts), dim), dtype="float32")
+        self.remaining = len(texts)
+        self.future: Future = Future()
+
+
+class EmbeddingService:
+    """Micro-Batching vor einem Embedder; verhält sich selbst wie ein Embedder (name, dim, config, encode).
+
+    Der Encode-Thread wartet auf die erste Anfrage, sammelt dann bis zu `window_ms` (oder bis
+    `max_batch` Texte beisammen sind) und encodiert alles in einem Aufruf des inneren Embedders.
+    Während ein Forward-Pass läuft, sammeln sich neue Anfragen bereits für den nächsten.
+    """
+
+    def __init__(
+        self,
+        embedder,
+        window_ms: float = BATCH_WINDOW_MS,
+        max_batch: int = MAX_BATCH,
+        max_pending: int = MAX_PENDING
+    ):
+        if max_batch < 1 or max_pending < 1:
+            raise ValueError("max_batch und max_pending müssen >= 1 sein")
+        self.embedder = embedder
+        self.name = embedder.name
+        self.dim = embedder.dim
+        self.config = getattr(embedder, "config", None)  # Import-Worker bauen den inneren Embedder nach
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+
+        # Queues je Priorität: (Anfrage, von, bis, eingereiht um)
+        self._queues: Dict[str, Deque[tuple]] = {p: deque() for p in PRIORITIES}
+        self._pending = {p: 0 for p in PRIORITIES}  # wartende Texte
+        self._cond = threading.Condition()
+        self._closed = False
+
+        # Metriken
+        self._batches = 0
+        self._texts = 0
+        self._unique = 0
+        self._max_size = 0
+        self._encode_time = 0.0
+        self._requests = {p: 0 for p in PRIORITIES}
+        self._waits = {p: deque(maxlen=WAIT_SAMPLES) for p in PRIORITIES}
+        self._blocked = 0
+        self._blocked_time = 0.0
+        self._errors = 0
+
+        self._thread = threading.Thread(target=self._run, name="kimba-embed-batcher", daemon=True)
+        self._thread.start()
+
+    # -----------------------------
+    # Aufrufer-Seite
+    # -----------------------------
+    def submit(self, texts: List[str], priority: str = "bulk", timeout: Optional[float] = None) -> Future:
+        """Reiht Texte ein; das Future liefert float32 (len(texts), dim) in Eingabereihenfolge.
+        Bulk-Anfragen blockieren, solange mehr als `max_pending` Texte warten (TimeoutError nach `timeout`).
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unbekannte Priorität: {priority} (erlaubt: {PRIORITIES})")
+        req = _Request(list(texts), self.dim)
+        if not req.texts:
+            req.future.set_result(req.out)
+            return req.future
+        n = len(req.texts)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("EmbeddingService ist bereits geschlossen")
+            if priority == "bulk":
+                self._admit(n, timeout)
+            now = time.monotonic()
+            queue = self._queues[priority]
+            for lo in range(0, n, self.max_batch):
+                queue.append((req, lo, min(lo + self.max_batch, n), now))
+            self._pending[priority] += n
+            self._requests[priority] += 1
+            self._cond.notify_all()
+        return req.future
+
+    def _admit(self, n: int, timeout: Optional[float]):
+        """Backpressure (unter self._cond): warten, bis Platz ist. Größere Anfragen als
+        max_pending kommen durch, sobald die Bulk-Queue leer ist (sonst nie)."""
+        def full() -> bool:
+            return bool(self._pending["bulk"]) and self._pending["bulk"] + n > self.max_pending
+
+        if not full():
+            return
+        start = time.monotonic()
+        self._blocked += 1
+        ok = self._cond.wait_for(lambda: not full() or self._closed, timeout)
+        self._blocked_time += time.monotonic() - start
+        if not ok:
+            raise TimeoutError(f"Embedding-Queue voll ({self._pending['bulk']} Texte wartend)")
+        if self._closed:
+            raise RuntimeError("EmbeddingService ist bereits geschlossen")
+
+    def encode(self, texts: List[str], batch_size: int = MAX_BATCH, priority: str = "bulk") -> np.ndarray:
+        """Embedder-Protokoll: blockierend über die Queue (`batch_size` bestimmt der Dienst)."""
+        if threading.current_thread() is self._thread:  # nie auf sich selbst warten
+            return np.asarray(self.embedder.encode(texts, batch_size=self.max_batch), dtype="float32")
+        return self.submit(texts, priority).result()
+
+    # -----------------------------
+    # Encode-Thread
+    # -----------------------------
+    def _queued(self) -> int:
+        return self._pending["interactive"] + self._pending["bulk"]
+
+    def _oldest(self) -> float:
+        return min(q[0][3] for q in self._queues.values() if q)
+
+    def _take(self) -> List[tuple]:
+        """Nächster Batch (unter self._cond): interaktiv zuerst, dann Bulk, bis max_batch Texte
+        (Scheiben sind höchstens max_batch groß - die erste passt immer)."""
+        batch, size, now = [], 0, time.monotonic()
+        for priority in PRIORITIES:
+            queue = self._queues[priority]
+            while queue and size + queue[0][2] - queue[0][1] <= self.max_batch:
+                req, lo, hi, queued = queue.popleft()
+                batch.append((req, lo, hi))
+                size += hi - lo
+                self._pending[priority] -= hi - lo
+                self._waits[priority].append(now - queued)
+        self._cond.notify_all()  # Platz für blockierte Bulk-Aufrufer
+        return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queued() or self._closed)
+                if not self._queued():
+                    return  # geschlossen und leer
+                # Fenster: ab der ältesten wartenden Anfrage, vorzeitig bei vollem Batch oder close()
+                while not self._closed and self._queued() < self.max_batch:
+                    left = self._oldest() + self.window - time.monotonic()
+                    if left <= 0:
+                        break
+                    self._cond.wait(left)
+                batch = self._take()
+            self._encode_batch(batch)
+
+    def _encode_batch(self, batch: List[tuple]):
+        texts = [t for req, lo, hi in batch for t in req.texts[lo:hi]]
+        unique = list(dict.fromkeys(texts))
+        start = time.perf_counter()
+        try:
+            vecs = np.asarray(self.embedder.encode(unique, batch_size=self.max_batch), dtype="float32")
+            vecs = vecs.reshape(len(unique), self.dim)
+        except BaseException as e:
+            print(f"[WARN] Embedding-Batch ({len(texts)} Texte) fehlgeschlagen: {e}")
+            with self._cond:
+                self._errors += 1
+            for req, lo, hi in batch:
+                if not req.future.done():
+                    req.future.set_exception(e)
+            return
+        elapsed = time.perf_counter() - start
+        row = {t: i for i, t in enumerate(unique)}
+        for req, lo, hi in batch:
+            if req.future.done():  # frühere Scheibe fehlgeschlagen
+                continue
+            req.out[lo:hi] = vecs[[row[t] for t in req.texts[lo:hi]]]
+            req.remaining -= hi - lo
+            if not req.remaining:
+                req.future.set_result(req.out)
+        with self._cond:
+            self._batches += 1
+            self._texts += len(texts)
+            self._unique += len(unique)
+            self._max_size = max(self._max_size, len(texts))
+            self._encode_time += elapsed
+
+    # -----------------------------
+    # Metriken / Lebenszyklus
+    # -----------------------------
+    def stats(self) -> dict:
+        """Batchgrößen, Queue-Wartezeiten (ms, je Priorität), Encode-Zeit und Backpressure."""
+        with self._cond:
+            waits = {}
+            for p in PRIORITIES:
+                w = np.sort(np.fromiter(self._waits[p], dtype="float64")) * 1000.0
+                waits[p] = {
+                    "requests": self._requests[p],
+                    "pending": self._pending[p],
+                    "wait_ms_mean": round(float(w.mean()), 3) if len(w) else 0.0,
+                    "wait_ms_p50": round(float(w[len(w) // 2]), 3) if len(w) else 0.0,
+                    "wait_ms_p95": round(float(w[int(len(w) * 0.95)]), 3) if len(w) else 0.0,
+                    "wait_ms_max": round(float(w[-1]), 3) if len(w) else 0.0,
+                }
+            return {
+                "embedder": self.name,
+                "batches": self._batches,
+                "texts": self._texts,
+                "unique_texts": self._unique,
+                "batch_size_mean": round(self._texts / self._batches, 2) if self._batches else 0.0,
+                "batch_size_max": self._max_size,
+                "encode_ms_total": round(self._encode_time * 1000.0, 1),
+                "blocked_submits": self._blocked,
+                "blocked_ms_total": round(self._blocked_time * 1000.0, 1),
+                "errors": self._errors,
+                "queues": waits,
+            }
+
+    def close(self):
+        """Encodiert noch Wartendes, beendet dann den Thread; weitere submit() -> RuntimeError."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+
+_SERVICES: Dict[str, EmbeddingService] = {}
+_SERVICES_LOCK = threading.Lock()
+
+
+def shared_service(embedder, **options) -> EmbeddingService:
+    """Ein Dienst je Embedder-Konfiguration im Prozess (gleiches Modell -> gemeinsame Batches).
+    `options` (window_ms, max_batch, max_pending) gelten nur beim Anlegen; Embedder ohne
+    Konfiguration (eigenes Modell-Objekt) werden per Objekt-Identität geteilt.
+    """
+    if isinstance(embedder, EmbeddingService):
+        return embedder
+    config = getattr(embedder, "config", None)
+    key = json.dumps(config, sort_keys=True) if config is not None else f"id:{id(embedder)}"
+    with _SERVICES_LOCK:
+        service = _SERVICES.get(key)
+        if service is None or service._closed:
+            service = _SERVICES[key] = EmbeddingService(embedder, **options)
+        return service
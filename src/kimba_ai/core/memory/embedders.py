@@ -0,0 +1,234 @@
+# embedders.py
+# Austauschbare Embedding-Backends für das Langzeitgedächtnis
+# - Protokoll `Embedder`: name, dim, encode(texts, batch_size) -> float32 (n, dim)
+# - sentence-transformers: Standard (all-MiniLM-L6-v2, PyTorch)
+# - onnx: derselbe MiniLM als ONNX-Graph auf der CPU (onnxruntime), optional int8-quantisiert
+# - hashing: Hashing-Trick über Wörter + Bigramme - deterministisch, ohne Modell (Tests/Benchmarks)
+# - Auswahl per Konfiguration (configs/embedding.json oder Parameter), Modelle werden erst beim
+#   ersten encode() geladen - Öffnen/Auflisten/Löschen im Store kostet keinen Modell-Start
+
+import os
+import re
+import json
+import zlib
+import threading
+from typing import Dict, List, Optional, Protocol, Union
+
+import numpy as np
+
+EMBEDDING_MODEL  = "sentence-transformers/all-MiniLM-L6-v2"
+EMBED_DIM        = 384
+EMBEDDING_CONFIG = os.path.join("configs", "embedding.json")
+ONNX_DIR         = os.path.join("memory", "onnx")  # exportierte/quantisierte Modelle (einmalig)
+ONNX_MAX_LENGTH  = 256                             # max_seq_length von all-MiniLM-L6-v2
+DEFAULT_BACKEND  = "sentence-transformers"
+
+_WORD = re.compile(r"\w+")
+
+
+class Embedder(Protocol):
+    """Schnittstelle der Backends. `encode` muss nicht normalisieren (macht der Store)."""
+
+    name: str
+    dim: int
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        ...
+
+
+class SentenceTransformerEmbedder:
+    """sentence-transformers (PyTorch); Import + Laden erst beim ersten encode()."""
+
+    def __init__(self, model: str = EMBEDDING_MODEL, device: Optional[str] = None, dim: int = EMBED_DIM):
+        self.name = model
+        self.dim = dim
+        self.config = {"backend": "sentence-transformers", "model": model, "device": device, "dim": dim}
+        self.device = device
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import SentenceTransformer
+                model = SentenceTransformer(self.name, device=self.device)
+                dim = model.get_sentence_embedding_dimension()
+                if dim != self.dim:
+                    raise ValueError(f"Modell '{self.name}' liefert {dim}-D statt {self.dim}-D")
+                self._model = model
+        return self._model
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        model = self._model or self._load()
+        vecs = model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+        return np.asarray(vecs, dtype="float32").reshape(len(texts), self.dim)
+
+
+class OnnxEmbedder:
+    """MiniLM per onnxruntime auf der CPU (Mean-Pooling wie sentence-transformers).
+
+    Erwartet `model.onnx` + `tokenizer.json` in `path`; fehlen sie, wird einmalig per `optimum`
+    exportiert. `quantize="int8"`: dynamische int8-Quantisierung der Gewichte (`model_int8.onnx`,
+    einmalig erzeugt) - deutlich schneller auf der CPU bei kaum verändertem Ranking.
+    """
+
+    def __init__(
+        self,
+        model: str = EMBEDDING_MODEL,
+        path: Optional[str] = None,
+        quantize: Optional[str] = "int8",
+        max_length: int = ONNX_MAX_LENGTH,
+        threads: Optional[int] = None,
+        dim: int = EMBED_DIM
+    ):
+        if quantize not in (None, "int8"):
+            raise ValueError(f"Unbekannte ONNX-Quantisierung: {quantize}")
+        self.name = model
+        self.dim = dim
+        self.path = path or os.path.join(ONNX_DIR, model.replace("/", "__"))
+        self.quantize = quantize
+        self.max_length = max_length
+        self.threads = threads
+        self.config = {
+            "backend": "onnx", "model": model, "path": path, "quantize": quantize,
+            "max_length": max_length, "threads": threads, "dim": dim,
+        }
+        self._session = None
+        self._tokenizer = None
+        self._inputs = set()
+        self._lock = threading.Lock()
+
+    def _export(self):
+        """Einmaliger Export aus dem Hugging-Face-Modell (optionale Abhängigkeit `optimum`)."""
+        try:
+            from optimum.onnxruntime import ORTModelForFeatureExtraction
+            from transformers import AutoTokenizer
+        except ImportError as e:
+            raise RuntimeError(
+                f"ONNX-Modell fehlt in {self.path} und optimum ist nicht installiert "
+                f"(pip install optimum[onnxruntime] oder model.onnx + tokenizer.json dort ablegen)"
+            ) from e
+        print(f"[INFO] Exportiere {self.name} nach ONNX ({self.path}) ...")
+        ORTModelForFeatureExtraction.from_pretrained(self.name, export=True).save_pretrained(self.path)
+        AutoTokenizer.from_pretrained(self.name).save_pretrained(self.path)
+
+    def _model_file(self) -> str:
+        base = os.path.join(self.path, "model.onnx")
+        if not os.path.exists(base):
+            self._export()
+        if self.quantize is None:
+            return base
+        quantized = os.path.join(self.path, "model_int8.onnx")
+        if not os.path.exists(quantized):
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            print(f"[INFO] Quantisiere {base} -> int8 ...")
+            quantize_dynamic(base, quantized, weight_type=QuantType.QInt8)
+        return quantized
+
+    def _load(self):
+        with self._lock:
+            if self._session is None:
+                import onnxruntime as ort
+                from tokenizers import Tokenizer
+
+                model_file = self._model_file()  # exportiert/quantisiert ggf. (inkl. tokenizer.json)
+                tokenizer = Tokenizer.from_file(os.path.join(self.path, "tokenizer.json"))
+                pad_id = tokenizer.token_to_id("[PAD]") or 0
+                tokenizer.enable_padding(pad_id=pad_id, pad_token="[PAD]")
+                tokenizer.enable_truncation(max_length=self.max_length)
+
+                opts = ort.SessionOptions()
+                if self.threads:
+                    opts.intra_op_num_threads = self.threads
+                session = ort.InferenceSession(model_file, opts, providers=["CPUExecutionProvider"])
+                self._inputs = {i.name for i in session.get_inputs()}
+                self._tokenizer = tokenizer
+                self._session = session
+        return self._session
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        session = self._session or self._load()
+        out = np.empty((len(texts), self.dim), dtype="float32")
+        for lo in range(0, len(texts), batch_size):
+            enc = self._tokenizer.encode_batch(texts[lo:lo + batch_size])
+            ids = np.array([e.ids for e in enc], dtype="int64")
+            mask = np.array([e.attention_mask for e in enc], dtype="int64")
+            feed = {"input_ids": ids, "attention_mask": mask}
+            if "token_type_ids" in self._inputs:
+                feed["token_type_ids"] = np.zeros_like(ids)
+            hidden = session.run(None, feed)[0]  # last_hidden_state (batch, seq, dim)
+            weights = mask[..., None].astype("float32")
+            out[lo:lo + len(enc)] = (hidden * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1.0)
+        return out
+
+
+class HashingEmbedder:
+    """Hashing-Trick: Wörter und Wort-Bigramme (casefold) -> Bucket per crc32, Vorzeichen aus dem
+    obersten Hash-Bit. Deterministisch und ohne Modell; ähnlich sind Texte mit ähnlichem Wortlaut
+    (lexikalisch, nicht semantisch) - für Tests, Benchmarks und Umgebungen ohne Modell-Dateien.
+    """
+
+    def __init__(self, dim: int = EMBED_DIM, seed: int = 0, bigrams: bool = True):
+        self.name = f"hashing-{dim}" + (f"-s{seed}" if seed else "")
+        self.dim = dim
+        self.seed = seed
+        self.bigrams = bigrams
+        self.config = {"backend": "hashing", "dim": dim, "seed": seed, "bigrams": bigrams}
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype="float32")
+        for i, text in enumerate(texts):
+            words = _WORD.findall(text.casefold())
+            feats = words + [f"{a} {b}" for a, b in zip(words, words[1:])] if self.bigrams else words
+            if not feats:
+                continue
+            h = np.fromiter((zlib.crc32(f.encode("utf-8"), self.seed) for f in feats), dtype="uint32", count=len(feats))
+            signs = np.where(h >> 31, -1.0, 1.0).astype("float32")
+            np.add.at(out[i], h % self.dim, signs)
+        return out
+
+
+class ModelEmbedder:
+    """Adapter für bereits geladene Encoder mit `.encode()` (z.B. Benchmark-Stubs, eigenes Modell)."""
+
+    def __init__(self, model, name: str = EMBEDDING_MODEL, dim: int = EMBED_DIM):
+        self.model = model
+        self.name = name
+        self.dim = dim
+        self.config = None  # nicht rekonstruierbar (z.B. für Import-Worker-Prozesse)
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        vecs = self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+        return np.asarray(vecs, dtype="float32").reshape(len(texts), self.dim)
+
+
+EMBEDDERS = {
+    "sentence-transformers": SentenceTransformerEmbedder,
+    "onnx": OnnxEmbedder,
+    "hashing": HashingEmbedder,
+}
+
+
+def load_embedding_config(path: str = EMBEDDING_CONFIG) -> dict:
+    """Embedder-Konfiguration aus JSON (fehlende Datei -> Standard-Backend)."""
+    if not os.path.exists(path):
+        return {"backend": DEFAULT_BACKEND}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def make_embedder(config: Union[None, str, dict, Embedder] = None) -> Embedder:
+    """Embedder aus Konfiguration: None = configs/embedding.json, str = Backend-Name,
+    dict = {"backend": ..., weitere Optionen des Backends}, fertiges Objekt = unverändert.
+    """
+    if config is None:
+        config = load_embedding_config()
+    if isinstance(config, str):
+        config = {"backend": config}
+    if not isinstance(config, dict):
+        return config
+    opts: Dict[str, object] = {k: v for k, v in config.items() if k != "backend"}
+    backend = config.get("backend", DEFAULT_BACKEND)
+    if backend not in EMBEDDERS:
+        raise ValueError(f"Unbekanntes Embedding-Backend: {backend} (verfügbar: {sorted(EMBEDDERS)})")
+    return EMBEDDERS[backend](**opts)
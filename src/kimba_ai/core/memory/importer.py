@@ -0,0 +1,473 @@
+# importer.py
+# Streaming-Import externer Daten ins Langzeitgedächtnis (Texte, Markdown, JSONL, Chat-Exporte, Bücher)
+# - Reader lesen zeilenweise ab einem Byte-Offset - die Datei liegt nie komplett im RAM
+# - Chunker bündelt Absätze/Nachrichten zu Chunks mit Überlappung, lange Absätze werden
+#   an Satz- bzw. Wortgrenzen geteilt
+# - Embedding in Worker-Prozessen (je ein eigenes Modell), begrenzte Anzahl Batches in Arbeit
+#   -> Rückstau zum Reader statt wachsender Queues
+# - Commit batchweise über LongTermMemory.add_memories(..., vectors=...)
+# - Checkpoint je Datei (Byte-Offset hinter dem letzten committeten Chunk) -> Wiederaufnahme
+# - Fortschritt per Callback (Standard: [INFO]-Zeile alle PROGRESS_INTERVAL Sekunden)
+
+import os
+import re
+import json
+import time
+import hashlib
+import datetime
+import multiprocessing as mp
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.kimba_ai.core.memory.embedders import make_embedder
+from src.kimba_ai.core.memory.segments import _atomic_write
+
+FORMATS = ("txt", "md", "jsonl", "chat")
+EXTENSIONS = {".txt": "txt", ".text": "txt", ".md": "md", ".markdown": "md", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+CHUNK_CHARS       = 1000   # Zielgröße eines Chunks (Zeichen)
+CHUNK_OVERLAP     = 150    # Zeichen vom Ende des vorigen Chunks, die vorangestellt werden
+IMPORT_BATCH      = 256    # Chunks pro Embedding-Batch / Commit
+QUEUE_DEPTH       = 2      # Batches in Arbeit pro Worker (Obergrenze für den RAM-Bedarf)
+CHECKPOINT_EVERY  = 2.0    # Sekunden zwischen Checkpoints
+PROGRESS_INTERVAL = 5.0    # Sekunden zwischen Fortschrittsmeldungen
+CHECKPOINT_DIR    = "import_checkpoints"
+HEAD_BYTES        = 64 * 1024  # Dateianfang als Identität für die Wiederaufnahme
+
+# Ein Stück Eingabe: (Text, Metadaten, Byte-Offset hinter dem Stück)
+Piece = Tuple[str, dict, int]
+
+# Chat-Zeilen: "[12.03.24, 18:04:11] Name: Text" (WhatsApp iOS), "12.03.24, 18:04 - Name: Text" (Android),
+# "2024-03-12 18:04 Name: Text" und schlicht "Name: Text" (Transkripte)
+_CHAT_RE = re.compile(
+    r"^\[?(?P<date>\d{1,4}[./-]\d{1,2}[./-]\d{1,4}),?\s+(?P<time>\d{1,2}:\d{2}(?::\d{2})?)\]?"
+    r"(?:\s+-)?\s+(?P<who>[^:]{1,60}):\s?(?P<text>.*)$"
+)
+_SPEAKER_RE = re.compile(r"^(?P<who>[^\s:][^:]{0,39}):\s(?P<text>.+)$")
+_DATE_FORMATS = ("%d.%m.%y", "%d.%m.%Y", "%d/%m/%y", "%d/%m/%Y", "%m/%d/%y", "%Y-%m-%d")
+_SENTENCE_END = re.compile(r"[.!?…]\s")
+
+
+def detect_format(path: str) -> str:
+    return EXTENSIONS.get(os.path.splitext(path)[1].lower(), "txt")
+
+
+# -----------------------------
+# Reader
+# -----------------------------
+def _lines(path: str, start: int) -> Iterator[Tuple[str, int]]:
+    """(Zeile ohne Zeilenende, Byte-Offset dahinter) ab `start` - binär gelesen, damit Offsets exakt sind."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        offset = start
+        for raw in f:
+            offset += len(raw)
+            yield raw.decode("utf-8", errors="replace").rstrip("\r\n"), offset
+
+
+def read_text(path: str, start: int = 0, markdown: bool = False) -> Iterator[Piece]:
+    """Absätze (durch Leerzeilen getrennt); Markdown: Überschriften beginnen einen neuen Absatz."""
+    buf: List[str] = []
+    end = start
+    for line, offset in _lines(path, start):
+        if markdown and line.startswith("#") and buf:
+            yield " ".join(buf), {}, end
+            buf = []
+        if line.strip():
+            buf.append(line.strip())
+        elif buf:
+            yield " ".join(buf), {}, offset
+            buf = []
+        end = offset
+    if buf:
+        yield " ".join(buf), {}, end
+
+
+def _iso_or_unix(value) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        try:
+            return int(datetime.datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp())
+        except ValueError:
+            return None
+
+
+def read_jsonl(path: str, start: int = 0) -> Iterator[Piece]:
+    """Ein Objekt pro Zeile; Text aus text/content/message, optional role/speaker/author als Sprecher."""
+    for line, offset in _lines(path, start):
+        if not line.strip():
+            continue
+        try:
+            obj = json.loads(line)
+        except json.JSONDecodeError:
+            print(f"[WARN] Import: ungültige JSON-Zeile bei Byte {offset} übersprungen")
+            continue
+        if isinstance(obj, str):
+            obj = {"text": obj}
+        text = obj.get("text") or obj.get("content") or obj.get("message") or ""
+        if not isinstance(text, str) or not text.strip():
+            continue
+        who = obj.get("speaker") or obj.get("role") or obj.get("author")
+        meta = {k: obj[k] for k in ("category", "mood", "project", "importance") if obj.get(k) is not None}
+        if isinstance(obj.get("tags"), list):
+            meta["tags"] = obj["tags"]
+        ts = _iso_or_unix(obj.get("timestamp") or obj.get("time") or obj.get("date"))
+        if ts is not None:
+            meta["timestamp"] = ts
+        yield (f"{who}: {text.strip()}" if who else text.strip()), meta, offset
+
+
+def _chat_timestamp(date: str, clock: str) -> Optional[int]:
+    clock = clock if clock.count(":") == 2 else clock + ":00"
+    for fmt in _DATE_FORMATS:
+        try:
+            return int(datetime.datetime.strptime(f"{date} {clock}", f"{fmt} %H:%M:%S").timestamp())
+        except ValueError:
+            continue
+    return None
+
+
+def read_chat(path: str, start: int = 0) -> Iterator[Piece]:
+    """Chat-Exporte/Transkripte: eine Nachricht pro "Sprecher: Text"-Zeile, Folgezeilen gehören dazu."""
+    msg: Optional[List] = None  # [Text, Metadaten, Offset]
+    for line, offset in _lines(path, start):
+        m = _CHAT_RE.match(line)
+        meta = {}
+        if m:
+            ts = _chat_timestamp(m["date"], m["time"])
+            if ts is not None:
+                meta["timestamp"] = ts
+        else:
+            m = _SPEAKER_RE.match(line)
+        if m:
+            if msg is not None:
+                yield msg[0], msg[1], msg[2]
+            msg = [f"{m['who'].strip()}: {m['text'].strip()}", meta, offset]
+        elif msg is not None and line.strip():
+            msg[0] += " " + line.strip()
+            msg[2] = offset
+        elif msg is None and line.strip():
+            yield line.strip(), {}, offset  # Kopfzeilen o.ä. vor der ersten Nachricht
+    if msg is not None:
+        yield msg[0], msg[1], msg[2]
+
+
+READERS: Dict[str, Callable[..., Iterator[Piece]]] = {
+    "txt": read_text,
+    "md": lambda path, start=0: read_text(path, start, markdown=True),
+    "jsonl": read_jsonl,
+    "chat": read_chat,
+}
+
+
+# -----------------------------
+# Chunker
+# -----------------------------
+def _split_long(text: str, size: int) -> List[str]:
+    """Teilt einen überlangen Absatz an Satzenden (sonst Leerzeichen) nahe `size`."""
+    parts = []
+    while len(text) > size:
+        window = text[:size]
+        cut = max((m.end() for m in _SENTENCE_END.finditer(window, size // 2)), default=-1)
+        if cut < 0:
+            cut = window.rfind(" ", size // 2)
+        if cut <= 0:
+            cut = size
+        parts.append(text[:cut].strip())
+        text = text[cut:].strip()
+    if text:
+        parts.append(text)
+    return parts
+
+
+def _tail(text: str, overlap: int) -> str:
+    """Ende eines Chunks für die Überlappung, an einer Wortgrenze beginnend."""
+    if overlap <= 0 or len(text) <= overlap:
+        return text if overlap > 0 else ""
+    tail = text[-overlap:]
+    space = tail.find(" ")
+    return tail[space + 1:] if 0 <= space < len(tail) - 1 else tail
+
+
+def _group_key(meta: dict) -> str:
+    """Stücke mit gleichen Metadaten (abgesehen vom Zeitstempel) dürfen in einen Chunk."""
+    return json.dumps({k: v for k, v in meta.items() if k != "timestamp"}, sort_keys=True, default=str)
+
+
+def chunk_pieces(
+    pieces: Iterator[Piece],
+    size: int = CHUNK_CHARS,
+    overlap: int = CHUNK_OVERLAP,
+    start: int = 0
+) -> Iterator[Piece]:
+    """Bündelt Stücke zu Chunks von ca. `size` Zeichen; jeder Chunk beginnt mit dem Ende des vorigen.
+    Nur Stücke mit gleichen Metadaten werden gebündelt (Zeitstempel: der des ersten Stücks).
+    Der Offset eines Chunks zeigt hinter das letzte vollständig enthaltene Stück.
+    """
+    if overlap >= size:
+        raise ValueError("overlap muss kleiner als size sein")
+    buf: List[str] = []
+    buf_len = 0
+    buf_meta: Optional[dict] = None
+    prefix = ""
+    done = start  # Offset hinter dem letzten vollständig verarbeiteten Stück
+
+    def flush():
+        nonlocal buf, buf_len, buf_meta, prefix
+        text = " ".join(([prefix] if prefix else []) + buf)
+        out = (text, buf_meta or {}, done)
+        prefix = _tail(" ".join(buf), overlap)
+        buf, buf_len, buf_meta = [], 0, None
+        return out
+
+    for text, meta, end in pieces:
+        if buf and _group_key(meta) != _group_key(buf_meta):
+            yield flush()
+            prefix = ""  # keine Überlappung über Metadaten-Grenzen hinweg
+        parts = _split_long(text, size - overlap) if len(text) > size - overlap else [text]
+        for i, part in enumerate(parts):
+            if buf and buf_len + len(part) + 1 > size - len(prefix):
+                yield flush()
+            if buf_meta is None:
+                buf_meta = meta
+            buf.append(part)
+            buf_len += len(part) + 1
+            if i == len(parts) - 1:
+                done = end
+    if buf:
+        yield flush()
+
+
+# -----------------------------
+# Embedding-Worker
+# -----------------------------
+def _embed_worker(config: dict, tasks, results, batch_size: int):
+    """Läuft im Worker-Prozess: eigenen Embedder (gleiche Konfiguration) laden, dann Batches (seq, Texte) encodieren."""
+    try:
+        model = make_embedder(config)
+        model.encode(["warmup"])  # Modell jetzt laden, nicht erst im ersten Batch
+    except Exception as e:  # Modell fehlt/kaputt -> jede Aufgabe mit Fehler beantworten
+        model, error = None, f"Embedder {config} nicht ladbar: {e}"
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        seq, texts = task
+        if model is None:
+            results.put((seq, error))
+            continue
+        try:
+            vecs = model.encode(texts, batch_size=batch_size)
+            results.put((seq, np.asarray(vecs, dtype="float32")))
+        except Exception as e:
+            results.put((seq, f"Encode fehlgeschlagen: {e}"))
+
+
+class _EmbedPool:
+    """Worker-Prozesse mit begrenzten Queues; Ergebnisse kommen in Einreichungs-Reihenfolge zurück."""
+
+    def __init__(self, config: dict, workers: int, depth: int = QUEUE_DEPTH, batch_size: int = 64):
+        ctx = mp.get_context("spawn")  # kein fork eines Prozesses mit FAISS-/Torch-Threads
+        self.capacity = max(1, workers * depth)
+        self.tasks = ctx.Queue(maxsize=self.capacity)
+        self.results = ctx.Queue(maxsize=self.capacity)
+        self.procs = [
+            ctx.Process(target=_embed_worker, args=(config, self.tasks, self.results, batch_size), daemon=True)
+            for _ in range(workers)
+        ]
+        for p in self.procs:
+            p.start()
+        self._next_seq = 0
+        self._next_out = 0
+        self._ready: Dict[int, object] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return self._next_seq - self._next_out
+
+    def submit(self, texts: List[str]):
+        self.tasks.put((self._next_seq, texts))
+        self._next_seq += 1
+
+    def next_result(self) -> np.ndarray:
+        """Nächstes Ergebnis in Reihenfolge (wartet; puffert vorzeitig fertige Batches)."""
+        while self._next_out not in self._ready:
+            seq, value = self.results.get()
+            self._ready[seq] = value
+        value = self._ready.pop(self._next_out)
+        self._next_out += 1
+        if isinstance(value, str):
+            raise RuntimeError(value)
+        return value
+
+    def close(self):
+        for _ in self.procs:
+            self.tasks.put(None)
+        for p in self.procs:
+            p.join(timeout=10)
+            if p.is_alive():
+                p.terminate()
+
+
+# -----------------------------
+# Checkpoints
+# -----------------------------
+def _head_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read(HEAD_BYTES)).hexdigest()
+
+
+def _checkpoint_path(memory_dir: str, path: str) -> str:
+    name = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(memory_dir, CHECKPOINT_DIR, f"{name}.json")
+
+
+def load_checkpoint(memory_dir: str, path: str) -> Optional[dict]:
+    """Checkpoint einer Datei, falls er noch zu ihr passt (gleicher Anfang, nicht geschrumpft)."""
+    cp_path = _checkpoint_path(memory_dir, path)
+    try:
+        with open(cp_path, "r", encoding="utf-8") as f:
+            cp = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if cp.get("head") != _head_hash(path) or os.path.getsize(path) < cp.get("offset", 0):
+        print(f"[WARN] Import: {path} hat sich geändert - Checkpoint verworfen, Neustart bei 0")
+        return None
+    return cp
+
+
+def _save_checkpoint(memory_dir: str, path: str, cp: dict):
+    cp_path = _checkpoint_path(memory_dir, path)
+    os.makedirs(os.path.dirname(cp_path), exist_ok=True)
+    _atomic_write(cp_path, json.dumps(cp, ensure_ascii=False).encode("utf-8"))
+
+
+# -----------------------------
+# Pipeline
+# -----------------------------
+def print_progress(p: dict):
+    pct = f"{100 * p['offset'] / p['size']:5.1f}%" if p["size"] else "  -  "
+    print(f"[INFO] Import {os.path.basename(p['path'])}: {pct} ({p['offset'] / 2**20:.1f}/{p['size'] / 2**20:.1f} MB), "
+          f"{p['chunks']} Chunks, {p['imported']} neu, {p['rate']:.0f} Chunks/s")
+
+
+def import_file(
+    memory,
+    path: str,
+    fmt: Optional[str] = None,
+    category: str = "import",
+    project: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    chunk_size: int = CHUNK_CHARS,
+    overlap: int = CHUNK_OVERLAP,
+    batch_size: int = IMPORT_BATCH,
+    workers: int = 0,
+    resume: bool = True,
+    progress: Optional[Callable[[dict], None]] = print_progress
+) -> dict:
+    """Importiert eine Datei gestreamt in `memory` (LongTermMemory). Gibt die Abschluss-Statistik zurück.
+
+    `fmt`: "txt", "md", "jsonl" oder "chat" (Standard: nach Dateiendung).
+    `workers`: Anzahl Embedding-Prozesse (0 = im aufrufenden Prozess mit dem Modell von `memory`;
+    Worker laden einen Embedder mit `memory.embedder.config` selbst).
+    `resume`: an einem passenden Checkpoint weitermachen (Byte-Offset hinter dem letzten Commit).
+    Metadaten aus der Datei (JSONL: category/tags/timestamp/...) haben Vorrang vor den Argumenten.
+    """
+    fmt = fmt or detect_format(path)
+    if fmt not in READERS:
+        raise ValueError(f"Unbekanntes Import-Format: {fmt}")
+    size = os.path.getsize(path)
+    cp = load_checkpoint(memory.memory_dir, path) if resume else None
+    start = cp["offset"] if cp else 0
+    state = {
+        "path": os.path.abspath(path), "format": fmt, "size": size, "head": _head_hash(path),
+        "offset": start, "chunks": cp["chunks"] if cp else 0, "imported": cp["imported"] if cp else 0,
+        "done": False,
+    }
+    if start:
+        print(f"[INFO] Import {path}: setze bei Byte {start} fort ({state['imported']} bereits importiert)")
+
+    chunks = chunk_pieces(READERS[fmt](path, start), chunk_size, overlap, start)
+    defaults = {"category": category, "project": project, "tags": list(tags or [])}
+    config = getattr(memory.embedder, "config", None)
+    if workers > 0 and config is None:
+        print("[WARN] Embedder ohne Konfiguration (eigenes Modell-Objekt) - Import ohne Worker-Prozesse")
+        workers = 0
+    pool = _EmbedPool(config, workers) if workers > 0 else None
+    pending: List[Tuple[List[dict], int]] = []  # eingereichte Batches: (Items, Offset) in Reihenfolge
+
+    t0 = last_cp = last_report = time.monotonic()
+    chunks_at_start = state["chunks"]
+
+    def commit(items: List[dict], offset: int, vecs: Optional[np.ndarray]):
+        nonlocal last_cp, last_report
+        uuids = memory.add_memories(items, vectors=vecs)
+        state["chunks"] += len(items)
+        state["imported"] += sum(u is not None for u in uuids)
+        state["offset"] = offset
+        now = time.monotonic()
+        if now - last_cp >= CHECKPOINT_EVERY:
+            memory.flush()  # Checkpoint erst, wenn die Einträge selbst sicher sind
+            _save_checkpoint(memory.memory_dir, path, state)
+            last_cp = now
+        if progress is not None and now - last_report >= PROGRESS_INTERVAL:
+            progress(dict(state, rate=(state["chunks"] - chunks_at_start) / max(now - t0, 1e-9)))
+            last_report = now
+
+    def batches() -> Iterator[Tuple[List[dict], int]]:
+        items: List[dict] = []
+        for text, meta, end in chunks:
+            items.append({**defaults, **meta, "text": text})
+            if len(items) >= batch_size:
+                yield items, end
+                items = []
+            last = end
+        if items:
+            yield items, last
+
+    try:
+        for items, offset in batches():
+            if pool is None:
+                commit(items, offset, None)
+                continue
+            # Rückstau: höchstens `capacity` Batches gleichzeitig in Arbeit
+            while pool.in_flight >= pool.capacity:
+                done_items, done_offset = pending.pop(0)
+                commit(done_items, done_offset, pool.next_result())
+            pool.submit([it["text"] for it in items])
+            pending.append((items, offset))
+        while pending:
+            done_items, done_offset = pending.pop(0)
+            commit(done_items, done_offset, pool.next_result())
+        state["offset"] = max(state["offset"], size)  # inkl. Leerzeilen am Dateiende
+        state["done"] = True
+    finally:
+        if pool is not None:
+            pool.close()
+        memory.flush()
+        _save_checkpoint(memory.memory_dir, path, state)
+
+    elapsed = time.monotonic() - t0
+    state["rate"] = (state["chunks"] - chunks_at_start) / max(elapsed, 1e-9)
+    state["elapsed"] = elapsed
+    if progress is not None:
+        progress(state)
+    return state
+
+
+def import_paths(memory, paths: List[str], **options) -> List[dict]:
+    """Importiert Dateien und Ordner (rekursiv, bekannte Endungen) nacheinander."""
+    results = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    if os.path.splitext(name)[1].lower() in EXTENSIONS:
+                        results.append(import_file(memory, os.path.join(root, name), **options))
+        else:
+            results.append(import_file(memory, path, **options))
+    return results
@@ -0,0 +1,177 @@
+# lexical_index.py
+# BM25-Invertindex für das Langzeitgedächtnis (inkrementell, neben dem FAISS-Index)
+# - Tokenizer erhält Bezeichner (auto_analyzer, core/memory.py, ModuleNotFoundError)
+#   und zerlegt sie zusätzlich in Teile (auto, analyzer, module, not, found, error)
+# - add/remove pro Eintrag (rid), Scoring zur Abfragezeit mit aktuellem N/avgdl
+# - Begrenzte Arbeit pro Abfrage: seltene Terme voll, häufige nur über Impact-Listen
+#   (Top-Postings je Term, gecacht und beim Einfügen fortgeschrieben)
+
+import re
+import math
+import heapq
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Abfragebudget: seltene Terme werden vollständig gescannt, bis zu SCAN_BUDGET Postings.
+# Häufigere Terme (kleine idf, lange Listen) werden nur für vorhandene Kandidaten nachgeschlagen;
+# fehlen Kandidaten, steuern sie ihre IMPACT_DEPTH stärksten Postings bei (beim Einfügen gepflegt).
+SCAN_BUDGET = 1024
+IMPACT_DEPTH = 128
+
+_TOKEN_RE = re.compile(r"\w+(?:[./\-:]+\w+)*")
+_SPLIT_RE = re.compile(r"[./\-:_]+")
+_CAMEL_RE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+# "offensichtlich ein Bezeichner": ein Token mit _ . / : - oder camelCase, oder ...Error/Exception
+_IDENT_RE = re.compile(r"^[\w./\-:]+$")
+_IDENT_HINT_RE = re.compile(r"[_./:\-]|[a-z][A-Z]|(Error|Exception)$")
+
+
+def tokenize(text: str) -> List[str]:
+    out: List[str] = []
+    for tok in _TOKEN_RE.findall(text):
+        low = tok.lower()
+        out.append(low)
+        if tok.isalnum() and (tok == low or tok.isupper() or tok.istitle() or tok.isdigit()):
+            continue  # gewöhnliches Wort: nichts zu zerlegen
+        parts = [p for part in _SPLIT_RE.split(tok) for p in _CAMEL_RE.split(part) if p]
+        if len(parts) > 1:
+            out.extend(p.lower() for p in parts)
+    return out
+
+
+def looks_like_identifier(query: str) -> bool:
+    """Dateiname, Modulpfad, snake_case/camelCase oder Fehlername - ohne Leerzeichen."""
+    q = query.strip().strip("`'\"")
+    return bool(q) and bool(_IDENT_RE.match(q)) and bool(_IDENT_HINT_RE.search(q))
+
+
+class LexicalIndex:
+    """term -> {rid: tf}, dazu Dokumentlängen für die BM25-Normalisierung."""
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.doc_len: Dict[int, int] = {}
+        self.total_len = 0
+        # Impact-Listen häufiger Terme: Min-Heap (tf-Gewicht, rid) der IMPACT_DEPTH stärksten Postings
+        self._impact: Dict[str, List[Tuple[float, int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.doc_len)
+
+    def _weight(self, tf: int, dl: int) -> float:
+        """BM25-Termgewicht ohne idf (beim Einfügen mit dem aktuellen avgdl - reicht für Kandidaten)."""
+        avgdl = self.total_len / len(self.doc_len) or 1.0
+        return tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * dl / avgdl))
+
+    def add(self, rid: int, text: str):
+        if rid in self.doc_len:
+            return
+        terms = Counter(tokenize(text))
+        n = sum(terms.values())
+        self.doc_len[rid] = n
+        self.total_len += n
+        for term, tf in terms.items():
+            plist = self.postings.setdefault(term, {})
+            plist[rid] = tf
+            heap = self._impact.get(term)
+            if heap is None:
+                if len(plist) > SCAN_BUDGET:
+                    self._impact_top(term, plist)  # Term wird "häufig": Liste einmalig aufbauen
+            else:
+                w = self._weight(tf, n)
+                if len(heap) < IMPACT_DEPTH:
+                    heapq.heappush(heap, (w, rid))
+                elif w > heap[0][0]:
+                    heapq.heapreplace(heap, (w, rid))
+
+    def remove(self, rid: int, text: str):
+        """Entfernt ein Dokument; `text` liefert die Terme (werden nicht pro Dokument gespeichert)."""
+        n = self.doc_len.pop(rid, None)
+        if n is None:
+            return
+        self.total_len -= n
+        for term in set(tokenize(text)):
+            plist = self.postings.get(term)
+            if plist is not None:
+                plist.pop(rid, None)
+                if not plist:
+                    del self.postings[term]
+            heap = self._impact.get(term)
+            if heap is not None and any(r == rid for _, r in heap):
+                del self._impact[term]  # wird bei der nächsten Abfrage neu aufgebaut
+
+    def _impact_top(self, term: str, plist: Dict[int, int]) -> Iterable[int]:
+        heap = self._impact.get(term)
+        if heap is None:
+            doc_len = self.doc_len
+            heap = heapq.nlargest(IMPACT_DEPTH, ((self._weight(tf, doc_len[r]), r) for r, tf in plist.items()))
+            heapq.heapify(heap)
+            self._impact[term] = heap
+        return (r for _, r in heap)
+
+    def search(self, query: str, k: int, allow: Optional[Set[int]] = None) -> List[Tuple[float, int]]:
+        """Top-k (BM25-Score, rid), absteigend; `allow` beschränkt auf diese rids (Vorfilter).
+        Exakt, solange die Query nur seltene Terme enthält (bzw. `allow` klein ist); sonst ranken
+        häufige Terme nur die Kandidaten der seltenen nach (bzw. ihre Impact-Listen, falls zu wenige).
+        """
+        n_docs = len(self.doc_len)
+        if not n_docs or k <= 0:
+            return []
+        terms = sorted(
+            ((t, self.postings[t]) for t in set(tokenize(query)) if t in self.postings),
+            key=lambda tp: len(tp[1])
+        )
+        if not terms:
+            return []
+
+        k1, doc_len = self.k1, self.doc_len
+        base = k1 * (1 - self.b)
+        per_len = k1 * self.b / (self.total_len / n_docs)
+
+        def idf(plist):
+            df = len(plist)
+            return math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+        scores: Dict[int, float] = {}
+        if allow is not None and len(allow) <= SCAN_BUDGET:
+            # kleiner Vorfilter: direkt über die erlaubten Dokumente
+            scan, lookup = [], terms
+            for rid in allow:
+                if rid in doc_len:
+                    scores[rid] = 0.0
+        else:
+            scan, lookup, budget = [], [], SCAN_BUDGET
+            for term, plist in terms:
+                if len(plist) <= budget:
+                    scan.append((term, plist))
+                    budget -= len(plist)
+                else:
+                    lookup.append((term, plist))
+
+        for _, plist in scan:
+            w = idf(plist)
+            for rid, tf in plist.items():
+                if allow is not None and rid not in allow:
+                    continue
+                s = w * tf * (k1 + 1) / (tf + base + per_len * doc_len[rid])
+                scores[rid] = scores.get(rid, 0.0) + s
+
+        if lookup:
+            if len(scores) < k and (allow is None or len(allow) > SCAN_BUDGET):
+                for term, plist in lookup:
+                    for rid in self._impact_top(term, plist):
+                        if rid not in scores and (allow is None or rid in allow):
+                            scores[rid] = 0.0
+            for _, plist in lookup:
+                w = idf(plist)
+                for rid in scores:
+                    tf = plist.get(rid)
+                    if tf:
+                        scores[rid] += w * tf * (k1 + 1) / (tf + base + per_len * doc_len[rid])
+
+        top = heapq.nlargest(k, ((s, rid) for rid, s in scores.items() if s > 0.0))
+        return [(s, rid) for s, rid in top]
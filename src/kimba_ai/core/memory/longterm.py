@@ -1,46 +1,157 @@
 # longterm_memory.py
-# Semantisches Langzeitgedächtnis mit FAISS + SentenceTransformers
-# - JSON-Metadaten + FAISS-Index + Embeddings-Pickle
-# - Duplikaterkennung per Fingerprint
+# Semantisches Langzeitgedächtnis mit FAISS + austauschbarem Embedder (siehe embedders.py)
+# - Append-only Segmente: float32-Vektor-Log + JSONL-Metadaten-Log + FAISS-Snapshot
+# - Embeddings als memmap über dem Vektor-Log (kein Pickle, keine Kopie pro Zeile)
+# - Embedder (sentence-transformers / ONNX-int8 / Hashing) per Konfiguration, erst beim ersten Encode geladen
+# - Optional Micro-Batching: gleichzeitige Encodes aller Stores im Prozess teilen sich Forward-Passes
+#   (Suchanfragen mit Vorrang, siehe embed_service.py)
+# - Alternativ: SQLite-Backend (backend="sqlite", bestehendes memories-Schema, WAL); die mitgelieferte
+#   kimba_memory/longterm_memories.db kann beim ersten Start übernommen werden (seed_db)
+# - Write-behind: Metadaten/Tombstones + fsync im Hintergrund (durability sync/batched/async)
+# - Index-Engine: flat / IVF / HNSW je nach Größe, optional int8/PQ-komprimiert (siehe vector_index.py)
+# - Cosine-Ähnlichkeit (normalisierte Embeddings + Inner-Product-Index)
+# - Stabile IDs (rid) im Index, Löschen per Tombstone, Kompaktierung im Hintergrund
+# - Nebenläufigkeit: Leser/Schreiber-Sperre - Suchen parallel und auf einem konsistenten Stand
+#   (memories + Lookups + Index), Schreiber serialisiert; Encode läuft außerhalb der Sperre
+# - Duplikaterkennung per Fingerprint, optional Near-Duplikate (ANN-Probe / MinHash, siehe dedupe.py)
 # - Projekt-/Namespace-Tagging
-# - Robustes Laden/Speichern (atomic), Konsistenz-Checks
+# - Vorgefilterte Suche (project/category/mood/tags/Zeitraum) über invertierte Indizes
+# - Hybride Suche: BM25 (lexical_index.py) + Vektor, fusioniert per Reciprocal Rank Fusion
+# - Optionales Ranking (Aktualität/Wichtigkeit/Kategorie) über den ANN-Kandidaten-Pool
+# - LRU-Cache für Query-Embeddings, kurzlebiger Ergebnis-Cache (bei Änderungen geleert)
+# - Robustes Laden/Speichern (atomic, Manifest-Commit), Konsistenz-Checks
+# - Recovery nach unsauberem Ende: Blockprüfsummen + Zeilen-CRC, nur Schäden neu berechnen
 
 import os
+import re
 import json
 import time
 import uuid
 import pickle
+import atexit
+import weakref
 import hashlib
-from typing import List, Tuple, Optional
+import threading
+from typing import List, Tuple, Optional, Iterable, Union, Dict
 
 import numpy as np
-import faiss
-from sentence_transformers import SentenceTransformer
+
+from src.kimba_ai.core.memory.vector_index import VectorIndex, mode_of, quant_of
+from src.kimba_ai.core.memory.metadata_index import MetadataIndex
+from src.kimba_ai.core.memory.lexical_index import LexicalIndex, looks_like_identifier
+from src.kimba_ai.core.memory.ranking import RankingProfile
+from src.kimba_ai.core.memory.dedupe import DedupePolicy, MinHashLSH, same_scope
+from src.kimba_ai.core.memory.rwlock import RWLock
+from src.kimba_ai.core.memory.embedders import (
+    Embedder, ModelEmbedder, SentenceTransformerEmbedder, make_embedder, EMBEDDING_MODEL, EMBED_DIM
+)
+from src.kimba_ai.core.memory.embed_service import EmbeddingService, shared_service
+from src.kimba_ai.core.memory.cache import (
+    LRUCache, normalize_query, QUERY_CACHE_SIZE, RESULT_CACHE_SIZE, RESULT_CACHE_TTL
+)
+from src.kimba_ai.core.memory.segments import (
+    VectorLog, MetaLog, TombstoneLog, write_segment, load_manifest, save_manifest, _atomic_write,
+    crc32, pack_index, unpack_index, WRITE_CHUNK_ROWS
+)
+from src.kimba_ai.core.memory.sqlite_store import SQLiteMemoryStore, VectorBuffer, copy_database
+from src.kimba_ai.core.memory.writer import WriteBehind, DURABILITY_MODES, FLUSH_BATCH, FLUSH_INTERVAL
 
 # Speicherpfade
 MEMORY_DIR    = "memory"
+MANIFEST_FILE = "longterm_manifest.json"
+# Segment-Dateien pro Generation (siehe segments.py)
+VECTORS_FILE  = "longterm_vectors.{gen:06d}.f32"
+META_FILE     = "longterm_meta.{gen:06d}.jsonl"
+TOMB_FILE     = "longterm_tomb.{gen:06d}.i64"
+SEEN_FILE     = "longterm_seen.{gen:06d}.jsonl"  # Merges (Near-Duplikate) in bestehende Einträge
+INDEX_FILE    = "longterm_index.{gen:06d}.faiss"
+# Altes Format (vor den Segmenten) - wird beim ersten Start migriert
 MEMORY_JSON   = os.path.join(MEMORY_DIR, "longterm_memory.json")
 FAISS_INDEX   = os.path.join(MEMORY_DIR, "longterm_index.faiss")
 EMBED_PKL     = os.path.join(MEMORY_DIR, "longterm_embeddings.pkl")
+# SQLite-Backend: eine Datenbank (Metadaten + Embedding-BLOBs) + FAISS-Snapshot
+BACKENDS      = ("segments", "sqlite")
+DB_FILE       = "longterm_memories.db"
+DB_INDEX_FILE = "longterm_index.sqlite.faiss"
+# Mitgelieferte Datenbank (altes Schema, 1536-D-Embeddings) - Vorlage für den ersten Start mit SQLite
+SHIPPED_DB    = os.path.join(os.path.dirname(os.path.abspath(__file__)), "kimba_memory", DB_FILE)
+
+# Kompaktierung, sobald der Log-Anteil seit der letzten Kompaktierung
+# größer als COMPACT_RATIO * Basisgröße ist (amortisiert O(1) pro Append)
+COMPACT_RATIO = 0.5
+COMPACT_MIN   = 256
+# ... oder sobald der Anteil gelöschter Zeilen TOMBSTONE_RATIO überschreitet
+TOMBSTONE_RATIO = 0.25
+TOMBSTONE_MIN   = 64
+
+# Embedding: EMBEDDING_MODEL / EMBED_DIM (384-D, all-MiniLM-L6-v2) kommen aus embedders.py
+METRIC = "cosine"  # Inner Product auf L2-normalisierten Vektoren
+ENCODE_BATCH_SIZE = 64  # Texte pro Forward-Pass bei Batch-Importen
+# fsync-Policy: "always" (jeder Commit), "interval" (höchstens alle FSYNC_INTERVAL s), "never" (OS)
+FSYNC_POLICIES = ("always", "interval", "never")
+FSYNC_INTERVAL = 1.0
+# Gefilterte Suche: bis zu dieser Kandidatenzahl exakt per Matrixprodukt über die
+# Teilmenge, darüber ANN-Suche mit IDSelector auf die erlaubten IDs
+EXACT_SCAN_MAX = 8192
+
+# Hybride Suche: Kandidaten je Rangliste und Konstante der Reciprocal Rank Fusion
+HYBRID_POOL = 50
+RRF_K = 60
+
+# Felder, die ein Merge an einem bestehenden Eintrag ändert (Seen-Log bzw. SQLite-Spalten)
+SEEN_FIELDS = ("seen", "last_seen", "importance")
+# Near-Duplikate innerhalb eines Batches: exakter Vergleich in Blöcken dieser Größe
+DEDUPE_BLOCK = 1024
 
-# Embedding-Modell (384-D Vektor)
-EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
-EMBED_DIM = 384  # all-MiniLM-L6-v2
+_SEGMENT_RE = re.compile(r"^longterm_(vectors|meta|tomb|seen|index)\.(\d{6})\.(f32|jsonl|i64|faiss)(\.tmp)?$")
 
-def _ensure_dirs():
-    os.makedirs(MEMORY_DIR, exist_ok=True)
+def _ensure_dirs(memory_dir: str = MEMORY_DIR):
+    os.makedirs(memory_dir, exist_ok=True)
 
-def _atomic_write(path: str, data: bytes):
-    tmp = f"{path}.tmp"
-    with open(tmp, "wb") as f:
-        f.write(data)
-    os.replace(tmp, path)
+def _normalize(mat: np.ndarray) -> np.ndarray:
+    """L2-Normalisierung in-place (Nullvektoren bleiben null)."""
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    np.divide(mat, norms, out=mat, where=norms > 0)
+    return mat
 
-def _atomic_write_text(path: str, text: str):
-    tmp = f"{path}.tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        f.write(text)
-    os.replace(tmp, path)
+def _filter_key(filters: dict) -> tuple:
+    """Hashbarer Cache-Schlüssel für Suchfilter (Listen -> sortierte Tupel)."""
+    return tuple(
+        (k, v if isinstance(v, (str, int, float)) else tuple(sorted(v)))
+        for k, v in sorted(filters.items()) if v is not None
+    )
+
+def _fsync_policy(fsync: Union[bool, str]) -> str:
+    """Bool (alte Signatur) oder Policy-Name -> Policy-Name."""
+    if isinstance(fsync, bool):
+        return "always" if fsync else "never"
+    if fsync not in FSYNC_POLICIES:
+        raise ValueError(f"Unbekannte fsync-Policy: {fsync}")
+    return fsync
+
+def _close_at_exit(ref: "weakref.ref"):
+    """Shutdown-Hook: Write-behind leeren und Index sichern (schwache Referenz - kein Leak)."""
+    store = ref()
+    if store is not None:
+        store.close()
+
+def _seen_update(mem: dict) -> dict:
+    """Eintrag im Seen-Log: rid + die Felder, die ein Merge ändert."""
+    return {"rid": mem["rid"], **{k: mem[k] for k in SEEN_FIELDS if k in mem}}
+
+def _rrf(rankings: Iterable[List[Tuple[float, dict]]], limit: int) -> List[Tuple[float, dict]]:
+    """Reciprocal Rank Fusion über Ranglisten von (score, memory), normiert auf [0..1]
+    (1.0 = Platz 1 in jeder Liste). Die Scores der Eingaben zählen nicht, nur die Ränge."""
+    rankings = list(rankings)
+    best = len(rankings) / (RRF_K + 1)
+    scores: Dict[int, float] = {}
+    by_rid: Dict[int, dict] = {}
+    for ranking in rankings:
+        for rank, (_, m) in enumerate(ranking):
+            scores[m["rid"]] = scores.get(m["rid"], 0.0) + 1.0 / (RRF_K + rank + 1)
+            by_rid[m["rid"]] = m
+    top = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+    return [(s / best, by_rid[rid]) for rid, s in top]
 
 def _fingerprint(text: str) -> str:
     """Stabile Duplikat-Erkennung (casefold + whitespace-normalisiert + sha256)."""
@@ -49,94 +160,695 @@ def _fingerprint(text: str) -> str:
 
 
 class LongTermMemory:
-    def __init__(self, model_name: str = EMBEDDING_MODEL):
-        _ensure_dirs()
-        self.model_name = model_name
-        self.model = SentenceTransformer(self.model_name)
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        memory_dir: str = MEMORY_DIR,
+        compact_ratio: float = COMPACT_RATIO,
+        fsync: Union[bool, str] = False,
+        model=None,
+        index_config: Optional[dict] = None,
+        backend: str = "segments",
+        durability: str = "sync",
+        flush_batch: int = FLUSH_BATCH,
+        flush_interval: float = FLUSH_INTERVAL,
+        dedupe: Optional[dict] = None,
+        embedder: Union[None, str, dict, Embedder] = None,
+        batching: Union[None, bool, dict] = None,
+        db_path: Optional[str] = None,
+        seed_db: Optional[str] = None
+    ):
+        """`embedder`: Backend-Name ("sentence-transformers", "onnx", "hashing"), Konfiguration
+        ({"backend": ..., Optionen}) oder fertiges Objekt; None = configs/embedding.json (siehe embedders.py).
+        Das Modell wird erst beim ersten Encode geladen.
+        `model_name`: sentence-transformers-Modell (ältere Signatur, statt `embedder`).
+        `model`: optional bereits geladener Encoder mit `.encode()` (z.B. für Benchmarks).
+        `index_config`: Optionen für VectorIndex (mode, ann_threshold, ann_kind, nprobe, ef_search, ...).
+        `backend`: "segments" (Append-Logs + memmap) oder "sqlite" (`db_path`).
+        `db_path`: SQLite-Datei (Standard: `<memory_dir>/longterm_memories.db`); der Index-Snapshot liegt daneben.
+        `seed_db`: bestehende Datenbank (z.B. SHIPPED_DB), die beim ersten Start nach `db_path` kopiert wird,
+        falls dort noch keine liegt - Zeilen mit fremden Embeddings (1536-D) werden dann neu berechnet.
+        `durability`: "sync" (Persistenz im Aufrufer), "batched" (Group Commit, Aufrufer wartet)
+        oder "async" (Write-behind nach `flush_batch`/`flush_interval`, Verlustfenster bei Absturz).
+        `fsync`: True/False oder Policy "always" / "interval" / "never".
+        `dedupe`: Near-Duplikate beim Einfügen zusammenführen (None = aus, {} = Standardwerte;
+        threshold, minhash_threshold, min_chars, probe - siehe dedupe.py).
+        `batching`: Encodes über den prozessweiten Micro-Batching-Dienst des Embedders leiten
+        (None/False = direkt, True = Standardwerte, dict = window_ms, max_batch, max_pending - siehe embed_service.py).
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unbekanntes Backend: {backend}")
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unbekannter Durability-Modus: {durability}")
+        if backend == "sqlite" and durability != "sync":
+            # rid = rowid wird beim INSERT vergeben -> Transaktion muss im Aufrufer laufen
+            raise ValueError("backend='sqlite' unterstützt nur durability='sync'")
+        _ensure_dirs(memory_dir)
+        self.memory_dir = memory_dir
+        self.db_path = db_path or os.path.join(memory_dir, DB_FILE)
+        self.seed_db = seed_db
+        if model is not None:
+            self.embedder = ModelEmbedder(model, name=model_name or EMBEDDING_MODEL)
+        elif embedder is None and model_name is not None:
+            self.embedder = SentenceTransformerEmbedder(model_name)
+        else:
+            self.embedder = make_embedder(embedder)
+        if self.embedder.dim != EMBED_DIM:
+            raise ValueError(f"Embedder '{self.embedder.name}' liefert {self.embedder.dim}-D, Store erwartet {EMBED_DIM}-D")
+        if batching:
+            self.embedder = shared_service(self.embedder, **(batching if isinstance(batching, dict) else {}))
+        self.model_name = self.embedder.name
+        self.compact_ratio = compact_ratio
+        self.fsync_policy = _fsync_policy(fsync)
+        self.durability = durability
+        self.dedupe = DedupePolicy.from_dict(dedupe) if dedupe is not None else None
+        self._last_fsync = time.monotonic()
+        self._dirty = False  # ungesyncte Writes (fsync-Policy "interval")
+        self._closed = False
+        self.manifest_path = os.path.join(memory_dir, MANIFEST_FILE)
+
+        # In-Memory-Daten (positionsgleich mit den Segment-Logs; None = Tombstone)
+        # Die Vektoren selbst liegen im Vektor-Log und werden per memmap gelesen (`embeddings`)
+        self.memories: List[Optional[dict]] = []   # Metadaten-Liste
+        # fetch: Originalvektoren für das exakte Nachsortieren bei komprimiertem Index (quantize)
+        self.index = VectorIndex(EMBED_DIM, self._live_source, fetch=self._vectors, **(index_config or {}))
+
+        # Lookup-Tabellen: Fingerprint -> UUID (Dedupe), UUID/rid -> Position in memories/embeddings
+        self._fp_index: Dict[str, str] = {}
+        self._pos: Dict[str, int] = {}
+        self._rid_pos: Dict[int, int] = {}
+        self._meta = MetadataIndex()  # project/category/mood/tags/timestamp -> rids
+        # BM25: Term -> rids; beim ersten lexikalischen Zugriff aufgebaut, danach im selben
+        # Schreibpfad wie _meta gepflegt (None = noch nicht gebraucht, kein Aufwand beim Laden)
+        self._lex: Optional[LexicalIndex] = None
+        # MinHash/LSH der langen Texte (nur mit dedupe; ebenfalls erst bei Bedarf aufgebaut)
+        self._lsh: Optional[MinHashLSH] = None
+        self._next_rid = 0     # stabile Index-ID, überlebt Kompaktierungen
+        self._dead_rows = 0    # Tombstones seit der letzten Kompaktierung
+
+        # Caches: Query-Text -> Embedding, (Query, limit, Filter, Datenstand) -> Treffer
+        self._query_cache = LRUCache(QUERY_CACHE_SIZE)
+        self._result_cache = LRUCache(RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL)
+        self._data_version = 0  # zählt jede Änderung am Bestand (Teil des Ergebnis-Schlüssels)
 
-        # In-Memory-Daten
-        self.memories: List[dict] = []   # Metadaten-Liste
-        self.embeddings: List[np.ndarray] = []  # float32-Vektoren
-        self.index: Optional[faiss.IndexFlatL2] = None
+        # Segment-Zustand
+        self.generation = 0
+        self._base_count = 0  # Anzahl Einträge bei der letzten Kompaktierung
+        self._files: dict = {}  # Manifest-Einträge je Datei (Generation, Zeilen, Prüfsummen)
+        self._vlog: Optional[VectorLog] = None
+        self._mlog: Optional[MetaLog] = None
+        self._tlog: Optional[TombstoneLog] = None
+        self._slog: Optional[MetaLog] = None
+        self._db: Optional[SQLiteMemoryStore] = None  # nur backend="sqlite"
 
-        # Laden (Metadaten + Embeddings + FAISS)
-        self._load_memories()
-        self._load_embeddings()
-        self._load_or_build_faiss()
+        # Leser/Schreiber-Sperre: Suchen teilen sich die Lesesperre und sehen nie einen halben
+        # Schreibvorgang (Kompaktierung tauscht memories/Lookups/Index unter der Schreibsperre);
+        # Schreiber sind serialisiert. Kompaktierung läuft im Hintergrund.
+        self._lock = RWLock()
+        self._read_lock = self._lock.read
+        self._write_lock = self._lock.write
+        self._compact_lock = threading.RLock()  # Reihenfolge: erst _compact_lock, dann _write_lock
+        self._lazy_lock = threading.Lock()      # Lazy-Aufbau abgeleiteter Indizes (BM25) unter der Lesesperre
+        # Offene Log-Handles: Appends/fsync (auch aus dem Write-behind-Thread, ohne _write_lock) gegen
+        # Schließen/Generationswechsel (compact, close). Reihenfolge: erst _write_lock, dann _log_lock
+        self._log_lock = threading.Lock()
+        self._compactor: Optional[threading.Thread] = None
 
-        # Konsistenz checken
-        self._rebuild_if_inconsistent()
+        # Write-behind: Metadaten-/Tombstone-Appends + fsync im Hintergrund
+        self._writer: Optional[WriteBehind] = None
+        if durability != "sync":
+            self._writer = WriteBehind(self._persist, durability, flush_batch, flush_interval)
+        atexit.register(_close_at_exit, weakref.ref(self))
+
+        # Laden (Manifest -> Segmente -> FAISS), altes Format ggf. migrieren
+        if backend == "sqlite":
+            self._load_sqlite()
+            return
+        manifest = load_manifest(self.manifest_path)
+        if manifest is None:
+            self._migrate_legacy()
+        else:
+            self._load_segments(manifest)
 
     # -----------------------------
     # Laden / Speichern
     # -----------------------------
-    def _load_memories(self):
-        if os.path.exists(MEMORY_JSON):
-            with open(MEMORY_JSON, "r", encoding="utf-8") as f:
+    def _path(self, pattern: str, gen: Optional[int] = None) -> str:
+        return os.path.join(self.memory_dir, pattern.format(gen=self.generation if gen is None else gen))
+
+    def _open_logs(self):
+        # fsync steuert _sync_logs() gemäß Policy, nicht jeder einzelne Append
+        self._vlog = VectorLog(self._path(VECTORS_FILE), EMBED_DIM)
+        self._mlog = MetaLog(self._path(META_FILE))
+        self._tlog = TombstoneLog(self._path(TOMB_FILE))
+        self._slog = MetaLog(self._path(SEEN_FILE))
+
+    def _close_logs(self):
+        for log in (self._vlog, self._mlog, self._tlog, self._slog):
+            if log is not None:
+                log.close()
+
+    def _load_segments(self, manifest: dict):
+        self.generation = int(manifest["generation"])
+        self._base_count = int(manifest.get("count", 0))
+        self._next_rid = int(manifest.get("next_rid", 0))
+        self._files = manifest.get("files", {})
+        self._check_model(manifest.get("model"))
+        self._open_logs()
+        self.memories = self._mlog.read_all()
+
+        # Einmalige Migration: alte Stores mit unnormalisierten L2-Vektoren
+        migrate = manifest.get("metric") != METRIC
+        if migrate:
+            self._vlog.rewrite(_normalize(self._vlog.read_all()))
+
+        # Konsistenz checken (abgerissener Append, nach Absturz auch Prüfsummen), danach Lookups + Tombstones
+        self._recover_vectors(verify=not manifest.get("clean", False))
+        self._reindex()
+        self._apply_seen(self._slog.read_all())
+        dropped = self._drop_rids(self._tlog.read_all().tolist())
+
+        # Stores ohne stabile IDs (vor rid) ebenfalls einmalig neu aufbauen
+        if migrate or "next_rid" not in manifest:
+            self._rebuild_faiss()
+            self.compact()
+        else:
+            self._load_or_build_faiss(manifest.get("index"), dropped)
+        self._remove_stale_segments()
+        self._commit_manifest()  # "clean": false bis zum nächsten close()
+
+    def _check_model(self, stored: Optional[str]):
+        """Warnt, wenn die gespeicherten Vektoren von einem anderen Embedder stammen."""
+        if stored and stored != self.model_name:
+            print(f"[WARN] Vektoren im Store stammen von '{stored}', aktiver Embedder ist '{self.model_name}' - "
+                  f"Ähnlichkeiten sind nicht vergleichbar (Embedder zurückstellen oder Store neu importieren)")
+
+    def _apply_seen(self, updates: List[dict]):
+        """Spielt Merges (seen/last_seen/importance) per rid auf die geladenen Einträge ein."""
+        for u in updates:
+            pos = self._rid_pos.get(u.get("rid"))
+            if pos is not None:
+                self.memories[pos].update((k, u[k]) for k in SEEN_FIELDS if k in u)
+
+    def _load_sqlite(self):
+        if self.seed_db is not None and copy_database(self.seed_db, self.db_path):
+            print(f"[INFO] Bestehende Datenbank übernommen: {self.seed_db} -> {self.db_path}")
+        self._db = SQLiteMemoryStore(self.db_path, EMBED_DIM, fsync=self.fsync_policy == "always")
+        self._vlog = VectorBuffer(EMBED_DIM)
+        manifest = self._db.get_meta("manifest") or {}
+        self._check_model(manifest.get("model"))
+        self._ingest_db_rows()
+        self._base_count = len(self.memories)
+        self._load_db_faiss(manifest.get("index"))
+
+    def _ingest_db_rows(self) -> int:
+        """Übernimmt neue SQLite-Zeilen (rowid > zuletzt geladen) in Speicher und Lookups.
+        Zeilen ohne passendes Embedding (NULL / anderes Modell) werden neu berechnet und zurückgeschrieben.
+        """
+        records, mat, missing = self._db.load()
+        keep = [i for i, m in enumerate(records) if m["rid"] not in self._rid_pos]  # eigene Inserts überspringen
+        if not keep:
+            return 0
+        if len(keep) != len(records):
+            missing_set = set(missing)
+            missing = [j for j, i in enumerate(keep) if i in missing_set]
+            records, mat = [records[i] for i in keep], mat[keep]
+        if missing:
+            mat[missing] = self._encode([records[i]["text"] for i in missing])
+        _normalize(mat)  # idempotent; ältere Zeilen sind ggf. unnormalisiert
+
+        # fehlende uuid/fp (z.B. Zeilen aus dem alten Schema) vergeben und zurückschreiben
+        changed = [i for i, m in enumerate(records) if m["uuid"] is None or m["fp"] is None]
+        for i in changed:
+            records[i]["uuid"] = records[i]["uuid"] or str(uuid.uuid4())
+            records[i]["fp"] = records[i]["fp"] or _fingerprint(records[i]["text"])
+        fix = sorted(set(changed) | set(missing))
+        if fix:
+            self._db.update([records[i] for i in fix], mat[fix])
+
+        start = len(self.memories)
+        self._vlog.append(mat)
+        self.memories.extend(records)
+        self._reindex(start)
+        return len(records)
+
+    def _migrate_legacy(self):
+        """Übernimmt JSON + Pickle des alten Formats in die erste Segment-Generation."""
+        legacy_json = os.path.join(self.memory_dir, os.path.basename(MEMORY_JSON))
+        legacy_pkl = os.path.join(self.memory_dir, os.path.basename(EMBED_PKL))
+        legacy_faiss = os.path.join(self.memory_dir, os.path.basename(FAISS_INDEX))
+
+        mat = np.zeros((0, EMBED_DIM), dtype="float32")
+        if os.path.exists(legacy_json):
+            with open(legacy_json, "r", encoding="utf-8") as f:
                 self.memories = json.load(f)
+        if os.path.exists(legacy_pkl):
+            with open(legacy_pkl, "rb") as f:
+                rows = pickle.load(f)
+            if len(rows):
+                mat = _normalize(np.vstack(rows).astype("float32"))  # eine Kopie statt einer pro Zeile
+            del rows
+
+        if len(mat) != len(self.memories):
+            # Zuordnung unklar -> komplett neu berechnen
+            texts = [m["text"] for m in self.memories]
+            mat = self._encode(texts) if texts else np.zeros((0, EMBED_DIM), dtype="float32")
+
+        # Generation 0 = unveränderte Übernahme, danach regulär kompaktieren (Index + Manifest)
+        self._reindex()
+        write_segment(self._path(VECTORS_FILE), self._path(META_FILE), mat, self.memories)
+        del mat
+        self._open_logs()
+        self._rebuild_faiss()
+        self.compact()
+
+        # Altdateien nicht löschen, nur beiseitelegen
+        for p in (legacy_json, legacy_pkl, legacy_faiss):
+            if os.path.exists(p):
+                os.replace(p, p + ".migrated")
+
+    def _encode(self, texts: List[str], batch_size: int = ENCODE_BATCH_SIZE, priority: str = "bulk") -> np.ndarray:
+        """`priority` ("interactive" / "bulk") zählt nur mit Micro-Batching-Dienst."""
+        if isinstance(self.embedder, EmbeddingService):
+            vecs = self.embedder.encode(texts, batch_size=batch_size, priority=priority)
         else:
-            self.memories = []
+            vecs = self.embedder.encode(texts, batch_size=batch_size)
+        vecs = np.array(vecs, dtype="float32", copy=True).reshape(len(texts), EMBED_DIM)
+        return _normalize(vecs)
+
+    def _encode_query(self, query: str) -> np.ndarray:
+        """Query-Embedding mit LRU-Cache (Schlüssel: whitespace-normalisierter Text)."""
+        key = normalize_query(query)
+        q = self._query_cache.get(key)
+        if q is None:
+            q = self._encode([query], priority="interactive")
+            self._query_cache.put(key, q)
+        return q
+
+    def _invalidate(self):
+        """Nach jeder Änderung am Bestand: gecachte Suchergebnisse verwerfen."""
+        self._data_version += 1
+        self._result_cache.clear()
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        """Alle Vektoren der aktuellen Generation (read-only memmap, positionsgleich mit `memories`)."""
+        if self._vlog is None:
+            return np.zeros((0, EMBED_DIM), dtype="float32")
+        return self._vlog.matrix()
+
+    def _rows(self, positions: List[int]) -> np.ndarray:
+        if not len(positions):
+            return np.zeros((0, EMBED_DIM), dtype="float32")
+        return self.embeddings[np.asarray(positions, dtype="int64")]
+
+    def _vectors(self, rids: np.ndarray) -> np.ndarray:
+        """Originalvektoren (memmap) zu Index-IDs; unbekannte/gelöschte IDs ergeben Nullzeilen."""
+        with self._read_lock:
+            positions = np.fromiter((self._rid_pos.get(r, -1) for r in rids.tolist()), dtype="int64", count=len(rids))
+            out = np.zeros((len(rids), EMBED_DIM), dtype="float32")
+            known = positions >= 0
+            if known.any():
+                out[known] = self.embeddings[positions[known]]
+            return out
+
+    def _live_positions(self) -> List[int]:
+        return [i for i, m in enumerate(self.memories) if m is not None]
+
+    def _live_source(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(Matrix, rids) aller lebenden Einträge - Quelle für Index-Aufbau/Training."""
+        with self._read_lock:
+            if not self._dead_rows and len(self.memories) == self._vlog.count:
+                # keine Tombstones -> die memmap selbst, ohne Kopie
+                rids = np.array([m["rid"] for m in self.memories], dtype="int64")
+                return self.embeddings, rids
+            rows = self._live_positions()
+            rids = np.array([self.memories[i]["rid"] for i in rows], dtype="int64")
+            return self._rows(rows), rids
+
+    def _reindex(self, start: int = 0, positions_only: bool = False):
+        """Baut die Lookup-Tabellen ab Position `start` neu auf (beim Laden komplett).
+        `positions_only`: nur Positionen neu zuordnen (Kompaktierung - rids/Fingerprints bleiben gleich).
+        """
+        if start == 0:
+            self._pos = {}
+            self._rid_pos = {}
+            self._dead_rows = 0
+            if not positions_only:
+                self._fp_index = {}
+                self._meta.clear()
+                self._lex = None
+                self._lsh = None
+        for i in range(start, len(self.memories)):
+            m = self.memories[i]
+            if m is None:
+                self._dead_rows += 1
+                continue
+            if positions_only:
+                self._pos[m["uuid"]] = i
+                self._rid_pos[m["rid"]] = i
+                continue
+            fp = m.get("fp") or _fingerprint(m["text"])
+            m["fp"] = fp
+            if "rid" not in m:
+                m["rid"] = self._next_rid
+            self._next_rid = max(self._next_rid, m["rid"] + 1)
+            self._fp_index[fp] = m["uuid"]
+            self._pos[m["uuid"]] = i
+            self._rid_pos[m["rid"]] = i
+            self._meta.add(m)
+            if self._lex is not None:
+                self._lex.add(m["rid"], m["text"])
+            if self._lsh is not None:
+                self._lsh_add(m)
+
+    def _drop_rids(self, rids: Iterable[int]) -> List[Tuple[int, int]]:
+        """Setzt Tombstones im Speicher; gibt (Position, rid) der getroffenen Einträge zurück."""
+        dropped = []
+        for rid in rids:
+            pos = self._rid_pos.pop(rid, None)
+            if pos is None:
+                continue
+            m = self.memories[pos]
+            self._pos.pop(m["uuid"], None)
+            if self._fp_index.get(m["fp"]) == m["uuid"]:
+                del self._fp_index[m["fp"]]
+            self._meta.remove(m)
+            if self._lex is not None:
+                self._lex.remove(m["rid"], m["text"])
+            if self._lsh is not None:
+                self._lsh.remove(m["rid"])
+            self.memories[pos] = None
+            self._dead_rows += 1
+            dropped.append((pos, rid))
+        return dropped
+
+    def _rebuild_faiss(self):
+        self.index.rebuild(*self._live_source())
+
+    def _load_db_faiss(self, index_meta: Optional[dict] = None):
+        """SQLite-Variante: Header = höchste abgedeckte rowid; Zeilen danach werden nachgetragen."""
+        path = self._db_index_path()
+        if not os.path.exists(path):
+            self._rebuild_faiss()
+            return
+        with open(path, "rb") as f:
+            snapshot = unpack_index(f.read())
+        if snapshot is None or not self.index.load(snapshot[1], index_meta):
+            self._rebuild_faiss()
+            return
+        last_rid = snapshot[0]
+        tail = [i for i, m in enumerate(self.memories) if m["rid"] > last_rid]
+        if self.index.live != len(self.memories) - len(tail):
+            # außerhalb des Snapshots gelöscht (z.B. anderer Prozess / Absturz) -> neu aufbauen
+            self._rebuild_faiss()
+            return
+        if tail:
+            self.index.add(self._rows(tail), [self.memories[i]["rid"] for i in tail])
+        self.index.maybe_migrate()
+
+    def _db_index_path(self) -> str:
+        return os.path.join(os.path.dirname(self.db_path) or ".", DB_INDEX_FILE)
+
+    def _load_or_build_faiss(self, index_meta: Optional[dict] = None, dropped: Optional[list] = None):
+        path = self._path(INDEX_FILE)
+        if not os.path.exists(path):
+            self._rebuild_faiss()
+            return
+        with open(path, "rb") as f:
+            snapshot = unpack_index(f.read())
+        # Header: Anzahl Log-Zeilen, die der Snapshot abdeckt (+ CRC, s. segments.py)
+        if snapshot is None or snapshot[0] > len(self.memories) or not self.index.load(snapshot[1], index_meta):
+            self._rebuild_faiss()
+            return
+        rows = snapshot[0]
+
+        # Index-Snapshot ist ein Präfix -> nur den Log-Tail nachtragen
+        tail = [i for i in range(rows, len(self.memories)) if self.memories[i] is not None]
+        if tail:
+            self.index.add(self._rows(tail), [self.memories[i]["rid"] for i in tail])
+        # Tombstones nach dem Snapshot (ohne Einträge, die eine Kompaktierung schon aus dem Index
+        # entfernt hat - sonst zählte `live` Phantom-Tombstones)
+        self.index.delete(self.index.present([rid for pos, rid in (dropped or []) if pos < rows]))
+        # Modus-Wechsel per Config oder Schwellwert
+        self.index.maybe_migrate()
 
-    def _save_memories(self):
-        text = json.dumps(self.memories, indent=2, ensure_ascii=False)
-        _atomic_write_text(MEMORY_JSON, text)
+    def _manifest(self) -> dict:
+        return {
+            "generation": self.generation,
+            "count": self._base_count,
+            "next_rid": self._next_rid,
+            "dim": EMBED_DIM,
+            "model": self.model_name,
+            "metric": METRIC,
+            "index": self.index.manifest_entry(),
+            "files": self._files,
+            "clean": self._closed,  # nur close() schreibt true -> sonst Prüfung beim nächsten Start
+        }
 
-    def _load_embeddings(self):
-        if os.path.exists(EMBED_PKL):
-            with open(EMBED_PKL, "rb") as f:
-                self.embeddings = pickle.load(f)
-            # Safety: ensure dtype float32
-            self.embeddings = [np.asarray(v, dtype="float32") for v in self.embeddings]
+    def _save_faiss(self, gen: Optional[int] = None):
+        """Index-Checkpoint innerhalb einer Generation (Log-Tail wird beim Laden nachgetragen)."""
+        if self._db is not None:
+            # Header = höchste geladene (und damit indexierte) rowid
+            _atomic_write(self._db_index_path(), pack_index(self._db.last_id, self.index.serialize()))
+            return
+        rows = len(self.memories)
+        _atomic_write(self._path(INDEX_FILE, gen), pack_index(rows, self.index.serialize()))
+        self._files["index"] = {"gen": self.generation if gen is None else gen, "rows": rows}
+
+    def _commit_manifest(self):
+        if self._db is not None:
+            self._db.set_meta("manifest", self._manifest())
         else:
-            self.embeddings = []
+            save_manifest(self.manifest_path, self._manifest())
+
+    def _recover_vectors(self, verify: bool = False):
+        """Gleicht Vektor-Log und Metadaten ab und berechnet nur fehlende/beschädigte Zeilen neu.
+        `verify` (nach unsauberem Ende): Basis per Blockprüfsumme aus dem Manifest, Tail per Zeilen-CRC.
+        """
+        count_m = len(self.memories)
+        if self._vlog.count > count_m:
+            # Vektor ohne Metadaten-Zeile (Crash zwischen den Appends) -> verwerfen
+            self._vlog.truncate(count_m)
+        count_e = self._vlog.count
+
+        bad = self._damaged_rows(count_e) if verify else []
+        if bad:
+            vecs = self._encode([self.memories[i]["text"] for i in bad])
+            self._vlog.write_rows(bad, vecs)
+            for i, row in zip(bad, vecs):
+                self.memories[i]["vh"] = crc32(row)
+        if count_e < count_m:
+            # Metadaten ohne Vektor -> nur den fehlenden Tail neu berechnen
+            vecs = self._encode([m["text"] for m in self.memories[count_e:]])
+            self._vlog.append(vecs)
+            for m, row in zip(self.memories[count_e:], vecs):
+                m["vh"] = crc32(row)
+        if bad or count_e < count_m:
+            print(f"[INFO] Recovery: {len(bad)} beschädigte + {count_m - count_e} fehlende Vektoren neu berechnet")
+
+    def _damaged_rows(self, count_e: int) -> List[int]:
+        """Positionen, deren Vektor nicht zur Prüfsumme passt."""
+        mat = self._vlog.matrix()
+        info = self._files.get("vectors") or {}
+        base = 0
+        bad: List[int] = []
+        if info.get("gen") == self.generation:
+            step = info.get("block_rows", WRITE_CHUNK_ROWS)
+            base = min(info.get("rows", 0), count_e)
+            for b, crc in enumerate(info.get("blocks", [])):
+                lo, hi = b * step, min((b + 1) * step, info["rows"])
+                if lo >= count_e:
+                    break  # Rest fehlt komplett -> wird als Tail neu berechnet
+                if hi <= count_e and crc32(mat[lo:hi]) == crc:
+                    continue
+                # Block beschädigt: Zeilen einzeln prüfen, ohne Zeilen-CRC komplett neu
+                bad.extend(self._row_mismatches(mat, lo, min(hi, count_e), unknown_bad=True))
+        # Tail seit der letzten Kompaktierung: Zeilen-CRC aus den Metadaten
+        bad.extend(self._row_mismatches(mat, base, count_e, unknown_bad=False))
+        return bad
 
-    def _save_embeddings(self):
-        data = pickle.dumps(self.embeddings, protocol=pickle.HIGHEST_PROTOCOL)
-        _atomic_write(EMBED_PKL, data)
+    def _row_mismatches(self, mat: np.ndarray, lo: int, hi: int, unknown_bad: bool) -> List[int]:
+        out = []
+        for i in range(lo, hi):
+            vh = self.memories[i].get("vh")
+            if vh is None:
+                if unknown_bad:
+                    out.append(i)
+            elif crc32(mat[i]) != vh:
+                out.append(i)
+        return out
 
-    def _load_or_build_faiss(self):
-        if os.path.exists(FAISS_INDEX):
-            self.index = faiss.read_index(FAISS_INDEX)
+    def _remove_stale_segments(self):
+        for name in os.listdir(self.memory_dir):
+            m = _SEGMENT_RE.match(name)
+            if m and (int(m.group(2)) != self.generation or m.group(4)):
+                try:
+                    os.remove(os.path.join(self.memory_dir, name))
+                except OSError:
+                    pass
+
+    def _persist(self, ops: List[tuple], force_sync: bool = False):
+        """Schreibt Operationen in die Logs: ("meta", records), ("tomb", rids) bzw. ("seen", updates).
+        Läuft im Aufrufer (sync) oder im Write-behind-Thread; braucht keinen _write_lock, nur _log_lock.
+        """
+        if not ops and not self._dirty:
+            return  # Leerlauf-Commit ohne ungesyncte Writes: nichts anfassen
+        batches = {"meta": [], "tomb": [], "seen": []}
+        for kind, payload in ops:
+            batches[kind].extend(payload)
+        with self._log_lock:
+            if batches["meta"]:
+                self._mlog.append(batches["meta"])
+            if batches["tomb"]:
+                self._tlog.append(batches["tomb"])
+            if batches["seen"]:
+                self._slog.append(batches["seen"])
+            self._dirty = self._dirty or bool(ops)
+            self._sync_logs(force_sync)
+
+    def _sync_logs(self, force: bool = False):
+        """fsync gemäß Policy. Nur unter _log_lock (Handles können sonst gerade geschlossen werden)."""
+        if not self._dirty or self.fsync_policy == "never":
+            return
+        now = time.monotonic()
+        if force or self.fsync_policy == "always" or now - self._last_fsync >= FSYNC_INTERVAL:
+            for log in (self._vlog, self._mlog, self._tlog, self._slog):
+                log.sync()
+            self._last_fsync = now
+            self._dirty = False
+
+    def _submit(self, kind: str, payload: list):
+        if self._writer is None:
+            self._persist([(kind, payload)])
         else:
-            self.index = faiss.IndexFlatL2(EMBED_DIM)
-            if self.embeddings:
-                mat = np.vstack(self.embeddings).astype("float32")
-                self.index.add(mat)
+            self._writer.submit((kind, payload))
 
-    def _save_faiss(self):
-        faiss.write_index(self.index, FAISS_INDEX)
+    def _drain_writer(self):
+        """Wartet, bis der Write-behind-Thread alles Eingereichte in die Logs geschrieben hat."""
+        if self._writer is not None:
+            self._writer.flush()
 
-    def _rebuild_if_inconsistent(self):
-        count_m = len(self.memories)
-        count_e = len(self.embeddings)
-        count_i = self.index.ntotal if self.index is not None else 0
+    def flush(self):
+        """Macht alle bisherigen Änderungen dauerhaft (Write-behind leeren + fsync, außer Policy "never")."""
+        with self._write_lock:
+            if self._db is not None:
+                return  # jede Transaktion ist bereits committet
+            self._drain_writer()
+            self._persist([], force_sync=True)
 
-        if count_m == count_e == count_i:
-            return  # alles ok
+    def _maybe_compact(self):
+        rows = len(self.memories)
+        grown = rows - self._base_count
+        dead = self._dead_rows
+        if (self._db is None and grown > max(COMPACT_MIN, self.compact_ratio * self._base_count)) or \
+                (dead >= TOMBSTONE_MIN and dead > TOMBSTONE_RATIO * rows):
+            self._start_compactor()
+        elif self.index.swapped:
+            # Hintergrund-Migration fertig -> neuen Index-Modus sichern
+            self._save_faiss()
+            self._commit_manifest()
 
-        # Rebuild aus Metadaten + Embeddings
-        # (falls Embeddings fehlen, neu berechnen)
-        if count_m != count_e:
-            # Embeddings neu aufbauen
-            self.embeddings = []
-            texts = [m["text"] for m in self.memories]
-            if texts:
-                vecs = self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=False)
-                # Safety dtype
-                if vecs.dtype != np.float32:
-                    vecs = vecs.astype("float32")
-                self.embeddings = [v for v in vecs]
-            else:
-                self.embeddings = []
+    def _start_compactor(self):
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(target=self.compact, daemon=True)
+        self._compactor.start()
 
-            self._save_embeddings()
+    def compact(self):
+        """Schreibt die lebenden Einträge als neue Segment-Generation (atomar via Manifest).
+
+        Schreiber werden nur für Snapshot und Umschalten blockiert; Einträge und
+        Löschungen, die währenddessen eintreffen, landen in den Logs der neuen Generation.
+        """
+        if self._db is not None:
+            self._compact_db()
+            return
+        with self._compact_lock:
+            with self._write_lock:
+                gen = self.generation + 1
+                n_snap = len(self.memories)
+                live = self._live_positions()
+                recs = [self.memories[i] for i in live]
+                # memmap-Snapshot der ersten n_snap Zeilen; Appends wachsen nur dahinter
+                mat = self.embeddings[:n_snap]
+                rows = None if len(live) == n_snap else np.asarray(live, dtype="int64")
+                for m, i in zip(recs, live):
+                    if "vh" not in m:
+                        m["vh"] = crc32(mat[i])  # ältere Einträge ohne Zeilen-CRC
 
-        # FAISS neu aufbauen
-        self.index = faiss.IndexFlatL2(EMBED_DIM)
-        if self.embeddings:
-            mat = np.vstack(self.embeddings).astype("float32")
-            self.index.add(mat)
-        self._save_faiss()
+            blocks = write_segment(self._path(VECTORS_FILE, gen), self._path(META_FILE, gen), mat, recs, rows=rows)
+            del mat
+
+            with self._write_lock:
+                self._drain_writer()  # nichts darf mehr in die alten Logs laufen
+                tail = [i for i in range(n_snap, len(self.memories)) if self.memories[i] is not None]
+                tail_recs = [self.memories[i] for i in tail]
+                tail_mat = self._rows(tail)
+                late_dead = [m["rid"] for m in recs if m["rid"] not in self._rid_pos]
+                # Merges seit dem Snapshot ersetzen Records (copy-on-write) -> im neuen Seen-Log nachtragen
+                current = [self.memories[i] for i in live]
+                late_seen = [_seen_update(m) for m, old in zip(current, recs) if m is not None and m is not old]
+
+                # Nachzügler in die Logs der neuen Generation (ein Leerlauf-fsync des Write-behind-Threads
+                # wartet am _log_lock, bis die neuen Handles offen sind)
+                with self._log_lock:
+                    self._close_logs()
+                    self.generation = gen
+                    self._open_logs()
+                    self._vlog.append(tail_mat)
+                    self._mlog.append(tail_recs)
+                    self._tlog.append(late_dead)
+                    self._slog.append(late_seen)
+
+                # In-Memory umschalten (aktuelle Records; nachträglich gelöschte sind bereits None)
+                self.memories = current + tail_recs
+                self._reindex(positions_only=True)
+                self._base_count = len(self.memories)
+                self._files = {
+                    "vectors": {"gen": gen, "rows": len(recs), "block_rows": WRITE_CHUNK_ROWS, "blocks": blocks},
+                    "meta": {"gen": gen, "rows": len(recs)},
+                    "tombstones": {"gen": gen},
+                    "seen": {"gen": gen},
+                }
+
+                # Tombstones aus dem Index räumen, dann Snapshot + Manifest (= Commit)
+                self.index.purge()
+                self._save_faiss(gen)
+                self._commit_manifest()
+                self._remove_stale_segments()
+
+    def _compact_db(self):
+        """SQLite-Backend: Zeilen sind bereits physisch gelöscht - nur RAM-Matrix und Index verdichten."""
+        with self._compact_lock, self._write_lock:
+            live = self._live_positions()
+            self._vlog = VectorBuffer(EMBED_DIM, self._rows(live))
+            self.memories = [self.memories[i] for i in live]
+            self._reindex(positions_only=True)
+            self._base_count = len(self.memories)
+            self.index.purge()
+            self._save_faiss()
+            self._commit_manifest()
+
+    def close(self):
+        """Wartet auf Kompaktierung/Index-Migration, sichert den Index-Snapshot und schließt die Logs."""
+        if self._closed:
+            return
+        if self._compactor is not None:
+            self._compactor.join()
+        self.index.wait()
+        with self._write_lock:
+            self._closed = True
+            if self._writer is not None:
+                self._writer.close()
+            if self._vlog is not None:
+                self._persist([], force_sync=True)
+                self._save_faiss()
+                self._commit_manifest()
+            with self._log_lock:
+                self._close_logs()
+            if self._db is not None:
+                self._db.close()
 
     # -----------------------------
     # API
@@ -148,141 +860,552 @@ class LongTermMemory:
         mood: str = "neutral",
         tags: Optional[List[str]] = None,
         project: Optional[str] = None,
-        timestamp: Optional[int] = None
+        timestamp: Optional[int] = None,
+        importance: int = 0
     ) -> bool:
-        """Fügt eine Erinnerung hinzu. Gibt False zurück, wenn Duplikat (Fingerprint) gefunden wird."""
-        if not text or not text.strip():
-            return False
-
-        fp = _fingerprint(text)
-        if any(m.get("fp") == fp for m in self.memories):
-            return False  # Duplikat
-
-        ts = int(timestamp) if timestamp is not None else int(time.time())
-        mem = {
-            "uuid": str(uuid.uuid4()),
-            "timestamp": ts,
+        """Fügt eine Erinnerung hinzu. Gibt False zurück, wenn Duplikat (Fingerprint) gefunden wird.
+        `importance`: 0 normal, 1 wichtig, 2 sehr wichtig (fließt ins Ranking ein).
+        """
+        item = {
             "text": text,
             "category": category,
             "mood": mood,
-            "tags": tags or [],
+            "tags": tags,
             "project": project,
-            "fp": fp,
+            "timestamp": timestamp,
+            "importance": importance,
         }
+        return self.add_memories([item])[0] is not None
+
+    def add_memories(
+        self,
+        items: Iterable[Union[str, dict]],
+        batch_size: int = ENCODE_BATCH_SIZE,
+        vectors: Optional[np.ndarray] = None
+    ) -> List[Optional[str]]:
+        """Batch-Import: ein Dedupe-Durchlauf, ein Encode (in `batch_size`-Schritten),
+        ein FAISS-Add und ein Persist für den ganzen Batch.
+
+        `items` sind Texte oder Dicts mit den Feldern von `add_memory`.
+        `vectors`: bereits berechnete Embeddings (eine Zeile pro Item, gleiches Modell) - z.B. aus
+        den Worker-Prozessen des Imports; dann entfällt das Encode.
+        Mit `dedupe` werden Near-Duplikate (im Store oder früher im Batch) in den bestehenden
+        Eintrag zusammengeführt (`seen` + 1, `last_seen`) statt neu angelegt.
+        Gibt pro Item die UUID des neuen Eintrags zurück, bzw. None bei leerem Text/Duplikat.
+        """
+        items = [{"text": item} if isinstance(item, str) else item for item in items]
+        fps = [_fingerprint(item.get("text") or "") for item in items]
+        enc_row = np.full(len(items), -1, dtype="int64")  # Item -> Zeile in `encoded` (-1 = noch nicht)
+        if vectors is not None:
+            encoded = np.asarray(vectors, dtype="float32")
+            if encoded.shape != (len(items), EMBED_DIM):
+                raise ValueError(f"vectors: erwartet ({len(items)}, {EMBED_DIM}), nicht {encoded.shape}")
+            enc_row[:] = np.arange(len(items))
+        else:
+            # Encode vor der Schreibsperre: Suchen und andere Schreiber laufen währenddessen weiter.
+            # Ausgelassen: leere Texte, bekannte Fingerprints (auch Wiederholungen im Batch) und lange
+            # Texte des MinHash-Pfads (werden ggf. ohne Encode zusammengeführt, sonst unten nachberechnet)
+            todo, first = [], set()
+            for i, item in enumerate(items):
+                if not (item.get("text") or "").strip() or fps[i] in self._fp_index or fps[i] in first:
+                    continue
+                first.add(fps[i])
+                if not (self.dedupe is not None and self.dedupe.use_minhash(item["text"])):
+                    todo.append(i)
+            encoded = self._encode([items[i]["text"] for i in todo], batch_size=batch_size) if todo else None
+            enc_row[todo] = np.arange(len(todo))
+
+        with self._write_lock:
+            batch_fps = set()
+            results: List[Optional[str]] = []
+            new_mems: List[dict] = []
+            rows: List[int] = []  # Item-Index je neuem Eintrag (Zeile in `vectors`)
+            touched: Dict[int, dict] = {}  # rid -> zusammengeführter Bestandseintrag
+            batch_lsh = MinHashLSH() if self.dedupe is not None else None
+            batch_rids: Dict[int, dict] = {}  # rid -> neuer Eintrag (Ziele für Merges im Batch)
+
+            for row, item in enumerate(items):
+                text = item.get("text") or ""
+                if not text.strip():
+                    results.append(None)
+                    continue
+
+                fp = fps[row]
+                if fp in self._fp_index or fp in batch_fps:
+                    results.append(None)  # Duplikat (im Store oder im Batch)
+                    continue
+                batch_fps.add(fp)
+
+                ts = item.get("timestamp")
+                mem = {
+                    "uuid": str(uuid.uuid4()),
+                    "timestamp": int(ts) if ts is not None else int(time.time()),
+                    "text": text,
+                    "category": item.get("category") or "allgemein",
+                    "mood": item.get("mood") or "neutral",
+                    "tags": item.get("tags") or [],
+                    "project": item.get("project"),
+                    "importance": int(item.get("importance") or 0),
+                    "fp": fp,
+                    # SQLite: vorläufige, batch-lokale rid - insert() vergibt die rowid, Merges verbrauchen keine
+                    "rid": self._next_rid if self._db is None else -1 - row,
+                }
+                if self._db is None:
+                    self._next_rid += 1
+                if batch_lsh is not None and self.dedupe.use_minhash(text) and \
+                        self._merge_text_duplicate(mem, batch_lsh, batch_rids, touched):
+                    results.append(None)  # Near-Duplikat (MinHash, ohne Encode)
+                    continue
+                new_mems.append(mem)
+                batch_rids[mem["rid"]] = mem
+                rows.append(row)
+                results.append(mem["uuid"])
+
+            if not new_mems:
+                self._commit_merges(touched)
+                return results
+
+            # Embeddings der neuen Einträge (vorab berechnet bzw. Rest jetzt) + Zeilen-CRC für die Recovery
+            src = enc_row[np.asarray(rows, dtype="int64")]
+            mat = np.empty((len(new_mems), EMBED_DIM), dtype="float32")
+            have = np.flatnonzero(src >= 0)
+            if len(have):
+                mat[have] = encoded[src[have]]
+            if vectors is not None:
+                _normalize(mat)
+            missing = np.flatnonzero(src < 0)
+            if len(missing):
+                mat[missing] = self._encode([new_mems[j]["text"] for j in missing.tolist()], batch_size=batch_size)
+            if self.dedupe is not None and self.dedupe.threshold is not None:
+                keep = self._merge_vector_duplicates(new_mems, mat, touched)
+                if len(keep) != len(new_mems):
+                    for i in sorted(set(range(len(new_mems))) - set(keep)):
+                        results[rows[i]] = None
+                    new_mems = [new_mems[i] for i in keep]
+                    mat = mat[np.asarray(keep, dtype="int64")]
+            self._commit_merges(touched)
+            if not new_mems:
+                return results
+            for m, row in zip(new_mems, mat):
+                m["vh"] = crc32(row)
+            if self._db is not None:
+                self._db.insert(new_mems, mat)  # eine Transaktion; rid = rowid
+
+            # Erst Vektoren anhängen (memmap-Quelle), dann In-Memory updaten
+            with self._log_lock:
+                self._vlog.append(mat)
+            start = len(self.memories)
+            self.memories.extend(new_mems)
+            self._reindex(start)
+            self.index.add(mat, [m["rid"] for m in new_mems])
+            self._invalidate()
+
+            # Persistieren: Vektoren stehen schon im Log (ohne fsync, für die memmap),
+            # Metadaten-Zeilen = Commit der Einträge - je nach Durability im Hintergrund
+            if self._db is None:
+                self._submit("meta", [dict(m) for m in new_mems])
+            self._maybe_compact()
+            return results
+
+    # -----------------------------
+    # Near-Duplikate (siehe dedupe.py)
+    # -----------------------------
+    def _minhash(self) -> MinHashLSH:
+        """LSH über die langen Texte (beim ersten Aufruf aufgebaut). Nur unter _write_lock."""
+        if self._lsh is None:
+            self._lsh = MinHashLSH()
+            for m in self.memories:
+                if m is not None:
+                    self._lsh_add(m)
+        return self._lsh
+
+    def _lsh_add(self, m: dict):
+        if self.dedupe is not None and self.dedupe.use_minhash(m["text"]):
+            sig = self._lsh.signature(m["text"])
+            if sig is not None:
+                self._lsh.add(m["rid"], sig)
+
+    def _merge_text_duplicate(
+        self, mem: dict, batch_lsh: MinHashLSH, batch: Dict[int, dict], touched: Dict[int, dict]
+    ) -> bool:
+        """MinHash-Pfad für lange Texte: Treffer im Store oder früher im Batch -> Merge, True."""
+        lsh = self._minhash()
+        sig = lsh.signature(mem["text"])
+        if sig is None:
+            return False
+        threshold = self.dedupe.minhash_threshold
+        for _, rid in lsh.candidates(sig, threshold):
+            target = self.memories[self._rid_pos[rid]]
+            if same_scope(target, mem):
+                self._merge_duplicate(target, mem, touched)
+                return True
+        for _, rid in batch_lsh.candidates(sig, threshold):
+            target = batch.get(rid)
+            if target is not None and same_scope(target, mem):
+                self._merge_duplicate(target, mem, touched)
+                return True
+        batch_lsh.add(mem["rid"], sig)
+        return False
+
+    def _merge_vector_duplicates(self, new_mems: List[dict], mat: np.ndarray, touched: Dict[int, dict]) -> List[int]:
+        """Vektor-Pfad: eine Index-Probe für den ganzen Batch, dann exakt gegen die bereits
+        behaltenen Batch-Einträge. Gibt die Positionen der weiterhin neuen Einträge zurück.
+        """
+        threshold, n = self.dedupe.threshold, len(new_mems)
+        targets: List[Optional[dict]] = [None] * n
+        if self.index.live:
+            D, I = self.index.search(mat, min(self.dedupe.probe, self.index.live))
+            for i in range(n):
+                for sim, m in zip(D[i].tolist(), self._resolve(I[i])):
+                    if sim < threshold:
+                        break
+                    if m is not None and same_scope(m, new_mems[i]):
+                        targets[i] = m
+                        break
+
+        keep: List[int] = []
+        for lo in range(0, n, DEDUPE_BLOCK):
+            hi = min(lo + DEDUPE_BLOCK, n)
+            prev = mat[lo:hi] @ mat[np.asarray(keep, dtype="int64")].T if keep else None
+            inner = mat[lo:hi] @ mat[lo:hi].T
+            first = len(keep)  # ab hier stammen die behaltenen Einträge aus diesem Block
+            for i in range(lo, hi):
+                if targets[i] is None:
+                    sims = inner[i - lo, [j - lo for j in keep[first:]]]
+                    if prev is not None:
+                        sims = np.concatenate([prev[i - lo], sims])
+                    for j in np.flatnonzero(sims >= threshold)[np.argsort(-sims[sims >= threshold])].tolist():
+                        if same_scope(new_mems[keep[j]], new_mems[i]):
+                            targets[i] = new_mems[keep[j]]
+                            break
+                if targets[i] is None:
+                    keep.append(i)
+                else:
+                    self._merge_duplicate(targets[i], new_mems[i], touched)
+        return keep
+
+    def _merge_duplicate(self, target: dict, mem: dict, touched: Dict[int, dict]):
+        """Führt `mem` in `target` zusammen: seen-Zähler, last_seen, höhere Wichtigkeit.
+        Bestandseinträge werden ersetzt statt verändert (copy-on-write) - eine laufende
+        Kompaktierung schreibt so einen konsistenten Snapshot und erkennt späte Merges.
+        """
+        pos = self._rid_pos.get(target["rid"])
+        if pos is not None:
+            target = dict(self.memories[pos])
+            self.memories[pos] = target
+            touched[target["rid"]] = target
+        target["seen"] = target.get("seen", 1) + mem.get("seen", 1)
+        target["last_seen"] = max(target.get("last_seen") or target["timestamp"], mem["timestamp"])
+        target["importance"] = max(target.get("importance") or 0, mem.get("importance") or 0)
 
-        # Embedding
-        vec = self.model.encode([text], convert_to_numpy=True)[0]
-        if vec.dtype != np.float32:
-            vec = vec.astype("float32")
+    def _commit_merges(self, touched: Dict[int, dict]):
+        """Merges in Bestandseinträge persistieren (Seen-Log bzw. UPDATE in SQLite)."""
+        if not touched:
+            return
+        updates = [_seen_update(m) for m in touched.values()]
+        if self._db is not None:
+            self._db.touch(updates)
+        else:
+            self._submit("seen", updates)
+        self._invalidate()
 
-        # In-Memory updaten
-        self.memories.append(mem)
-        self.embeddings.append(vec)
-        self.index.add(vec.reshape(1, EMBED_DIM))
+    def get_memory(self, uuid_str: str) -> Optional[dict]:
+        with self._read_lock:
+            idx = self._pos.get(uuid_str)
+            return self.memories[idx] if idx is not None else None
 
-        # Persistieren
-        self._save_memories()
-        self._save_embeddings()
-        self._save_faiss()
-        return True
+    def _resolve(self, ids: np.ndarray) -> List[Optional[dict]]:
+        """Index-IDs (rid) -> Metadaten; veraltete/gelöschte IDs ergeben None."""
+        memories, rid_pos = self.memories, self._rid_pos
+        out: List[Optional[dict]] = []
+        for rid in ids.tolist():
+            pos = rid_pos.get(rid)
+            m = memories[pos] if pos is not None and pos < len(memories) else None
+            out.append(m if m is not None and m["rid"] == rid else None)
+        return out
 
     def semantic_search(
         self,
         query: str,
         limit: int = 5,
-        project: Optional[str] = None
+        project: Optional[str] = None,
+        min_score: Optional[float] = None,
+        category: Optional[str] = None,
+        mood: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        ranking: Optional[RankingProfile] = None
     ) -> List[Tuple[float, dict]]:
         """Semantische Suche. Gibt Liste von (similarity, memory_dict) zurück.
-        similarity ~ [0..1], höher = ähnlicher.
-        Optional: `project` filtert Ergebnisse auf ein Projekt/Namensraum.
+        similarity = Cosine-Ähnlichkeit [-1..1], höher = ähnlicher.
+        Filter (UND-verknüpft, vor der Vektorsuche angewendet): `project`, `category`, `mood`
+        (Wert oder Liste), `tags` (alle müssen passen), `since`/`until` (Unix-Timestamps, inklusive).
+        `min_score` verwirft Treffer unterhalb der Ähnlichkeitsschwelle.
+        `ranking`: sortiert einen Kandidaten-Pool (`ranking.pool`) nach Ähnlichkeit, Aktualität,
+        Wichtigkeit und Kategorie-Gewicht um (siehe ranking.py) - der Score ist dann der kombinierte.
         """
-        if not self.memories or not self.embeddings or self.index is None or self.index.ntotal == 0:
+        if not self._pos or self.index.live == 0:
             return []
+        filters = dict(project=project, category=category, mood=mood, tags=tags, since=since, until=until)
+        pool = limit if ranking is None else max(limit, ranking.pool)
+
+        # Ergebnis-Cache: min_score und Ranking werden erst danach angewendet, damit Aufrufer mit
+        # unterschiedlichen Schwellen/Personas (GUI, Router) denselben Eintrag teilen
+        key = (normalize_query(query), pool, _filter_key(filters), self._data_version)
+        hits = self._result_cache.get(key)
+        if hits is None:
+            hits = self._search_vector(self._encode_query(query), pool, **filters)
+            self._result_cache.put(key, hits)
+        if min_score is not None:
+            hits = [(s, m) for s, m in hits if s >= min_score]
+        if ranking is not None:
+            return ranking.rank(hits, limit)
+        return list(hits)
 
-        q = self.model.encode([query], convert_to_numpy=True)
-        if q.dtype != np.float32:
-            q = q.astype("float32")
+    def _lexical(self) -> LexicalIndex:
+        """BM25-Index (beim ersten Aufruf aus den lebenden Einträgen aufgebaut).
+        Unter der Lese- oder Schreibsperre; parallele Leser bauen ihn nur einmal.
+        """
+        if self._lex is None:
+            with self._lazy_lock:
+                if self._lex is None:
+                    lex = LexicalIndex()
+                    for m in self.memories:
+                        if m is not None:
+                            lex.add(m["rid"], m["text"])
+                    self._lex = lex
+        return self._lex
 
-        # Overfetch (besseres Ranking, dann filtern)
-        overfetch = min(max(limit * 3, limit), len(self.memories))
-        D, I = self.index.search(q, overfetch)
+    def lexical_search(self, query: str, limit: int = 5, **filters) -> List[Tuple[float, dict]]:
+        """Reine BM25-Suche (ohne Encoder). Gibt (bm25_score, memory_dict) zurück, höher = besser.
+        Gleiche Filter wie semantic_search.
+        """
+        with self._read_lock:
+            allow = self._meta.resolve(**filters)
+            if allow is not None and not allow:
+                return []
+            hits = self._lexical().search(query, limit, allow=allow)
+            return [(s, self.memories[self._rid_pos[rid]]) for s, rid in hits]
 
-        results: List[Tuple[float, dict]] = []
-        for dist, idx in zip(D[0], I[0]):
-            if idx < 0 or idx >= len(self.memories):
-                continue
-            m = self.memories[idx]
-            if project and m.get("project") != project:
-                continue
-            # L2-Distanz -> grobe "Similarity" (0..1). Optional: Cosine-Sim könnte besser sein, aber L2 reicht hier.
-            # Da MiniLM nicht normalisiert ist, nutzen wir eine einfache Heuristik:
-            # sim = 1 / (1 + dist)  -> (0..1], invertiert Distanz
-            sim = float(1.0 / (1.0 + float(dist)))
-            results.append((sim, m))
-            if len(results) >= limit:
-                break
-
-        # Falls kaum Treffer durch project-Filter: ungefiltert fallbacken
-        if not results and project is not None:
-            for dist, idx in zip(D[0], I[0]):
-                if idx < 0 or idx >= len(self.memories):
-                    continue
-                m = self.memories[idx]
-                sim = float(1.0 / (1.0 + float(dist)))
-                results.append((sim, m))
-                if len(results) >= limit:
-                    break
+    def hybrid_search(
+        self,
+        query: str,
+        limit: int = 5,
+        min_score: Optional[float] = None,
+        lexical_only: Optional[bool] = None,
+        ranking: Optional[RankingProfile] = None,
+        **filters
+    ) -> List[Tuple[float, dict]]:
+        """Hybride Suche: BM25- und Vektor-Rangliste per Reciprocal Rank Fusion vereint.
+        score = Summe 1 / (RRF_K + Rang) über die Listen, normiert auf [0..1] (1.0 = Platz 1 in jeder
+        Liste) - nur Rangfolge, keine Cosine-Ähnlichkeit. `lexical_only`: None = automatisch für
+        Bezeichner-Queries (Dateinamen, snake_case, Fehlernamen) - dann ohne Encode, RRF über die
+        BM25-Liste allein (gleiche Skala; BM25-Rohwerte liefert lexical_search). Ohne BM25-Treffer
+        fällt die Suche auf den hybriden Pfad zurück.
+        `min_score` gilt für diesen normierten Score, in beiden Pfaden (vor dem Ranking).
+        `ranking`: wie bei semantic_search, mit dem normierten Score als Relevanz-Anteil.
+        Filter wie semantic_search.
+        """
+        if not self._pos:
+            return []
+        pool = limit if ranking is None else max(limit, ranking.pool)
+        if lexical_only is None:
+            lexical_only = looks_like_identifier(query)
+        fused = None
+        if lexical_only:
+            hits = self.lexical_search(query, pool, **filters)
+            if hits:
+                fused = _rrf([hits], pool)
+
+        if fused is None:
+            # Ergebnis-Cache ohne min_score/Ranking (werden danach angewendet, wie bei semantic_search)
+            key = ("hybrid", normalize_query(query), pool, _filter_key(filters), self._data_version)
+            fused = self._result_cache.get(key)
+            if fused is None:
+                candidates = max(pool, HYBRID_POOL)
+                q = self._encode_query(query)  # vor der Sperre - Encode blockiert keine Schreiber
+                with self._read_lock:  # beide Ranglisten auf demselben Stand
+                    rankings = (
+                        self._search_vector(q, candidates, **filters),
+                        self.lexical_search(query, candidates, **filters),
+                    )
+                fused = _rrf(rankings, pool)
+                self._result_cache.put(key, fused)
+
+        if min_score is not None:
+            fused = [(s, m) for s, m in fused if s >= min_score]
+        if ranking is not None:
+            return ranking.rank(fused, limit)
+        return list(fused[:limit])
+
+    def _search_vector(
+        self,
+        q: np.ndarray,
+        limit: int,
+        min_score: Optional[float] = None,
+        **filters
+    ) -> List[Tuple[float, dict]]:
+        """Top-`limit` für einen (normalisierten) Query-Vektor, optional vorgefiltert."""
+        with self._read_lock:
+            allow = self._meta.resolve(**filters)
+            if allow is None:
+                D, I = self.index.search(q, min(limit, len(self._pos)))
+                sims, mems = D[0], self._resolve(I[0])
+            elif not allow:
+                return []
+            elif len(allow) <= EXACT_SCAN_MAX:
+                sims, mems = self._exact_scan(q, allow, limit)
+            else:
+                D, I = self.index.search(q, min(limit, len(allow)), allow=allow)
+                sims, mems = D[0], self._resolve(I[0])
+
+        # Ergebnis-Masken vektorisiert statt Schleife pro Treffer
+        mask = np.fromiter((m is not None for m in mems), dtype=bool, count=len(mems))
+        if min_score is not None:
+            mask &= sims >= min_score
+
+        # Ergebnisse sind bereits absteigend sortiert
+        keep = np.flatnonzero(mask)[:limit].tolist()
+        return [(float(sims[i]), mems[i]) for i in keep]
 
-        # Höchste Ähnlichkeit zuerst
-        results.sort(key=lambda x: x[0], reverse=True)
-        return results
+    def _exact_scan(self, q: np.ndarray, rids: Iterable[int], limit: int) -> Tuple[np.ndarray, List[dict]]:
+        """Exakte Suche über eine kleine Teilmenge (ein Matrixprodukt statt ANN mit Selektor)."""
+        positions = [self._rid_pos[rid] for rid in rids]
+        sims = self._rows(positions) @ q[0]
+        k = min(limit, len(sims))
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top])]
+        return sims[top], [self.memories[positions[i]] for i in top.tolist()]
 
     def delete_memory(self, uuid_str: str) -> bool:
-        """Löscht eine Erinnerung (inkl. Rebuild des Index)."""
-        idx = next((i for i, m in enumerate(self.memories) if m["uuid"] == uuid_str), None)
-        if idx is None:
-            return False
+        """Löscht eine Erinnerung (Tombstone, O(1) - Platz wird bei der Kompaktierung frei)."""
+        return self.delete_memories([uuid_str]) == 1
 
-        # Entfernen
-        del self.memories[idx]
-        del self.embeddings[idx]
+    def delete_memories(self, uuid_strs: Iterable[str]) -> int:
+        """Löscht mehrere Erinnerungen mit einem einzigen Flush. Gibt die Anzahl zurück."""
+        with self._write_lock:
+            rids = {self.memories[self._pos[u]]["rid"] for u in uuid_strs if u in self._pos}
+            return self._delete_rids(rids)
 
-        # Index neu aufbauen (FAISS unterstützt kein 'remove' bei FlatL2)
-        self.index = faiss.IndexFlatL2(EMBED_DIM)
-        if self.embeddings:
-            mat = np.vstack(self.embeddings).astype("float32")
-            self.index.add(mat)
+    def delete_where(
+        self,
+        category: Optional[str] = None,
+        project: Optional[str] = None,
+        before: Optional[int] = None,
+        older_than: Optional[float] = None
+    ) -> int:
+        """Bulk-Löschen nach Kategorie, Projekt und/oder Alter (alle Angaben UND-verknüpft).
+        `before`: Unix-Timestamp, `older_than`: Alter in Sekunden.
+        """
+        if older_than is not None:
+            cutoff = int(time.time() - older_than)
+            before = cutoff if before is None else min(before, cutoff)
+        if category is None and project is None and before is None:
+            raise ValueError("delete_where braucht mindestens ein Kriterium (sonst clear_all)")
 
-        # Speichern
-        self._save_memories()
-        self._save_embeddings()
-        self._save_faiss()
-        return True
+        with self._write_lock:
+            rids = self._meta.resolve(
+                category=category, project=project, until=None if before is None else before - 1
+            )
+            return self._delete_rids(rids)
+
+    def _delete_rids(self, rids: Iterable[int]) -> int:
+        dropped = [rid for _, rid in self._drop_rids(rids)]
+        if not dropped:
+            return 0
+        self._invalidate()
+        if self._db is not None:
+            self._db.delete(dropped)
+        else:
+            self._submit("tomb", dropped)
+        self.index.delete(dropped)
+        self._maybe_compact()
+        return len(dropped)
 
     def clear_all(self):
         """Entfernt alle Erinnerungen und leert Index und Speicherdateien."""
-        self.memories = []
-        self.embeddings = []
-        self.index = faiss.IndexFlatL2(EMBED_DIM)
+        with self._compact_lock, self._write_lock:
+            self._drain_writer()
+            if self._db is not None:
+                self._db.clear()
+            self.memories = []
+            self._reindex()
+            self._rebuild_faiss()
+            self._invalidate()
 
-        for p in (MEMORY_JSON, FAISS_INDEX, EMBED_PKL):
-            if os.path.exists(p):
-                os.remove(p)
+            # frische (leere) Generation materialisieren, alte Segmente werden entfernt
+            self.compact()
 
-        # frische Files (leer) materialisieren
-        self._save_memories()
-        self._save_embeddings()
-        self._save_faiss()
+    def cache_stats(self) -> dict:
+        """Hit/Miss-Zähler der Query-Embedding- und Ergebnis-Caches (+ Micro-Batching-Metriken)."""
+        stats = {"embeddings": self._query_cache.stats(), "results": self._result_cache.stats()}
+        if isinstance(self.embedder, EmbeddingService):
+            stats["batching"] = self.embedder.stats()
+        return stats
+
+    def recent(self, limit: int = 10, category: Optional[str] = None, project: Optional[str] = None) -> List[dict]:
+        """Neueste Erinnerungen (nach timestamp), optional nach Kategorie/Projekt gefiltert."""
+        if self._db is not None:
+            return self._db.recent(limit, category=category, project=project)
+        with self._read_lock:
+            rids = self._meta.latest(limit, category=category, project=project)
+            return [self.memories[self._rid_pos[rid]] for rid in rids]
+
+    def refresh(self) -> int:
+        """SQLite-Backend: lädt Zeilen nach, die andere Prozesse seit dem letzten Laden geschrieben haben.
+        Gibt die Anzahl neuer Einträge zurück (Segment-Backend: immer 0).
+        """
+        if self._db is None:
+            return 0
+        with self._write_lock:
+            start = len(self.memories)
+            added = self._ingest_db_rows()
+            if added:
+                tail = list(range(start, len(self.memories)))
+                self.index.add(self._rows(tail), [self.memories[i]["rid"] for i in tail])
+                self._invalidate()
+            return added
 
     def stats(self) -> dict:
-        return {
-            "count_memories": len(self.memories),
-            "count_embeddings": len(self.embeddings),
-            "index_ntotal": int(self.index.ntotal) if self.index is not None else 0,
-            "model": self.model_name,
-            "paths": {
-                "json": MEMORY_JSON,
-                "faiss": FAISS_INDEX,
-                "embeddings": EMBED_PKL
+        """Zählungen und Pfade (unter der Lesesperre - konsistent zu laufenden Schreibern)."""
+        with self._read_lock:
+            if self._db is not None:
+                # Zählungen direkt aus der Datenbank
+                return {
+                    "count_memories": self._db.count(),
+                    "count_embeddings": self._vlog.count,
+                    "tombstones": self._dead_rows,
+                    "index_ntotal": self.index.ntotal,
+                    "index_mode": mode_of(self.index.index),
+                    "index_quantize": quant_of(self.index.index),
+                    "categories": self._db.category_counts(),
+                    "metric": METRIC,
+                    "model": self.model_name,
+                    "backend": "sqlite",
+                    "paths": {
+                        "db": self._db.path,
+                        "faiss": self._db_index_path()
+                    }
+                }
+            return {
+                "count_memories": len(self._pos),
+                "count_embeddings": self._vlog.count if self._vlog is not None else 0,
+                "tombstones": self._dead_rows,
+                "index_ntotal": self.index.ntotal,
+                "index_mode": mode_of(self.index.index),
+                "index_quantize": quant_of(self.index.index),
+                "categories": self._meta.counts("category"),
+                "metric": METRIC,
+                "model": self.model_name,
+                "backend": "segments",
+                "generation": self.generation,
+                "paths": {
+                    "manifest": self.manifest_path,
+                    "vectors": self._path(VECTORS_FILE),
+                    "meta": self._path(META_FILE),
+                    "tombstones": self._path(TOMB_FILE),
+                    "seen": self._path(SEEN_FILE),
+                    "faiss": self._path(INDEX_FILE)
+                }
             }
-        }
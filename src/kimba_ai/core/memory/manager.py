@@ -1,10 +1,40 @@
 from src.kimba_ai.core.memory.session import SessionMemory
-from src.kimba_ai.core.memory.longterm import LongTermMemory
+from src.kimba_ai.core.memory.session_index import SessionIndex
+from src.kimba_ai.core.memory.session_reader import SessionReader, PAGE_SIZE
+from src.kimba_ai.core.memory.session_archive import SessionArchive, ARCHIVE_AFTER_DAYS
+from src.kimba_ai.core.memory.longterm import LongTermMemory, SHIPPED_DB
+from src.kimba_ai.core.memory.importer import import_paths
+
+MEMORY_BLOCK = "[Memories]"  # Präfix eines um Erinnerungen ergänzten Prompts
 
 class MemoryManager:
-    def __init__(self):
-        self.session_memory = SessionMemory()
-        self.longterm_memory = LongTermMemory()
+    def __init__(self, dedupe=None, batching=True, session_index=True, archive_after_days=ARCHIVE_AFTER_DAYS,
+                 backend="segments", db_path=None):
+        """`dedupe`: Near-Duplikate im LongTermMemory zusammenführen (z.B. {} = Standardwerte, siehe dedupe.py).
+        `batching`: gleichzeitige Encodes (Recall, Promotion, Vision, ...) per Micro-Batching bündeln
+        (True = Standardwerte, dict = Optionen, False = aus; siehe embed_service.py).
+        `session_index`: Suchindex über alle Sessions (True = Text/Metadaten, dict = Optionen für
+        SessionIndex, z.B. {"embedder": True} für die Vektorseite; False = aus; siehe session_index.py).
+        `archive_after_days`: Sessions, die so lange nicht geschrieben wurden, beim Start komprimiert
+        archivieren (None = nie; bleiben lesbar und durchsuchbar, siehe session_archive.py).
+        `backend`: Speicher des LongTermMemory - "segments" (Standard) oder "sqlite". Mit "sqlite" wird beim
+        ersten Start die mitgelieferte kimba_memory/longterm_memories.db übernommen (Kopie nach `db_path`,
+        Standard memory/longterm_memories.db).
+        """
+        self.session_index = None
+        if session_index:
+            self.session_index = SessionIndex(**(session_index if isinstance(session_index, dict) else {}))
+            self.session_index.sync()  # nur geänderte Session-Dateien
+        self.session_memory = SessionMemory(index=self.session_index)
+        self.session_archive = SessionArchive()
+        if archive_after_days is not None:
+            self.session_archive.archive(
+                archive_after_days, exclude=(self.session_memory.session_id,), index=self.session_index
+            )
+        self.longterm_memory = LongTermMemory(
+            dedupe=dedupe, batching=batching, backend=backend, db_path=db_path,
+            seed_db=SHIPPED_DB if backend == "sqlite" else None
+        )
 
     def remember(self, speaker, content, importance=0, category="allgemein", mood="neutral", tags=None, project=None, promote=False):
         """
@@ -25,19 +55,69 @@ class MemoryManager:
         # 2️⃣ Optional ins LongTermMemory übernehmen
         if promote or importance >= 1:
             self.longterm_memory.add_memory(
-                content=content,
+                text=content,
                 category=category,
                 mood=mood,
                 tags=tags or [],
-                project=project
+                project=project,
+                importance=importance
             )
 
         # 3️⃣ Session sofort sichern
         self.session_memory.save_to_json()
 
-    def recall(self, query, limit=3):
-        """Sucht relevante Erinnerungen im LongTermMemory."""
-        return self.longterm_memory.semantic_search(query, limit)
+    def recall(self, query, limit=3, min_score=None, hybrid=False, ranking=None, **filters):
+        """Sucht relevante Erinnerungen im LongTermMemory.
+        `hybrid`: BM25 + Vektor per Rank Fusion (findet auch exakte Bezeichner/Dateinamen).
+        `min_score`: Schwelle auf den Score der jeweiligen Suche - Cosine-Ähnlichkeit (semantisch) bzw.
+        normierter Fusions-Score 0..1 (hybrid, siehe LongTermMemory.hybrid_search).
+        `ranking`: RankingProfile (z.B. der aktiven Persona) - Aktualität/Wichtigkeit/Kategorie
+        fließen in die Reihenfolge ein (semantisch und hybrid).
+        `filters`: project, category, mood, tags, since, until (siehe LongTermMemory.semantic_search).
+        """
+        if hybrid:
+            return self.longterm_memory.hybrid_search(query, limit, min_score=min_score, ranking=ranking, **filters)
+        return self.longterm_memory.semantic_search(query, limit, min_score=min_score, ranking=ranking, **filters)
+
+    def memory_prompt(self, text, limit=3, min_score=None, ranking=None):
+        """Ein Recall für `text` und - bei Treffern - der Prompt mit vorangestelltem [Memories]-Block.
+        `min_score`/`ranking` wie recall(); Treffer unter der Schwelle landen nicht im Prompt.
+        """
+        hits = self.recall(text, limit, min_score=min_score, ranking=ranking)  # [(score, mem), ...]
+        if not hits:
+            return text
+        lines = []
+        for sim, mem in hits:
+            txt = mem.get("text", "")
+            cat = mem.get("category", "general")
+            prj = mem.get("project") or ""
+            lines.append(f"- {txt} ({cat}{', ' + prj if prj else ''}; rel: {sim:.2f})")
+        return MEMORY_BLOCK + "\n" + "\n".join(lines) + f"\n\n[User]\n{text}"
+
+    def search_sessions(self, query=None, limit=10, semantic=False, **filters):
+        """Sucht Nachrichten über alle Sessions (Volltext, optional semantisch) ohne die Dateien zu laden.
+        `filters`: speaker, category, project, mood, tags, session_id, since, until, min_importance
+        (siehe SessionIndex.search).
+        """
+        if self.session_index is None:
+            return []
+        return self.session_index.search(query, limit=limit, semantic=semantic, **filters)
+
+    def open_session(self, session_id=None, page_size=PAGE_SIZE):
+        """Gespeicherte Session seitenweise lesen (Standard: die aktuelle) - z.B. reader.tail() für den
+        letzten Bildschirm, reader.pages() für ältere Seiten (siehe session_reader.py)."""
+        if session_id is None or session_id == self.session_memory.session_id:
+            self.session_memory.save_to_json()
+            session_id = self.session_memory.session_id
+        return SessionReader.for_session(session_id, page_size)
+
+    def import_files(self, *paths, **options):
+        """Streaming-Import externer Texte/Chats/Transkripte ins LongTermMemory (siehe importer.py)."""
+        return import_paths(self.longterm_memory, list(paths), **options)
+
+    def cache_stats(self):
+        """Hit/Miss-Zähler der Recall-Caches (Query-Embeddings, Ergebnisse) und Micro-Batching-Metriken."""
+        return self.longterm_memory.cache_stats()
 
     def get_session(self):
         """Gibt die aktuelle Session-Historie zurück."""
@@ -51,3 +131,10 @@ class MemoryManager:
     def clear_longterm(self):
         """Löscht alle langfristigen Erinnerungen."""
         self.longterm_memory.clear_all()
+
+    def close(self):
+        """Beim Beenden: ausstehende Langzeit-Writes sichern (Write-behind) und Dateien schließen."""
+        self.session_memory.save_to_json()
+        self.longterm_memory.close()
+        if self.session_index is not None:
+            self.session_index.close()
@@ -0,0 +1,137 @@
+# metadata_index.py
+# Invertierte Indizes über die Metadaten des Langzeitgedächtnisses
+# - project / category / mood / tags -> Menge stabiler IDs (rid)
+# - Zeitstempel sortiert -> Bereichsabfragen per Bisektion
+# - resolve(...) liefert die erlaubte ID-Menge für eine vorgefilterte Vektorsuche
+
+import bisect
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+FIELDS = ("project", "category", "mood")
+
+Predicate = Union[None, str, Iterable[str]]
+
+
+def _as_values(pred: Predicate) -> Optional[List[str]]:
+    if pred is None:
+        return None
+    if isinstance(pred, str):
+        return [pred]
+    return list(pred)
+
+
+class MetadataIndex:
+    """Feld -> Wert -> {rid}; dazu (timestamp, rid) sortiert für Zeitbereiche."""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.fields: Dict[str, Dict[object, Set[int]]] = {f: defaultdict(set) for f in FIELDS}
+        self.tags: Dict[str, Set[int]] = defaultdict(set)
+        self._ts: List[tuple] = []         # sortiert nach (timestamp, rid)
+        self._rid_ts: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._rid_ts)
+
+    def add(self, mem: dict):
+        rid = mem["rid"]
+        for f in FIELDS:
+            self.fields[f][mem.get(f)].add(rid)
+        for tag in set(mem.get("tags") or []):
+            self.tags[tag].add(rid)
+        ts = int(mem.get("timestamp") or 0)
+        self._rid_ts[rid] = ts
+        if not self._ts or self._ts[-1] <= (ts, rid):
+            self._ts.append((ts, rid))     # Normalfall: chronologisch
+        else:
+            bisect.insort(self._ts, (ts, rid))
+
+    def remove(self, mem: dict):
+        rid = mem["rid"]
+        for f in FIELDS:
+            bucket = self.fields[f].get(mem.get(f))
+            if bucket is not None:
+                bucket.discard(rid)
+                if not bucket:
+                    del self.fields[f][mem.get(f)]
+        for tag in set(mem.get("tags") or []):
+            bucket = self.tags.get(tag)
+            if bucket is not None:
+                bucket.discard(rid)
+                if not bucket:
+                    del self.tags[tag]
+        ts = self._rid_ts.pop(rid, None)
+        if ts is not None:
+            i = bisect.bisect_left(self._ts, (ts, rid))
+            if i < len(self._ts) and self._ts[i] == (ts, rid):
+                del self._ts[i]
+
+    def counts(self, field: str) -> Dict[object, int]:
+        """Anzahl Einträge pro Wert eines Feldes (z.B. für stats())."""
+        source = self.tags if field == "tags" else self.fields[field]
+        return {value: len(rids) for value, rids in source.items()}
+
+    def latest(self, limit: int, **preds) -> List[int]:
+        """Die `limit` neuesten rids (absteigend nach timestamp), optional gefiltert wie `resolve`."""
+        allow = self.resolve(**preds)
+        out: List[int] = []
+        for _, rid in reversed(self._ts):
+            if len(out) >= limit:
+                break
+            if allow is None or rid in allow:
+                out.append(rid)
+        return out
+
+    def resolve(
+        self,
+        project: Predicate = None,
+        category: Predicate = None,
+        mood: Predicate = None,
+        tags: Optional[Iterable[str]] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+    ) -> Optional[Set[int]]:
+        """Erlaubte rids für die Prädikate (UND-verknüpft), None = kein Filter.
+
+        project/category/mood: Wert oder Liste von Werten (ODER innerhalb des Feldes),
+        tags: alle genannten Tags müssen vorhanden sein, since/until: Zeitbereich (inklusive).
+        """
+        sets: List[Set[int]] = []
+        for field, pred in (("project", project), ("category", category), ("mood", mood)):
+            values = _as_values(pred)
+            if values is None:
+                continue
+            buckets = [self.fields[field].get(v, ()) for v in values]
+            sets.append(set().union(*buckets) if len(buckets) > 1 else set(buckets[0]))
+        if tags is not None:
+            for tag in _as_values(tags):
+                sets.append(self.tags.get(tag, set()))
+
+        if since is None and until is None:
+            if not sets:
+                return None
+            sets.sort(key=len)
+            result = set(sets[0])
+            for s in sets[1:]:
+                result &= s
+            return result
+
+        lo = 0 if since is None else bisect.bisect_left(self._ts, (int(since), -1))
+        hi = len(self._ts) if until is None else bisect.bisect_right(self._ts, (int(until), float("inf")))
+        if sets:
+            sets.sort(key=len)
+            if len(sets[0]) < hi - lo:
+                # kleine Kandidatenmenge direkt per Zeitstempel prüfen statt Bereich zu materialisieren
+                result = set(sets[0])
+                for s in sets[1:]:
+                    result &= s
+                t0 = -float("inf") if since is None else since
+                t1 = float("inf") if until is None else until
+                return {rid for rid in result if t0 <= self._rid_ts[rid] <= t1}
+        result = {rid for _, rid in self._ts[lo:hi]}
+        for s in sets:
+            result &= s
+        return result
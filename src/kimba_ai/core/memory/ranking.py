@@ -0,0 +1,93 @@
+# ranking.py
+# Nachsortierung der Recall-Kandidaten: Ähnlichkeit + Aktualität + Wichtigkeit + Kategorie
+# - score = (w_sim * similarity + w_rec * 0.5^(Alter / Halbwertszeit) + w_imp * importance / 2)
+#           * Kategorie-Gewicht
+# - Ein NumPy-Durchlauf über den Kandidaten-Pool der ANN-Suche (Kosten O(pool), nicht O(Store))
+# - Aktualität ab `last_seen` (zuletzt per Near-Duplikat bestätigt), sonst ab `timestamp`
+# - Gewichte pro Persona: Modul-Attribut MEMORY_RANKING (dict) in core/personas/persona_*.py
+
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+RANK_POOL        = 50     # Kandidaten aus der Vektorsuche, die nachsortiert werden
+SIMILARITY_W     = 1.0
+RECENCY_W        = 0.3
+HALF_LIFE_DAYS   = 30.0
+IMPORTANCE_W     = 0.15
+MAX_IMPORTANCE   = 2      # 0 normal, 1 wichtig, 2 sehr wichtig (wie SessionMemory)
+
+_DAY = 86_400.0
+
+
+class RankingProfile:
+    """Gewichte für die Nachsortierung; `category_weights` multipliziert (fehlend = 1.0)."""
+
+    def __init__(
+        self,
+        similarity: float = SIMILARITY_W,
+        recency: float = RECENCY_W,
+        half_life_days: float = HALF_LIFE_DAYS,
+        importance: float = IMPORTANCE_W,
+        category_weights: Optional[Dict[str, float]] = None,
+        pool: int = RANK_POOL
+    ):
+        if half_life_days <= 0:
+            raise ValueError("half_life_days muss > 0 sein")
+        self.similarity = similarity
+        self.recency = recency
+        self.half_life_days = half_life_days
+        self.importance = importance
+        self.category_weights = dict(category_weights or {})
+        self.pool = pool
+
+    @classmethod
+    def from_dict(cls, cfg: Optional[dict]) -> "RankingProfile":
+        """Aus einer Persona-Konfiguration (unbekannte Schlüssel -> ValueError)."""
+        cfg = dict(cfg or {})
+        allowed = {"similarity", "recency", "half_life_days", "importance", "category_weights", "pool"}
+        unknown = set(cfg) - allowed
+        if unknown:
+            raise ValueError(f"Unbekannte Ranking-Optionen: {sorted(unknown)}")
+        return cls(**cfg)
+
+    def key(self) -> tuple:
+        """Hashbarer Schlüssel (z.B. für Caches)."""
+        return (self.similarity, self.recency, self.half_life_days, self.importance,
+                tuple(sorted(self.category_weights.items())), self.pool)
+
+    def scores(self, sims: np.ndarray, mems: List[dict], now: Optional[float] = None) -> np.ndarray:
+        """Kombinierter Score je Kandidat (ein vektorisierter Durchlauf)."""
+        n = len(mems)
+        now = time.time() if now is None else now
+        ts = np.fromiter((m.get("last_seen") or m.get("timestamp") or 0 for m in mems), dtype="float64", count=n)
+        imp = np.fromiter((m.get("importance") or 0 for m in mems), dtype="float64", count=n)
+        age_days = np.maximum(now - ts, 0.0) / _DAY
+        out = self.similarity * np.asarray(sims, dtype="float64")
+        out += self.recency * np.exp2(-age_days / self.half_life_days)
+        out += self.importance * np.clip(imp, 0, MAX_IMPORTANCE) / MAX_IMPORTANCE
+        if self.category_weights:
+            cw = self.category_weights
+            out *= np.fromiter((cw.get(m.get("category"), 1.0) for m in mems), dtype="float64", count=n)
+        return out
+
+    def rank(
+        self,
+        hits: List[Tuple[float, dict]],
+        limit: int,
+        now: Optional[float] = None
+    ) -> List[Tuple[float, dict]]:
+        """(similarity, mem)-Kandidaten -> Top-`limit` als (score, mem), absteigend."""
+        if not hits:
+            return []
+        sims = np.fromiter((s for s, _ in hits), dtype="float64", count=len(hits))
+        mems = [m for _, m in hits]
+        scores = self.scores(sims, mems, now)
+        k = min(limit, len(hits))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(float(scores[i]), mems[i]) for i in top.tolist()]
+
+
+DEFAULT_RANKING = RankingProfile()
@@ -0,0 +1,85 @@
+# rwlock.py
+# Leser/Schreiber-Sperre für das Langzeitgedächtnis und die Index-Engine
+# - Beliebig viele Leser parallel (Suchen), Schreiber exklusiv und serialisiert
+# - Schreiber haben Vorrang: wartet ein Schreiber, kommen keine neuen Leser hinzu
+# - Wiedereintritt: Schreiber dürfen erneut schreiben und lesen, Leser erneut lesen
+# - Kein Upgrade Lesen -> Schreiben (wäre ein Deadlock zweier Leser) -> RuntimeError
+
+import threading
+
+
+class _Side:
+    """Kontextmanager für eine Seite der Sperre (`with lock.read:` / `with lock.write:`)."""
+
+    __slots__ = ("acquire", "release")
+
+    def __init__(self, acquire, release):
+        self.acquire = acquire
+        self.release = release
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class RWLock:
+    """Schreiber-bevorzugende Leser/Schreiber-Sperre mit Wiedereintritt."""
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0          # Threads, die gerade lesen
+        self._writer = None        # Thread-ID des Schreibers
+        self._write_depth = 0
+        self._waiting_writers = 0
+        self._local = threading.local()  # Lese-Tiefe je Thread
+        self.read = _Side(self.acquire_read, self.release_read)
+        self.write = _Side(self.acquire_write, self.release_write)
+
+    def acquire_read(self):
+        local = self._local
+        depth = getattr(local, "depth", 0)
+        if depth == 0:
+            # Der Schreiber selbst liest ohne Zählung (sieht seine eigenen Änderungen)
+            local.counted = self._writer != threading.get_ident()
+            if local.counted:
+                with self._cond:
+                    while self._writer is not None or self._waiting_writers:
+                        self._cond.wait()
+                    self._readers += 1
+        local.depth = depth + 1
+
+    def release_read(self):
+        local = self._local
+        local.depth -= 1
+        if local.depth == 0 and local.counted:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        if self._writer == me:
+            self._write_depth += 1
+            return
+        if getattr(self._local, "depth", 0) and self._local.counted:
+            raise RuntimeError("Lesesperre kann nicht zur Schreibsperre werden")
+        with self._cond:
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._write_depth = 1
+
+    def release_write(self):
+        self._write_depth -= 1
+        if not self._write_depth:
+            with self._cond:
+                self._writer = None
+                self._cond.notify_all()
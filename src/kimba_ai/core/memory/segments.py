@@ -0,0 +1,292 @@
+# segments.py
+# Append-only Segment-Format für das Langzeitgedächtnis
+# - Vektor-Log: feste Recordbreite (dim * float32), Append = O(1),
+#   gelesen als np.memmap (zero-copy, wird mit Index-Rebuilds geteilt)
+# - Metadaten-Log: eine JSON-Zeile pro Erinnerung (JSONL)
+# - Tombstone-Log: gelöschte IDs (int64), bis zur nächsten Kompaktierung
+# - Manifest: zeigt atomar auf die aktuell gültige Segment-Generation,
+#   mit Generation + Blockprüfsummen je Datei (Recovery prüft statt neu zu berechnen)
+# - Index-Snapshot mit eigenem Header (Magic, abgedeckte Zeilen, CRC32)
+# - Abgerissene Writes (halber Record / halbe Zeile am Dateiende) werden beim Öffnen abgeschnitten
+
+import os
+import json
+import zlib
+import struct
+from typing import List, Optional, Iterable, Tuple
+
+import numpy as np
+
+MANIFEST_VERSION = 2
+WRITE_CHUNK_ROWS = 8192  # Zeilen pro write() und pro Prüfsummenblock beim Schreiben kompletter Segmente
+INDEX_MAGIC = b"KIX2"
+_INDEX_HEADER = struct.Struct("<4sqI")  # magic, abgedeckte Zeilen, crc32(payload)
+
+
+def crc32(data) -> int:
+    """CRC32 über Bytes oder ein (zusammenhängendes) Array."""
+    if isinstance(data, np.ndarray):
+        data = np.ascontiguousarray(data).data
+    return zlib.crc32(data) & 0xFFFFFFFF
+
+
+def pack_index(rows: int, payload: bytes) -> bytes:
+    return _INDEX_HEADER.pack(INDEX_MAGIC, rows, crc32(payload)) + payload
+
+
+def unpack_index(data: bytes) -> Optional[Tuple[int, memoryview]]:
+    """(abgedeckte Zeilen, Payload) oder None, wenn die Prüfsumme nicht passt.
+    Snapshots ohne Magic (älteres Format) haben nur den Zeilen-Header.
+    """
+    view = memoryview(data)
+    if bytes(view[:4]) != INDEX_MAGIC:
+        (rows,) = struct.unpack_from("<q", data, 0)
+        return rows, view[8:]
+    _, rows, crc = _INDEX_HEADER.unpack_from(data, 0)
+    payload = view[_INDEX_HEADER.size:]
+    if crc32(payload) != crc:
+        return None
+    return rows, payload
+
+
+def _atomic_write(path: str, data: bytes):
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _atomic_write_text(path: str, text: str):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _sync(f, fsync: bool):
+    f.flush()
+    if fsync:
+        os.fsync(f.fileno())
+
+
+class VectorLog:
+    """Fixed-width float32-Records (eine Zeile pro Erinnerung), nur Anhängen."""
+
+    def __init__(self, path: str, dim: int, fsync: bool = False):
+        self.path = path
+        self.dim = dim
+        self.record_size = dim * 4
+        self.fsync = fsync
+        self._fh = None
+        self._map: Optional[np.ndarray] = None  # memmap der ersten `len(_map)` Records
+        self.count = self._recover()
+
+    def _recover(self) -> int:
+        if not os.path.exists(self.path):
+            return 0
+        size = os.path.getsize(self.path)
+        n = size // self.record_size
+        if size % self.record_size:
+            # halber Record vom Absturz -> abschneiden
+            with open(self.path, "r+b") as f:
+                f.truncate(n * self.record_size)
+        return n
+
+    def _handle(self):
+        if self._fh is None:
+            self._fh = open(self.path, "ab")
+        return self._fh
+
+    def append(self, vecs: np.ndarray):
+        """Hängt einen Vektor (dim,) oder eine Matrix (n, dim) an."""
+        mat = np.ascontiguousarray(vecs, dtype="float32").reshape(-1, self.dim)
+        if not len(mat):
+            return
+        f = self._handle()
+        f.write(mat.tobytes())
+        _sync(f, self.fsync)
+        self.count += len(mat)
+
+    def read_all(self) -> np.ndarray:
+        """Kopie aller Records im RAM (nur für Migrationen; sonst `matrix()`)."""
+        if not self.count:
+            return np.zeros((0, self.dim), dtype="float32")
+        data = np.fromfile(self.path, dtype="float32", count=self.count * self.dim)
+        return data.reshape(self.count, self.dim)
+
+    def matrix(self) -> np.ndarray:
+        """Read-only memmap (count, dim); wird nach Appends bei Bedarf neu gemappt."""
+        if self._map is None or len(self._map) != self.count:
+            if not self.count:
+                self._map = np.zeros((0, self.dim), dtype="float32")
+            else:
+                self._map = np.memmap(self.path, dtype="float32", mode="r", shape=(self.count, self.dim))
+        return self._map
+
+    def rewrite(self, vecs: np.ndarray):
+        """Ersetzt den kompletten Log-Inhalt atomar (z.B. nach einer Metrik-Migration)."""
+        self.close()
+        mat = np.ascontiguousarray(vecs, dtype="float32").reshape(-1, self.dim)
+        _atomic_write(self.path, mat.tobytes())
+        self.count = len(mat)
+
+    def write_rows(self, positions: List[int], vecs: np.ndarray):
+        """Überschreibt einzelne Records an Ort und Stelle (Reparatur beschädigter Zeilen)."""
+        mat = np.ascontiguousarray(vecs, dtype="float32").reshape(-1, self.dim)
+        self.close()
+        with open(self.path, "r+b") as f:
+            for pos, row in zip(positions, mat):
+                f.seek(pos * self.record_size)
+                f.write(row.tobytes())
+            _sync(f, self.fsync)
+
+    def truncate(self, n: int):
+        """Verwirft alle Records ab Position n (z.B. verwaiste Vektoren ohne Metadaten)."""
+        self.close()
+        if n >= self.count:
+            return
+        with open(self.path, "r+b") as f:
+            f.truncate(n * self.record_size)
+        self.count = n
+
+    def sync(self):
+        """fsync des offenen Handles (für fsync-Policies außerhalb einzelner Appends)."""
+        if self._fh is not None:
+            _sync(self._fh, True)
+
+    def close(self):
+        self._map = None  # bestehende Views bleiben gültig, bis ihre Besitzer sie freigeben
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+class TombstoneLog:
+    """Gelöschte Einträge als int64-IDs (8 Byte pro Record), nur Anhängen."""
+
+    RECORD_SIZE = 8
+
+    def __init__(self, path: str, fsync: bool = False):
+        self.path = path
+        self.fsync = fsync
+        self._fh = None
+        if os.path.exists(path) and os.path.getsize(path) % self.RECORD_SIZE:
+            with open(path, "r+b") as f:
+                f.truncate(os.path.getsize(path) // self.RECORD_SIZE * self.RECORD_SIZE)
+
+    def append(self, ids: Iterable[int]):
+        data = np.fromiter(ids, dtype="<i8").tobytes()
+        if not data:
+            return
+        if self._fh is None:
+            self._fh = open(self.path, "ab")
+        self._fh.write(data)
+        _sync(self._fh, self.fsync)
+
+    def read_all(self) -> np.ndarray:
+        if not os.path.exists(self.path):
+            return np.zeros(0, dtype="int64")
+        return np.fromfile(self.path, dtype="<i8")
+
+    def sync(self):
+        """fsync des offenen Handles (für fsync-Policies außerhalb einzelner Appends)."""
+        if self._fh is not None:
+            _sync(self._fh, True)
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+class MetaLog:
+    """JSONL-Metadaten: eine Zeile pro Erinnerung, nur Anhängen."""
+
+    def __init__(self, path: str, fsync: bool = False):
+        self.path = path
+        self.fsync = fsync
+        self._fh = None
+
+    def _handle(self):
+        if self._fh is None:
+            self._fh = open(self.path, "a", encoding="utf-8")
+        return self._fh
+
+    def append(self, records: Iterable[dict]):
+        lines = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+        if not lines:
+            return
+        f = self._handle()
+        f.write(lines)
+        _sync(f, self.fsync)
+
+    def read_all(self) -> List[dict]:
+        """Liest alle vollständigen Zeilen; eine abgerissene letzte Zeile wird abgeschnitten."""
+        if not os.path.exists(self.path):
+            return []
+        records: List[dict] = []
+        good_end = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+                good_end += len(line)
+        if good_end != os.path.getsize(self.path):
+            self.close()
+            with open(self.path, "r+b") as f:
+                f.truncate(good_end)
+        return records
+
+    def sync(self):
+        """fsync des offenen Handles (für fsync-Policies außerhalb einzelner Appends)."""
+        if self._fh is not None:
+            _sync(self._fh, True)
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+def write_segment(
+    vec_path: str,
+    meta_path: str,
+    vectors: np.ndarray,
+    records: List[dict],
+    rows: Optional[np.ndarray] = None
+) -> List[int]:
+    """Schreibt ein komplettes (kompaktiertes) Segment atomar.
+    `rows`: nur diese Zeilen aus `vectors` übernehmen; geschrieben wird blockweise,
+    damit ein memmap-Quellarray nie komplett im RAM landet.
+    Gibt die CRC32 je Block (WRITE_CHUNK_ROWS Zeilen) der Vektordatei zurück (fürs Manifest).
+    """
+    n = len(vectors) if rows is None else len(rows)
+    blocks: List[int] = []
+    tmp = f"{vec_path}.tmp"
+    with open(tmp, "wb") as f:
+        for i in range(0, n, WRITE_CHUNK_ROWS):
+            block = vectors[i:i + WRITE_CHUNK_ROWS] if rows is None else vectors[rows[i:i + WRITE_CHUNK_ROWS]]
+            data = np.ascontiguousarray(block, dtype="float32").tobytes()
+            blocks.append(crc32(data))
+            f.write(data)
+    os.replace(tmp, vec_path)
+    text = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+    _atomic_write_text(meta_path, text)
+    return blocks
+
+
+def load_manifest(path: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(path: str, manifest: dict):
+    """Commit-Punkt einer Kompaktierung: erst danach gilt die neue Generation."""
+    manifest = dict(manifest, version=MANIFEST_VERSION)
+    _atomic_write_text(path, json.dumps(manifest, indent=2))
@@ -1,6 +1,10 @@
 import json
 import os
+import heapq
+from array import array
+from collections import deque
 from datetime import datetime
+from operator import attrgetter
 from uuid import uuid4
 
 SESSION_DIR = "memory/sessions"
@@ -8,12 +12,132 @@ os.makedirs(SESSION_DIR, exist_ok=True)
 
 VALID_SPEAKERS = {"user", "persona"}
 
+# Persistenz: Snapshot (session_<id>.json) + Append-only Journal (session_<id>.jsonl, eine Zeile pro
+# Nachricht). save_to_json() hängt nur neue Nachrichten an (O(1) pro Nachricht); der Snapshot wird neu
+# geschrieben und das Journal geleert, sobald das Journal so viele Zeilen hat wie der Rest der Session
+# (mind. JOURNAL_MIN Zeilen) - der Snapshot wächst so geometrisch, amortisiert O(1). Jede Journal-Zeile
+# trägt eine laufende Nummer `seq`, der Snapshot die zuletzt enthaltene: Zeilen, die ein Absturz zwischen
+# Snapshot und Leeren übrig lässt, werden beim Laden übersprungen, eine abgerissene letzte Zeile ebenso.
+JOURNAL_MIN = 256
+
+# Snapshot-Layout: Kopf + eine Nachricht pro Zeile (weiterhin gültiges JSON). Dazu session_<id>.offsets
+# (int64: Größe, mtime_ns, Anzahl, Byte-Offset je Nachricht, Ende der letzten) - damit liest
+# SessionReader (session_reader.py) beliebige Seiten, ohne die ganze Datei zu parsen.
+SNAPSHOT_HEAD_END = b', "messages": [\n'
+MESSAGE_SEP = b",\n"
+
+# Speicher: eine Deque (Lane) je Wichtigkeitsstufe 0/1/2, jeweils in Ankunftsreihenfolge.
+# Über max_entries wird die älteste normale Nachricht verworfen - O(1); wichtige (>= 1) bleiben wie bisher
+# erhalten. Damit der Puffer trotzdem begrenzt ist, haben die wichtigen Lanes eine eigene Obergrenze
+# (max_important; darüber fällt die älteste der niedrigsten wichtigen Stufe).
+# Chronologische Sicht = Merge der Lanes über die laufende Ankunftsnummer `order`.
+LANES = 3  # 0 normal, 1 wichtig, 2 sehr wichtig (höhere Werte landen in der obersten Lane)
+MAX_IMPORTANT = 10_000
+FIELDS = ("id", "timestamp", "speaker", "content", "importance", "tags", "category", "mood", "project")
+
+_by_order = attrgetter("order")
+
+def _journal_path(snapshot_path: str) -> str:
+    return os.path.splitext(snapshot_path)[0] + ".jsonl"
+
+def _offsets_path(snapshot_path: str) -> str:
+    return os.path.splitext(snapshot_path)[0] + ".offsets"
+
+def _read_archived(snapshot_path: str) -> dict | None:
+    # spät importiert: session_archive baut auf diesem Modul auf
+    from src.kimba_ai.core.memory.session_archive import read_archived, session_id_of
+    sid = session_id_of(snapshot_path)
+    return read_archived(sid, os.path.dirname(snapshot_path)) if sid else None
+
+def session_path(session_id: str) -> str:
+    return os.path.join(SESSION_DIR, f"session_{session_id}.json")
+
+def _write_snapshot(path: str, head: dict, messages) -> None:
+    """Snapshot atomar schreiben (tmp + rename), danach die Offset-Datei. Stürzt es dazwischen ab,
+    passt die Offset-Datei nicht mehr zum Snapshot (Größe/mtime) und der Leser baut sie neu auf."""
+    offsets = array("q")
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(json.dumps(head, ensure_ascii=False)[:-1].encode("utf-8") + SNAPSHOT_HEAD_END)
+        sep = b""
+        for m in messages:
+            f.write(sep)
+            offsets.append(f.tell())
+            f.write(json.dumps(m, ensure_ascii=False).encode("utf-8"))
+            sep = MESSAGE_SEP
+        end = f.tell()
+        f.write(b"\n]}\n")
+    os.replace(tmp, path)
+    st = os.stat(path)
+    index = array("q", [st.st_size, st.st_mtime_ns, len(offsets)]) + offsets + array("q", [end])
+    tmp = _offsets_path(path) + ".tmp"
+    with open(tmp, "wb") as f:
+        index.tofile(f)
+    os.replace(tmp, _offsets_path(path))
+
+class SessionMessage:
+    """Interner Nachrichten-Record mit __slots__ statt dict (weniger Speicher je Nachricht);
+    lesbar wie ein dict (m["content"], m.get("tags"), dict(m)), to_dict() für JSON.
+    Nach außen gibt SessionMemory weiterhin dicts heraus (get_all, get_important, messages)."""
+
+    __slots__ = FIELDS + ("order",)
+
+    def __init__(self, id, timestamp, speaker, content, importance=0, tags=None,
+                 category=None, mood=None, project=None):
+        self.id = id
+        self.timestamp = timestamp
+        self.speaker = speaker
+        self.content = content
+        self.importance = int(importance)
+        self.tags = tags or []
+        self.category = category
+        self.mood = mood
+        self.project = project
+        self.order = 0  # Ankunftsnummer in der Session (vergibt SessionMemory)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SessionMessage":
+        return cls(**{k: data[k] for k in FIELDS if k in data})
+
+    def to_dict(self) -> dict:
+        return {k: getattr(self, k) for k in FIELDS}
+
+    def __getitem__(self, key: str):
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def keys(self):
+        return FIELDS  # dict(m) / {**m} funktionieren weiter
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default) if key in FIELDS else default
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, SessionMessage):
+            other = other.to_dict()
+        return isinstance(other, dict) and self.to_dict() == other
+
+    def __repr__(self) -> str:
+        return f"SessionMessage({self.to_dict()!r})"
+
 class SessionMemory:
-    def __init__(self, session_id: str | None = None, title: str | None = None, max_entries: int = 2000):
+    def __init__(self, session_id: str | None = None, title: str | None = None, max_entries: int = 2000,
+                 index=None, max_important: int = MAX_IMPORTANT):
+        """`index`: optionaler SessionIndex (session_index.py) - bekommt neue Nachrichten bei jedem Speichern.
+        `max_important`: Obergrenze für wichtige Nachrichten (importance >= 1), die max_entries nie verdrängt."""
+        self.index = index
         self.session_id = session_id or str(uuid4())[:8]
         self.title = title or f"Session {self.session_id}"
         self.max_entries = max_entries
-        self.messages: list[dict] = []
+        self.max_important = max_important
+        self._lanes: list[deque] = [deque() for _ in range(LANES)]
+        self._count = 0
+        self._important = 0      # Nachrichten in den Lanes 1..LANES-1
+        self._order = 0          # Ankunftsnummer (chronologischer Merge der Lanes)
+        self._seq = 0            # laufende Nummer der letzten hinzugefügten Nachricht (Journal)
+        self._pending: list[tuple[int, SessionMessage]] = []  # (seq, Nachricht) noch nicht im Journal
+        self._journal_lines = 0  # Zeilen im Journal seit dem letzten Snapshot
 
     def add(self, speaker: str, content: str, importance: int = 0, tags: list[str] | None = None,
             category: str | None = None, mood: str | None = None, project: str | None = None):
@@ -23,65 +147,154 @@ class SessionMemory:
         if speaker not in VALID_SPEAKERS:
             speaker = "user"  # fallback statt crash
 
-        entry = {
-            "id": str(uuid4()),
-            "timestamp": datetime.now().isoformat(timespec="seconds"),
-            "speaker": speaker,                    # "user" | "persona"
-            "content": content.strip(),
-            "importance": int(importance),         # 0 normal, 1 wichtig, 2 sehr wichtig
-            "tags": tags or [],
-            "category": category,                  # z.B. "request", "code", "decision"
-            "mood": mood,                          # optional
-            "project": project                     # z.B. "finance_tracker"
-        }
-        self.messages.append(entry)
-        if len(self.messages) > self.max_entries:
-            # Älteste un-wichtige Einträge zuerst entfernen
-            self._prune()
+        entry = SessionMessage(
+            id=str(uuid4()),
+            timestamp=datetime.now().isoformat(timespec="seconds"),
+            speaker=speaker,                    # "user" | "persona"
+            content=content.strip(),
+            importance=int(importance),         # 0 normal, 1 wichtig, 2 sehr wichtig
+            tags=tags or [],
+            category=category,                  # z.B. "request", "code", "decision"
+            mood=mood,                          # optional
+            project=project                     # z.B. "finance_tracker"
+        )
+        self._append(entry)
+        self._seq += 1
+        self._pending.append((self._seq, entry))
         return True
 
-    def _prune(self):
-        # behalte wichtige zuerst, droppe die ältesten unwichtigen
-        important = [m for m in self.messages if m.get("importance", 0) >= 1]
-        normal = [m for m in self.messages if m.get("importance", 0) < 1]
-        # halte z.B. 80% Budget für wichtige frei
-        budget = self.max_entries - len(important)
-        normal = normal[-max(budget, 0):]
-        self.messages = important + normal
-        self.messages.sort(key=lambda m: m["timestamp"])  # chronologisch
+    def _append(self, entry: SessionMessage):
+        self._order += 1
+        entry.order = self._order
+        lane = min(max(entry.importance, 0), LANES - 1)
+        self._lanes[lane].append(entry)
+        self._count += 1
+        if lane:
+            self._important += 1
+            if self._important > self.max_important:
+                self._evict(important=True)
+        if self._count > self.max_entries and self._lanes[0]:
+            self._evict()
+
+    def _evict(self, important: bool = False):
+        # Älteste normale Nachricht entfernen; `important`: älteste der niedrigsten belegten wichtigen Stufe
+        for lane in self._lanes[1:] if important else self._lanes[:1]:
+            if lane:
+                lane.popleft()
+                self._count -= 1
+                if important:
+                    self._important -= 1
+                return
+
+    def _clear(self):
+        for lane in self._lanes:
+            lane.clear()
+        self._count = 0
+        self._important = 0
+        self._order = 0
+
+    def _records(self, min_lane: int = 0):
+        """SessionMessage-Records chronologisch (Merge der Lanes ab `min_lane`)."""
+        return heapq.merge(*self._lanes[min_lane:], key=_by_order)
+
+    def __iter__(self):
+        """Chronologisch (Ankunftsreihenfolge) über alle Nachrichten, als dicts."""
+        return (m.to_dict() for m in self._records())
+
+    @property
+    def messages(self) -> list[dict]:
+        return [m.to_dict() for m in self._records()]
 
     def get_all(self) -> list[dict]:
         return self.messages
 
     def get_important(self, min_importance: int = 1) -> list[dict]:
-        return [m for m in self.messages if m.get("importance", 0) >= min_importance]
+        lanes = self._records(min(max(min_importance, 0), LANES - 1))
+        return [m.to_dict() for m in lanes if m.importance >= min_importance]
+
+    def _path(self) -> str:
+        return session_path(self.session_id)
 
     def save_to_json(self) -> str:
-        path = os.path.join(SESSION_DIR, f"session_{self.session_id}.json")
-        tmp = path + ".tmp"
-        with open(tmp, "w", encoding="utf-8") as f:
-            json.dump({
-                "session_id": self.session_id,
-                "title": self.title,
-                "messages": self.messages
-            }, f, indent=2, ensure_ascii=False)
-        os.replace(tmp, path)
+        """Neue Nachrichten ans Journal anhängen; Snapshot nur beim ersten Speichern oder wenn das
+        Journal zu lang wird. Gibt den Snapshot-Pfad zurück."""
+        path = self._path()
+        journal = self._journal_lines + len(self._pending)
+        if not os.path.exists(path) or journal >= max(JOURNAL_MIN, self._count - journal):
+            return self.compact()
+        new = [m for _, m in self._pending]
+        if self._pending:
+            with open(_journal_path(path), "a", encoding="utf-8") as f:
+                f.write("".join(
+                    json.dumps({"seq": seq, **entry.to_dict()}, ensure_ascii=False) + "\n" for seq, entry in self._pending
+                ))
+            self._journal_lines += len(self._pending)
+            self._pending = []
+        self._update_index(new, path)
+        return path
+
+    def _update_index(self, new: list, path: str):
+        if self.index is not None:
+            self.index.add_messages(self.session_id, self.title, [m.to_dict() for m in new], path=path)
+
+    def compact(self) -> str:
+        """Vollständiger Snapshot (atomar, mit Offset-Datei), danach das Journal leeren."""
+        path = self._path()
+        new = [m for _, m in self._pending]
+        head = {"session_id": self.session_id, "title": self.title, "seq": self._seq}
+        _write_snapshot(path, head, self)
+        journal = _journal_path(path)
+        if os.path.exists(journal):
+            os.remove(journal)
+        self._pending = []
+        self._journal_lines = 0
+        self._update_index(new, path)
         return path
 
     def load_from_json(self, path: str) -> bool:
-        if not os.path.exists(path):
-            return False
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        """Snapshot laden und das Journal (nur Nachrichten nach dem Snapshot) nachspielen.
+        Fehlen beide Dateien, wird die Session transparent aus dem Archiv gelesen (session_archive.py)."""
+        journal = _journal_path(path)
+        data = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        elif not os.path.exists(journal):
+            data = _read_archived(path)
+            if data is None:
+                return False
         self.session_id = data.get("session_id", self.session_id)
         self.title = data.get("title", self.title)
-        self.messages = data.get("messages", [])
+        self._clear()
+        for m in data.get("messages", []):
+            self._append(SessionMessage.from_dict(m))
+        self._seq = data.get("seq", 0)
+        self._pending = []
+        self._journal_lines = 0
+        if os.path.exists(journal):
+            with open(journal, "rb+") as f:
+                data = f.read()
+                end = data.rfind(b"\n") + 1
+                if end < len(data):
+                    # Absturz beim Anhängen: Rest ohne Zeilenende abschneiden, damit das nächste
+                    # Anhängen nicht an ein Bruchstück anschließt
+                    f.truncate(end)
+            for line in data[:end].splitlines():
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # beschädigte Zeile
+                self._journal_lines += 1
+                seq = entry.pop("seq", 0)
+                if seq > self._seq:
+                    self._append(SessionMessage.from_dict(entry))
+                    self._seq = seq
         return True
 
     def export_markdown(self) -> str:
         """Gibt die Session hübsch formatiert als Markdown zurück."""
         lines = [f"# {self.title} ({self.session_id})", ""]
-        for m in self.messages:
+        for m in self._records():
             who = "👤 User" if m["speaker"] == "user" else "🤖 Persona"
             tags = f"  _tags: {', '.join(m['tags'])}_" if m.get("tags") else ""
             meta = []
@@ -95,7 +308,10 @@ class SessionMemory:
     def reset(self, new_title: str | None = None):
         self.session_id = str(uuid4())[:8]
         self.title = new_title or f"Session {self.session_id}"
-        self.messages = []
+        self._clear()
+        self._seq = 0
+        self._pending = []
+        self._journal_lines = 0
 
     def __len__(self) -> int:
-        return len(self.messages)
+        return self._count
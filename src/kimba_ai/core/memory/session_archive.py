@@ -0,0 +1,212 @@
+# session_archive.py
+# Archiv-Stufe für alte Sessions (memory/sessions/archive/)
+# - Sessions, die länger als max_idle_days nicht geschrieben wurden, werden in komprimierte Segmente
+#   gepackt (zstd über das optionale Paket `zstandard`, sonst gzip) und aus memory/sessions entfernt
+#   -> Verzeichnis-Scans beim Start (SessionIndex.sync) sehen nur noch aktive Sessions
+# - Ein Segment je Archivlauf; jede Session ist ein eigener Frame/Member darin (Offset + Länge im
+#   Katalog) -> eine Session lesen = ein seek + ein Dekomprimieren, nicht das ganze Segment
+# - Katalog archive/catalog.jsonl (append-only, letzter Eintrag je Session gilt): Titel, Anzahl,
+#   letzte Aktivität, Segment, Offset, Länge, Codec
+# - Einträge im Session-Index (session_index.py) bleiben erhalten und zeigen auf das Segment -
+#   archivierte Sessions bleiben durchsuchbar
+# - Lesen transparent: SessionMemory.load_from_json und SessionReader fallen auf das Archiv zurück,
+#   wenn die Session-Dateien fehlen; wird eine archivierte Session weitergeschrieben, entsteht wieder
+#   ein aktiver Snapshot, der Vorrang vor dem Archiv hat
+
+import os
+import gzip
+import json
+import time
+import datetime
+from typing import Dict, Iterable, List, Optional
+
+from src.kimba_ai.core.memory.session import SESSION_DIR, _journal_path, _offsets_path
+from src.kimba_ai.core.memory.session_index import SESSION_FILE_RE, read_session_file
+
+try:
+    import zstandard
+except ImportError:  # optional - dann gzip
+    zstandard = None
+
+ARCHIVE_DIR        = "archive"
+CATALOG_FILE       = "catalog.jsonl"
+SEGMENT_FILE       = "sessions_{stamp}.seg.{ext}"
+ARCHIVE_AFTER_DAYS = 30
+CODECS             = {"zstd": "zst", "gzip": "gz"}
+ZSTD_LEVEL         = 10
+GZIP_LEVEL         = 6
+
+
+def default_codec() -> str:
+    return "zstd" if zstandard is not None else "gzip"
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Archiv-Segment ist zstd-komprimiert, aber `zstandard` ist nicht installiert")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def session_id_of(path: str) -> Optional[str]:
+    """session_<id>.json(l) -> id."""
+    match = SESSION_FILE_RE.match(os.path.basename(path))
+    return match.group(1) if match else None
+
+
+class SessionArchive:
+    """Komprimierte Segmente + Katalog neben den aktiven Sessions."""
+
+    def __init__(self, session_dir: Optional[str] = None, codec: Optional[str] = None):
+        """`codec`: "zstd" oder "gzip" für neue Segmente (Standard: zstd, falls installiert)."""
+        if codec is not None and codec not in CODECS:
+            raise ValueError(f"Unbekannter Codec: {codec} (erlaubt: {sorted(CODECS)})")
+        if codec == "zstd" and zstandard is None:
+            print("[WARN] zstandard nicht installiert - Session-Archiv nutzt gzip")
+            codec = "gzip"
+        self.session_dir = session_dir or SESSION_DIR
+        self.dir = os.path.join(self.session_dir, ARCHIVE_DIR)
+        self.codec = codec or default_codec()
+        self.catalog_path = os.path.join(self.dir, CATALOG_FILE)
+        self.catalog: Dict[str, dict] = {}
+        self._catalog_state = None
+        self._load_catalog()
+
+    # -----------------------------
+    # Katalog
+    # -----------------------------
+    def _load_catalog(self):
+        """Katalog (neu) lesen, falls er sich seit dem letzten Lesen geändert hat."""
+        try:
+            st = os.stat(self.catalog_path)
+        except FileNotFoundError:
+            self.catalog, self._catalog_state = {}, None
+            return
+        state = (st.st_size, st.st_mtime_ns)
+        if state == self._catalog_state:
+            return
+        catalog = {}
+        with open(self.catalog_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # abgerissene Zeile
+                catalog[entry["session_id"]] = entry
+        self.catalog, self._catalog_state = catalog, state
+
+    def __contains__(self, session_id: str) -> bool:
+        self._load_catalog()
+        return session_id in self.catalog
+
+    def entries(self) -> List[dict]:
+        """Katalog-Einträge, neueste Aktivität zuerst."""
+        self._load_catalog()
+        return sorted(self.catalog.values(), key=lambda e: e.get("last_activity", ""), reverse=True)
+
+    # -----------------------------
+    # Lesen
+    # -----------------------------
+    def read(self, session_id: str) -> Optional[dict]:
+        """Archivierte Session als dict (session_id, title, seq, messages) oder None."""
+        self._load_catalog()
+        entry = self.catalog.get(session_id)
+        if entry is None:
+            return None
+        with open(os.path.join(self.dir, entry["segment"]), "rb") as f:
+            f.seek(entry["offset"])
+            data = f.read(entry["length"])
+        return json.loads(_decompress(data, entry["codec"]))
+
+    # -----------------------------
+    # Archivieren
+    # -----------------------------
+    def idle_sessions(self, max_idle_days: float = ARCHIVE_AFTER_DAYS, exclude: Iterable[str] = ()) -> List[tuple]:
+        """[(session_id, Snapshot-Pfad, letzte Aktivität)] aller aktiven Sessions, deren Dateien
+        seit mehr als `max_idle_days` Tagen nicht geändert wurden (ohne `exclude`)."""
+        cutoff = time.time() - max_idle_days * 86400
+        exclude = set(exclude)
+        last: Dict[str, float] = {}
+        for name in os.listdir(self.session_dir):
+            sid = session_id_of(name)
+            if sid is None or sid in exclude:
+                continue
+            mtime = os.path.getmtime(os.path.join(self.session_dir, name))
+            last[sid] = max(last.get(sid, 0.0), mtime)
+        return sorted(
+            (sid, os.path.join(self.session_dir, f"session_{sid}.json"), mtime)
+            for sid, mtime in last.items() if mtime < cutoff
+        )
+
+    def archive(self, max_idle_days: float = ARCHIVE_AFTER_DAYS, exclude: Iterable[str] = (), index=None) -> int:
+        """Inaktive Sessions in ein neues Segment packen und ihre Dateien entfernen.
+
+        Reihenfolge für Absturzsicherheit: Segment (tmp + rename) -> Katalog -> Session-Dateien löschen.
+        Bricht es dazwischen ab, bleibt die aktive Datei maßgeblich und der nächste Lauf archiviert neu.
+        `index`: SessionIndex - dessen Einträge zeigen danach auf das Segment.
+        Gibt die Zahl archivierter Sessions zurück.
+        """
+        idle = self.idle_sessions(max_idle_days, exclude)
+        if not idle:
+            return 0
+        os.makedirs(self.dir, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        segment = SEGMENT_FILE.format(stamp=stamp, ext=CODECS[self.codec])
+        seg_path = os.path.join(self.dir, segment)
+        entries = []
+        with open(seg_path + ".tmp", "wb") as f:
+            for sid, path, mtime in idle:
+                try:
+                    head, messages = read_session_file(path)
+                except (OSError, json.JSONDecodeError) as e:
+                    print(f"[WARN] Session {sid} nicht lesbar, wird nicht archiviert: {e}")
+                    continue
+                journaled = len(messages) - len(head.get("messages", []))
+                payload = {
+                    "session_id": head.get("session_id", sid), "title": head.get("title"),
+                    "seq": head.get("seq", 0) + journaled, "messages": messages,
+                }
+                blob = _compress(json.dumps(payload, ensure_ascii=False).encode("utf-8"), self.codec)
+                entries.append({
+                    "session_id": sid, "title": payload["title"], "messages": len(messages),
+                    "last_activity": datetime.datetime.fromtimestamp(mtime).isoformat(timespec="seconds"),
+                    "archived": datetime.datetime.now().isoformat(timespec="seconds"),
+                    "segment": segment, "offset": f.tell(), "length": len(blob), "codec": self.codec,
+                })
+                f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        if not entries:
+            os.remove(seg_path + ".tmp")
+            return 0
+        os.replace(seg_path + ".tmp", seg_path)
+        with open(self.catalog_path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries))
+            f.flush()
+            os.fsync(f.fileno())
+        self._load_catalog()
+
+        for e in entries:
+            path = os.path.join(self.session_dir, f"session_{e['session_id']}.json")
+            for p in (path, _journal_path(path), _offsets_path(path)):
+                if os.path.exists(p):
+                    os.remove(p)
+            if index is not None:
+                index.set_location(e["session_id"], seg_path)
+        print(f"[INFO] {len(entries)} inaktive Session(s) archiviert -> {segment}")
+        return len(entries)
+
+
+def read_archived(session_id: str, session_dir: Optional[str] = None) -> Optional[dict]:
+    """Archivierte Session lesen (None, falls nicht archiviert)."""
+    archive_dir = os.path.join(session_dir or SESSION_DIR, ARCHIVE_DIR)
+    if not os.path.exists(os.path.join(archive_dir, CATALOG_FILE)):
+        return None
+    return SessionArchive(session_dir).read(session_id)
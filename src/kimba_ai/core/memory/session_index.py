@@ -0,0 +1,455 @@
+# session_index.py
+# Persistenter Suchindex über alle Sessions (memory/sessions/session_index.db)
+# - Eine Zeile je Nachricht: Volltext (FTS5, BM25), speaker, category, project, mood, importance,
+#   tags (eigene Tabelle), Zeitstempel - Filter per SQL-Indizes, ohne Session-Dateien zu öffnen
+# - Inkrementell: SessionMemory(index=...) meldet neue Nachrichten beim Speichern; sync() liest nur
+#   Session-Dateien nach, deren Snapshot/Journal sich seit dem letzten Lauf geändert hat
+# - Nachrichten bleiben im Index, auch wenn die Session sie später verdrängt oder archiviert wird
+# - Optional Vektorseite über das Embedding-Backend des Langzeitgedächtnisses (embedders.py, geteilter
+#   Micro-Batching-Dienst): Embeddings werden erst bei der ersten semantischen Suche nachberechnet,
+#   Speichern bleibt billig; Suche exakt per Matrixprodukt über die vorgefilterten Nachrichten
+# - Text + Vektor zusammen: Reciprocal Rank Fusion wie die hybride Suche im Langzeitgedächtnis
+
+import os
+import re
+import json
+import sqlite3
+import datetime
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from src.kimba_ai.core.memory.embedders import make_embedder
+from src.kimba_ai.core.memory.embed_service import EmbeddingService, shared_service
+from src.kimba_ai.core.memory.lexical_index import tokenize
+from src.kimba_ai.core.memory.session import SESSION_DIR
+from src.kimba_ai.core.memory.sqlite_store import VectorBuffer
+
+INDEX_FILE = "session_index.db"
+SESSION_FILE_RE = re.compile(r"^session_(.+)\.jsonl?$")
+EMBED_BATCH = 256   # Nachrichten pro Encode beim Nachberechnen der Embeddings
+SEARCH_POOL = 50    # Kandidaten je Rangliste bei Text + Vektor
+RRF_K = 60
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS messages (
+        id INTEGER PRIMARY KEY,
+        msg_id TEXT NOT NULL UNIQUE,
+        session_id TEXT NOT NULL,
+        timestamp TEXT NOT NULL,
+        speaker TEXT,
+        category TEXT,
+        project TEXT,
+        mood TEXT,
+        importance INTEGER DEFAULT 0,
+        tags TEXT,
+        content TEXT NOT NULL,
+        embedding BLOB
+    )""",
+    "CREATE TABLE IF NOT EXISTS message_tags (msg INTEGER NOT NULL, tag TEXT NOT NULL)",
+    """CREATE TABLE IF NOT EXISTS sessions (
+        session_id TEXT PRIMARY KEY,
+        title TEXT,
+        path TEXT,
+        snapshot_mtime INTEGER DEFAULT 0,
+        journal_size INTEGER DEFAULT 0
+    )""",
+    "CREATE TABLE IF NOT EXISTS index_meta (key TEXT PRIMARY KEY, value TEXT)",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5("
+    "content, content='messages', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON messages(timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_messages_session ON messages(session_id, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_messages_category ON messages(category)",
+    "CREATE INDEX IF NOT EXISTS idx_messages_project ON messages(project)",
+    "CREATE INDEX IF NOT EXISTS idx_message_tags ON message_tags(tag, msg)",
+]
+
+_FIELDS = "m.id, m.msg_id, m.session_id, s.title, m.timestamp, m.speaker, m.category, m.project, m.mood, " \
+          "m.importance, m.tags, m.content"
+
+Predicate = Union[None, str, Iterable[str]]
+TimeValue = Union[None, int, float, str, datetime.datetime]
+
+
+def _iso(value: TimeValue) -> Optional[str]:
+    """Zeitgrenze -> ISO-String wie in den Sessions (lokale Zeit, Sekunden)."""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(timespec="seconds")
+    return datetime.datetime.fromtimestamp(int(value)).isoformat(timespec="seconds")
+
+
+def _values(pred: Predicate) -> Optional[List[str]]:
+    if pred is None:
+        return None
+    return [pred] if isinstance(pred, str) else list(pred)
+
+
+def _fts_query(text: str) -> Optional[str]:
+    """Freitext -> FTS5-Ausdruck: Tokens wie im BM25-Index des Langzeitgedächtnisses, ODER-verknüpft."""
+    terms = list(dict.fromkeys(tokenize(text)))
+    if not terms:
+        return None
+    return " OR ".join('"' + t.replace('"', '""') + '"' for t in terms)
+
+
+def _result(row: tuple) -> dict:
+    rid, msg_id, session_id, title, ts, speaker, category, project, mood, importance, tags, content = row
+    return {
+        "id": msg_id, "session_id": session_id, "title": title, "timestamp": ts, "speaker": speaker,
+        "content": content, "importance": importance or 0, "tags": json.loads(tags or "[]"),
+        "category": category, "mood": mood, "project": project,
+    }
+
+
+def read_session_file(snapshot_path: str) -> Tuple[Optional[dict], List[dict]]:
+    """Snapshot-Kopf + alle Nachrichten (Snapshot, dann Journal nach dessen `seq`), ohne Dateien
+    anzufassen (im Gegensatz zu SessionMemory.load_from_json keine Eviction, keine Reparatur)."""
+    data = {}
+    if os.path.exists(snapshot_path):
+        with open(snapshot_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    messages = list(data.get("messages", []))
+    journal = os.path.splitext(snapshot_path)[0] + ".jsonl"
+    if os.path.exists(journal):
+        seq = data.get("seq", 0)
+        with open(journal, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if entry.pop("seq", 0) > seq:
+                    messages.append(entry)
+    return data, messages
+
+
+class SessionIndex:
+    """SQLite/FTS5-Index über die Nachrichten aller Sessions; thread-sicher (eine Verbindung + Lock)."""
+
+    def __init__(
+        self,
+        session_dir: Optional[str] = None,
+        path: Optional[str] = None,
+        embedder=None,
+        batching: Union[bool, dict] = True
+    ):
+        """`session_dir`: Verzeichnis der Session-Dateien (Standard: session.SESSION_DIR).
+        `path`: Index-Datenbank (Standard: <session_dir>/session_index.db).
+        `embedder`: None = nur Text/Metadaten; sonst wie LongTermMemory(embedder=...) - True für
+        configs/embedding.json, Backend-Name, Konfiguration oder fertiges Objekt.
+        `batching`: Encodes über den prozessweit geteilten Micro-Batching-Dienst (siehe embed_service.py).
+        """
+        session_dir = session_dir or SESSION_DIR
+        os.makedirs(session_dir, exist_ok=True)
+        self.session_dir = session_dir
+        self.path = path or os.path.join(session_dir, INDEX_FILE)
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock:
+            for stmt in SCHEMA:
+                self.conn.execute(stmt)
+
+        self.embedder = None
+        if embedder is not None and embedder is not False:
+            self.embedder = make_embedder(None if embedder is True else embedder)
+            if batching:
+                self.embedder = shared_service(self.embedder, **(batching if isinstance(batching, dict) else {}))
+            self._check_model()
+        # Vektor-Cache (lazy): Nachrichten-IDs aufsteigend + Matrix in derselben Reihenfolge
+        self._vec_ids: List[int] = []
+        self._vecs: Optional[VectorBuffer] = None
+
+    # -----------------------------
+    # Schreiben
+    # -----------------------------
+    def add_messages(self, session_id: str, title: Optional[str], messages: List[dict], path: Optional[str] = None) -> int:
+        """Nachrichten einer Session eintragen (bereits bekannte `id`s werden übersprungen);
+        `path`: Snapshot-Pfad - dessen aktueller Dateistand gilt danach als indiziert."""
+        added = 0
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                for m in messages:
+                    cur = self.conn.execute(
+                        "INSERT OR IGNORE INTO messages (msg_id, session_id, timestamp, speaker, category, project, "
+                        "mood, importance, tags, content) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (m["id"], session_id, m["timestamp"], m.get("speaker"), m.get("category"), m.get("project"),
+                         m.get("mood"), int(m.get("importance") or 0), json.dumps(m.get("tags") or [], ensure_ascii=False),
+                         m["content"])
+                    )
+                    if not cur.rowcount:
+                        continue
+                    rid = cur.lastrowid
+                    self.conn.execute("INSERT INTO messages_fts (rowid, content) VALUES (?, ?)", (rid, m["content"]))
+                    tags = set(m.get("tags") or [])
+                    if tags:
+                        self.conn.executemany("INSERT INTO message_tags (msg, tag) VALUES (?, ?)", [(rid, t) for t in tags])
+                    added += 1
+                self.conn.execute(
+                    "INSERT INTO sessions (session_id, title, path) VALUES (?, ?, ?) ON CONFLICT(session_id) "
+                    "DO UPDATE SET title = COALESCE(excluded.title, title), path = COALESCE(excluded.path, path)",
+                    (session_id, title, path)
+                )
+                if path is not None:
+                    self._mark_synced(session_id, path)
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return added
+
+    def remove_session(self, session_id: str) -> int:
+        """Alle Nachrichten einer Session aus dem Index entfernen."""
+        with self._lock:
+            rows = self.conn.execute("SELECT id, content FROM messages WHERE session_id = ?", (session_id,)).fetchall()
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(
+                    "INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', ?, ?)", rows
+                )
+                self.conn.executemany("DELETE FROM message_tags WHERE msg = ?", [(r[0],) for r in rows])
+                self.conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+                self.conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self._vec_ids, self._vecs = [], None  # Positionen verschoben -> Cache neu laden
+        return len(rows)
+
+    def set_location(self, session_id: str, path: str):
+        """Neuer Speicherort einer Session (z.B. Archiv-Segment) - die Nachrichten bleiben im Index."""
+        with self._lock:
+            self.conn.execute("UPDATE sessions SET path = ? WHERE session_id = ?", (path, session_id))
+
+    def _file_state(self, path: str) -> Tuple[int, int]:
+        journal = os.path.splitext(path)[0] + ".jsonl"
+        snap = os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+        return snap, os.path.getsize(journal) if os.path.exists(journal) else 0
+
+    def _mark_synced(self, session_id: str, path: str):
+        snap, journal = self._file_state(path)
+        self.conn.execute(
+            "UPDATE sessions SET snapshot_mtime = ?, journal_size = ? WHERE session_id = ?", (snap, journal, session_id)
+        )
+
+    def sync(self) -> int:
+        """Session-Dateien mit geändertem Snapshot/Journal (seit dem letzten Lauf) nachindizieren.
+        Gibt die Zahl neu aufgenommener Nachrichten zurück."""
+        with self._lock:
+            known = {
+                sid: (path, snap, journal) for sid, path, snap, journal in
+                self.conn.execute("SELECT session_id, path, snapshot_mtime, journal_size FROM sessions")
+            }
+        added = 0
+        seen = set()
+        for name in sorted(os.listdir(self.session_dir)):
+            match = SESSION_FILE_RE.match(name)
+            if not match or match.group(1) in seen:
+                continue
+            sid = match.group(1)
+            seen.add(sid)
+            path = os.path.join(self.session_dir, f"session_{sid}.json")
+            state = self._file_state(path)
+            if sid in known and known[sid][1:] == state:
+                continue
+            try:
+                data, messages = read_session_file(path)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"[WARN] Session {name} nicht lesbar: {e}")
+                continue
+            added += self.add_messages(data.get("session_id", sid), data.get("title"), messages, path=path)
+        return added
+
+    # -----------------------------
+    # Suche
+    # -----------------------------
+    def _where(self, speaker, category, project, mood, tags, session_id, since, until, min_importance):
+        clauses, params = [], []
+        for column, pred in (("speaker", speaker), ("category", category), ("project", project),
+                             ("mood", mood), ("session_id", session_id)):
+            values = _values(pred)
+            if values is not None:
+                clauses.append(f"m.{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        for tag in _values(tags) or []:  # alle genannten Tags müssen vorhanden sein
+            clauses.append("EXISTS (SELECT 1 FROM message_tags t WHERE t.msg = m.id AND t.tag = ?)")
+            params.append(tag)
+        if since is not None:
+            clauses.append("m.timestamp >= ?")
+            params.append(_iso(since))
+        if until is not None:
+            clauses.append("m.timestamp <= ?")
+            params.append(_iso(until))
+        if min_importance:
+            clauses.append("m.importance >= ?")
+            params.append(int(min_importance))
+        return clauses, params
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        limit: int = 10,
+        semantic: bool = False,
+        speaker: Predicate = None,
+        category: Predicate = None,
+        project: Predicate = None,
+        mood: Predicate = None,
+        tags: Optional[Iterable[str]] = None,
+        session_id: Predicate = None,
+        since: TimeValue = None,
+        until: TimeValue = None,
+        min_importance: int = 0
+    ) -> List[Tuple[float, dict]]:
+        """[(score, Nachricht + session_id/title)] über alle Sessions.
+
+        Ohne `query`: neueste passende Nachrichten (score 0). Mit `query`: BM25 über den Volltext;
+        `semantic=True` (braucht `embedder`): zusätzlich Vektorsuche, fusioniert per RRF.
+        Filter wie LongTermMemory.semantic_search (Werte oder Listen, Tags UND-verknüpft),
+        dazu speaker, session_id, min_importance; since/until als Unix-Zeit, datetime oder ISO-String.
+        """
+        clauses, params = self._where(speaker, category, project, mood, tags, session_id, since, until, min_importance)
+        fts = _fts_query(query) if query else None
+        if semantic and query:
+            if self.embedder is None:
+                raise ValueError("Semantische Session-Suche braucht SessionIndex(embedder=...)")
+            pool = max(limit, SEARCH_POOL)
+            lexical = self._lexical(fts, clauses, params, pool) if fts else []
+            vector = self._vector(query, clauses, params, pool)
+            return self._fuse(lexical, vector, limit)
+        if fts:
+            return self._lexical(fts, clauses, params, limit)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT {_FIELDS} FROM messages m LEFT JOIN sessions s USING (session_id) {where} "
+                f"ORDER BY m.timestamp DESC, m.id DESC LIMIT ?", (*params, limit)
+            ).fetchall()
+        return [(0.0, _result(r)) for r in rows]
+
+    def _lexical(self, fts: str, clauses: List[str], params: list, limit: int) -> List[Tuple[float, dict]]:
+        where = "".join(f" AND {c}" for c in clauses)
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT {_FIELDS}, -bm25(messages_fts) AS score FROM messages_fts "
+                f"JOIN messages m ON m.id = messages_fts.rowid LEFT JOIN sessions s USING (session_id) "
+                f"WHERE messages_fts MATCH ?{where} ORDER BY score DESC LIMIT ?", (fts, *params, limit)
+            ).fetchall()
+        return [(float(r[-1]), _result(r[:-1])) for r in rows]
+
+    def _vector(self, query: str, clauses: List[str], params: list, limit: int) -> List[Tuple[float, dict]]:
+        self._embed_missing()
+        q = self._encode([query], priority="interactive")[0]
+        with self._lock:
+            ids = np.asarray(self._vec_ids, dtype="int64")
+            mat = self._vecs.matrix() if self._vecs is not None else np.zeros((0, len(q)), dtype="float32")
+            if clauses:
+                allowed = np.fromiter(
+                    (r[0] for r in self.conn.execute(f"SELECT m.id FROM messages m WHERE {' AND '.join(clauses)}", params)),
+                    dtype="int64"
+                )
+                pos = np.searchsorted(ids, allowed)
+                pos = pos[(pos < len(ids)) & (ids[np.minimum(pos, len(ids) - 1)] == allowed)] if len(ids) else pos[:0]
+                ids, mat = ids[pos], mat[pos]
+        if not len(ids):
+            return []
+        scores = mat @ q
+        k = min(limit, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        with self._lock:
+            rows = {
+                r[0]: r for r in self.conn.execute(
+                    f"SELECT {_FIELDS} FROM messages m LEFT JOIN sessions s USING (session_id) "
+                    f"WHERE m.id IN ({', '.join('?' * k)})", [int(ids[i]) for i in top]
+                )
+            }
+        return [(float(scores[i]), _result(rows[int(ids[i])])) for i in top if int(ids[i]) in rows]
+
+    @staticmethod
+    def _fuse(lexical: list, vector: list, limit: int) -> List[Tuple[float, dict]]:
+        """Reciprocal Rank Fusion beider Ranglisten (Schlüssel: Nachrichten-ID)."""
+        fused: Dict[str, list] = {}
+        for ranking in (lexical, vector):
+            for rank, (_, msg) in enumerate(ranking):
+                entry = fused.setdefault(msg["id"], [0.0, msg])
+                entry[0] += 1.0 / (RRF_K + rank + 1)
+        return sorted(((s, m) for s, m in fused.values()), key=lambda x: -x[0])[:limit]
+
+    # -----------------------------
+    # Vektorseite
+    # -----------------------------
+    def _encode(self, texts: List[str], priority: str = "bulk") -> np.ndarray:
+        if isinstance(self.embedder, EmbeddingService):
+            vecs = self.embedder.encode(texts, batch_size=EMBED_BATCH, priority=priority)
+        else:
+            vecs = self.embedder.encode(texts, batch_size=EMBED_BATCH)
+        vecs = np.array(vecs, dtype="float32", copy=True).reshape(len(texts), self.embedder.dim)
+        norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+        np.divide(vecs, norms, out=vecs, where=norms > 0)
+        return vecs
+
+    def _check_model(self):
+        """Anderer Embedder als beim letzten Lauf -> alle Embeddings verwerfen (werden neu berechnet)."""
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM index_meta WHERE key = 'model'").fetchone()
+            if row and row[0] == self.embedder.name:
+                return
+            if row:
+                print(f"[INFO] Session-Index: Embedder gewechselt ({row[0]} -> {self.embedder.name}), Embeddings werden neu berechnet")
+                self.conn.execute("UPDATE messages SET embedding = NULL")
+            self.conn.execute("INSERT OR REPLACE INTO index_meta (key, value) VALUES ('model', ?)", (self.embedder.name,))
+
+    def _embed_missing(self):
+        """Embeddings neuer Nachrichten nachberechnen und den Vektor-Cache fortschreiben."""
+        with self._lock:
+            if self._vecs is None:
+                self._vecs = VectorBuffer(self.embedder.dim)
+                self._vec_ids = []
+            missing = self.conn.execute(
+                "SELECT id, content FROM messages WHERE embedding IS NULL ORDER BY id"
+            ).fetchall()
+            if missing and self._vec_ids and missing[0][0] <= self._vec_ids[-1]:
+                self._vecs, self._vec_ids = VectorBuffer(self.embedder.dim), []  # Lücke im Cache -> neu laden
+            last = self._vec_ids[-1] if self._vec_ids else 0
+        for lo in range(0, len(missing), EMBED_BATCH):
+            chunk = missing[lo:lo + EMBED_BATCH]
+            vecs = self._encode([c for _, c in chunk])  # außerhalb des Locks
+            with self._lock:
+                self.conn.executemany(
+                    "UPDATE messages SET embedding = ? WHERE id = ?",
+                    [(vecs[i].tobytes(), rid) for i, (rid, _) in enumerate(chunk)]
+                )
+        with self._lock:
+            # alle Embeddings mit id > last in den Cache (nachberechnete + evtl. von anderen Instanzen)
+            size = self.embedder.dim * 4
+            rows = self.conn.execute(
+                "SELECT id, embedding FROM messages WHERE id > ? AND embedding IS NOT NULL ORDER BY id", (last,)
+            ).fetchall()
+            rows = [r for r in rows if len(r[1]) == size]
+            if rows:
+                self._vecs.append(np.frombuffer(b"".join(r[1] for r in rows), dtype="float32").reshape(len(rows), -1))
+                self._vec_ids.extend(r[0] for r in rows)
+
+    # -----------------------------
+    # Verwaltung
+    # -----------------------------
+    def stats(self) -> dict:
+        with self._lock:
+            messages, embedded = self.conn.execute(
+                "SELECT COUNT(*), COUNT(embedding) FROM messages"
+            ).fetchone()
+            sessions = self.conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return {
+            "sessions": sessions, "messages": messages, "embedded": embedded,
+            "embedder": self.embedder.name if self.embedder is not None else None, "path": self.path,
+        }
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
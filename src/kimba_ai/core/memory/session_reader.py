@@ -0,0 +1,254 @@
+# session_reader.py
+# Seitenweises Lesen gespeicherter Sessions (z.B. GUI: erst der letzte Bildschirm, ältere bei Bedarf)
+# - Nur lesend, ändert keine Datei; Nachrichten = Snapshot + Journal (wie SessionMemory.load_from_json,
+#   aber ohne Eviction - der Leser zeigt alles, was gespeichert ist)
+# - Snapshot: Offset-Datei (session_<id>.offsets, von SessionMemory.compact() geschrieben) -> jede Seite
+#   per seek + ein read; fehlt sie oder ist veraltet, wird sie aus den Zeilenanfängen rekonstruiert
+#   (Zeilenumbrüche zählen, kein JSON-Parsen). Snapshots im alten Format (indent=2) werden einmal ganz geladen,
+#   archivierte Sessions (session_archive.py) einmal dekomprimiert.
+# - Journal: Zeilenanfänge per Scan nach Zeilenumbrüchen, inkrementell bei refresh(); veraltete Zeilen
+#   vor dem Snapshot-Stand (Absturz beim Kompaktieren) per Binärsuche über `seq` übersprungen
+# - Seiten: page(0) = neueste, pages() iteriert von neu nach alt, jede Seite chronologisch
+
+import os
+import json
+from typing import Iterator, List, Optional, Union
+
+import numpy as np
+
+from src.kimba_ai.core.memory.session import (
+    SNAPSHOT_HEAD_END, MESSAGE_SEP, _journal_path, _offsets_path, _read_archived, session_path
+)
+
+PAGE_SIZE = 50
+SCAN_CHUNK = 1 << 20  # Bytes pro Lesevorgang beim Suchen nach Zeilenumbrüchen
+
+
+def _line_starts(f, start: int, stop: Optional[int] = None) -> np.ndarray:
+    """Positionen direkt nach jedem Zeilenumbruch in [start, stop) - ohne Inhalt zu parsen."""
+    f.seek(start)
+    out, pos = [], start
+    while stop is None or pos < stop:
+        chunk = f.read(SCAN_CHUNK if stop is None else min(SCAN_CHUNK, stop - pos))
+        if not chunk:
+            break
+        out.append(np.flatnonzero(np.frombuffer(chunk, dtype="uint8") == 10) + pos + 1)
+        pos += len(chunk)
+    return np.concatenate(out) if out else np.zeros(0, dtype="int64")
+
+
+class SessionReader:
+    """Lazy, seitenweiser Zugriff auf eine gespeicherte Session (Snapshot + Journal)."""
+
+    def __init__(self, path: str, page_size: int = PAGE_SIZE):
+        """`path`: Snapshot-Pfad (session_<id>.json); das Journal daneben wird mitgelesen."""
+        if page_size < 1:
+            raise ValueError("page_size muss >= 1 sein")
+        self.path = path
+        self.journal = _journal_path(path)
+        self.page_size = page_size
+        self.session_id: Optional[str] = None
+        self.title: Optional[str] = None
+        self.seq = 0
+        self._snap_state = False  # noch nie geladen (None = kein Snapshot vorhanden)
+        self.refresh()
+
+    @classmethod
+    def for_session(cls, session_id: str, page_size: int = PAGE_SIZE) -> "SessionReader":
+        return cls(session_path(session_id), page_size)
+
+    # -----------------------------
+    # Offsets
+    # -----------------------------
+    def refresh(self) -> int:
+        """Dateistand neu einlesen: Snapshot nur bei Änderung, Journal ab der zuletzt gelesenen Stelle.
+        Gibt die Gesamtzahl der Nachrichten zurück."""
+        state = None
+        if os.path.exists(self.path):
+            st = os.stat(self.path)
+            state = (st.st_size, st.st_mtime_ns)
+        if state != self._snap_state:
+            self._load_snapshot(state)
+            self._journal_starts = np.zeros(0, dtype="int64")  # Zeilenanfänge vollständiger Zeilen
+            self._journal_end = 0      # bis hier gescannt (Ende der letzten vollständigen Zeile)
+            self._journal_first = 0    # erste Zeile mit seq > Snapshot-seq
+        self._scan_journal()
+        return len(self)
+
+    def _load_snapshot(self, state):
+        self._snap_state = state
+        self._offsets = np.zeros(0, dtype="int64")
+        self._end = 0
+        self._legacy: Optional[List[dict]] = None
+        if state is None:
+            self.seq = 0
+            data = _read_archived(self.path) if not os.path.exists(self.journal) else None
+            if data is not None:
+                self._legacy = data.get("messages", [])
+                self._set_head(data)
+            return
+        with open(self.path, "rb") as f:
+            first = f.readline()
+            if not first.endswith(SNAPSHOT_HEAD_END):
+                # altes Format (indent=2): einmal ganz laden
+                f.seek(0)
+                data = json.load(f)
+                self._legacy = data.get("messages", [])
+                self._set_head(data)
+                return
+            self._set_head(json.loads(first[:-len(SNAPSHOT_HEAD_END)] + b"}"))
+            index = self._read_offsets(state)
+            if index is None:
+                index = self._rebuild_offsets(f, len(first), state[0])
+        self._offsets, self._end = index
+
+    def _set_head(self, head: dict):
+        self.session_id = head.get("session_id", self.session_id)
+        self.title = head.get("title", self.title)
+        self.seq = head.get("seq", 0)
+
+    def _read_offsets(self, state):
+        """Offset-Datei, falls sie zum aktuellen Snapshot gehört (Größe + mtime), sonst None."""
+        try:
+            raw = np.fromfile(_offsets_path(self.path), dtype="int64")
+        except (OSError, ValueError):
+            return None
+        if len(raw) < 4 or (int(raw[0]), int(raw[1])) != state or len(raw) != int(raw[2]) + 4:
+            return None
+        return raw[3:-1].copy(), int(raw[-1])
+
+    def _rebuild_offsets(self, f, head_len: int, size: int):
+        """Nachrichtenzeilen = Zeilen zwischen Kopf und der Schlusszeile "]}" (nur Zeilenumbrüche suchen)."""
+        starts = _line_starts(f, head_len, size)
+        starts = np.concatenate(([head_len], starts[starts < size])).astype("int64")
+        closing = int(starts[-1])  # Zeile "]}"
+        msgs, end = starts[:-1], closing - 1
+        if len(msgs) == 1 and end == int(msgs[0]):  # leere Session: nur eine Leerzeile
+            msgs = msgs[:0]
+        return msgs, end
+
+    def _journal_seq(self, f, pos: int) -> int:
+        f.seek(pos)
+        try:
+            return int(json.loads(f.readline()).get("seq", 0))
+        except (ValueError, AttributeError):
+            return 0
+
+    def _scan_journal(self):
+        if not os.path.exists(self.journal):
+            self._journal_starts = np.zeros(0, dtype="int64")
+            self._journal_end = self._journal_first = 0
+            return
+        size = os.path.getsize(self.journal)
+        if size < self._journal_end:  # Journal neu begonnen (kompaktiert) -> von vorn
+            self._journal_starts = np.zeros(0, dtype="int64")
+            self._journal_end = self._journal_first = 0
+        with open(self.journal, "rb") as f:
+            ends = _line_starts(f, self._journal_end, size)  # Positionen nach "\n" = Zeilenenden
+            if len(ends):
+                starts = np.concatenate(([self._journal_end], ends[:-1]))
+                self._journal_starts = np.concatenate((self._journal_starts, starts))
+                self._journal_end = int(ends[-1])  # abgerissene letzte Zeile bleibt außen vor
+            # Zeilen aus der Zeit vor dem Snapshot stehen (seq aufsteigend) am Anfang -> Binärsuche
+            lo, hi = self._journal_first, len(self._journal_starts)
+            if lo < hi and self._journal_seq(f, int(self._journal_starts[lo])) <= self.seq:
+                while lo < hi:
+                    mid = (lo + hi) // 2
+                    if self._journal_seq(f, int(self._journal_starts[mid])) <= self.seq:
+                        lo = mid + 1
+                    else:
+                        hi = mid
+                self._journal_first = lo
+
+    # -----------------------------
+    # Zugriff
+    # -----------------------------
+    @property
+    def _snap_count(self) -> int:
+        return len(self._legacy) if self._legacy is not None else len(self._offsets)
+
+    def __len__(self) -> int:
+        return self._snap_count + len(self._journal_starts) - self._journal_first
+
+    def messages(self, start: int = 0, stop: Optional[int] = None) -> List[dict]:
+        """Nachrichten [start, stop) in chronologischer Reihenfolge (ein read je Datei)."""
+        total = len(self)
+        start, stop, _ = slice(start, stop).indices(total)
+        if start >= stop:
+            return []
+        n_snap = self._snap_count
+        out: List[dict] = []
+        if start < n_snap:
+            out.extend(self._snapshot_range(start, min(stop, n_snap)))
+        if stop > n_snap:
+            out.extend(self._journal_range(max(start - n_snap, 0), stop - n_snap))
+        return out
+
+    def _snapshot_range(self, a: int, b: int) -> List[dict]:
+        if self._legacy is not None:
+            return self._legacy[a:b]
+        lo = int(self._offsets[a])
+        hi = int(self._offsets[b]) - len(MESSAGE_SEP) if b < len(self._offsets) else self._end
+        with open(self.path, "rb") as f:
+            f.seek(lo)
+            data = f.read(hi - lo)
+        return [json.loads(line) for line in data.split(MESSAGE_SEP)]
+
+    def _journal_range(self, a: int, b: int) -> List[dict]:
+        starts = self._journal_starts
+        first = self._journal_first
+        lo = int(starts[first + a])
+        hi = int(starts[first + b]) if first + b < len(starts) else self._journal_end
+        with open(self.journal, "rb") as f:
+            f.seek(lo)
+            data = f.read(hi - lo)
+        out = []
+        for line in data.splitlines():
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # beschädigte Zeile
+            entry.pop("seq", None)
+            out.append(entry)
+        return out
+
+    def __getitem__(self, key: Union[int, slice]):
+        if isinstance(key, slice):
+            if key.step not in (None, 1):
+                raise ValueError("Nur zusammenhängende Bereiche (step 1)")
+            return self.messages(key.start or 0, key.stop)
+        total = len(self)
+        i = key + total if key < 0 else key
+        if not 0 <= i < total:
+            raise IndexError(key)
+        return self.messages(i, i + 1)[0]
+
+    def tail(self, n: Optional[int] = None) -> List[dict]:
+        """Die neuesten `n` (Standard: page_size) Nachrichten, chronologisch."""
+        total = len(self)
+        return self.messages(max(0, total - (n or self.page_size)), total)
+
+    @property
+    def page_count(self) -> int:
+        return -(-len(self) // self.page_size)
+
+    def page(self, k: int) -> List[dict]:
+        """Seite `k` von hinten gezählt: 0 = neueste Nachrichten, page_count - 1 = älteste."""
+        hi = len(self) - k * self.page_size
+        if k < 0 or hi <= 0:
+            raise IndexError(k)
+        return self.messages(max(0, hi - self.page_size), hi)
+
+    def pages(self) -> Iterator[List[dict]]:
+        """Seiten von neu nach alt (für "ältere laden"); jede Seite chronologisch."""
+        hi = len(self)
+        while hi > 0:
+            lo = max(0, hi - self.page_size)
+            yield self.messages(lo, hi)
+            hi = lo
+
+    def __iter__(self) -> Iterator[dict]:
+        """Alle Nachrichten chronologisch, seitenweise nachgeladen."""
+        total = len(self)
+        for lo in range(0, total, self.page_size):
+            yield from self.messages(lo, min(total, lo + self.page_size))
@@ -0,0 +1,318 @@
+# sqlite_store.py
+# SQLite-Backend für das Langzeitgedächtnis (bestehendes Schema `memories`)
+# - WAL-Modus: Leser blockieren Schreiber nicht, ein Commit pro Batch
+# - Indizes auf timestamp, category, project
+# - Embedding-BLOBs werden gesammelt in eine NumPy-Matrix geladen (eine Kopie)
+# - Inkrementelles Nachladen ab der letzten bekannten rowid (Einträge anderer Prozesse)
+# - Statistik, Kategorien und "zuletzt" direkt per SQL, ohne die komplette Liste
+# - Einmaliger Import einer bestehenden Datenbank (z.B. der mitgelieferten kimba_memory/longterm_memories.db)
+#   per Kopie - die Quelle bleibt unverändert
+
+import os
+import json
+import sqlite3
+import datetime
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS memories (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    content TEXT NOT NULL,
+    mood TEXT,
+    category TEXT,
+    tags TEXT,
+    embedding BLOB
+)
+"""
+# Spalten, die das ursprüngliche Schema nicht kennt (werden per ALTER TABLE ergänzt)
+EXTRA_COLUMNS = {
+    "uuid": "TEXT", "project": "TEXT", "fp": "TEXT", "importance": "INTEGER DEFAULT 0",
+    "seen_count": "INTEGER DEFAULT 1", "last_seen": "TEXT",  # Near-Duplikate (Merge statt neuer Zeile)
+}
+INDEXES = {
+    "idx_memories_timestamp": "timestamp",
+    "idx_memories_category": "category",
+    "idx_memories_project": "project",
+    "idx_memories_uuid": "uuid",
+}
+META_SCHEMA = "CREATE TABLE IF NOT EXISTS kimba_meta (key TEXT PRIMARY KEY, value TEXT)"
+
+_COLUMNS = "id, timestamp, content, mood, category, tags, uuid, project, fp, importance, seen_count, last_seen"
+
+
+def _to_iso(ts: int) -> str:
+    # wie die bestehenden Zeilen: lokale Zeit, ISO-Format
+    return datetime.datetime.fromtimestamp(int(ts)).isoformat()
+
+
+def _to_unix(value) -> int:
+    if value is None:
+        return 0
+    try:
+        return int(float(value))
+    except ValueError:
+        return int(datetime.datetime.fromisoformat(value).timestamp())
+
+
+def _tags_out(tags: Optional[List[str]]) -> str:
+    return ",".join(tags or [])
+
+
+def _tags_in(value: Optional[str]) -> List[str]:
+    return [t.strip() for t in (value or "").split(",") if t.strip()]
+
+
+def _record(row: tuple) -> dict:
+    rid, ts, content, mood, category, tags, uid, project, fp, importance, seen, last_seen = row
+    record = {
+        "uuid": uid,
+        "timestamp": _to_unix(ts),
+        "text": content,
+        "category": category or "allgemein",
+        "mood": mood or "neutral",
+        "tags": _tags_in(tags),
+        "project": project,
+        "importance": importance or 0,
+        "fp": fp,
+        "rid": rid,
+    }
+    if seen and seen > 1:
+        record["seen"] = seen
+        record["last_seen"] = _to_unix(last_seen) if last_seen else None
+    return record
+
+
+def copy_database(src: str, dst: str) -> bool:
+    """Kopiert `src` nach `dst` (SQLite-Backup-API, Quelle nur lesend geöffnet), falls `dst` noch fehlt.
+    Gibt True zurück, wenn kopiert wurde."""
+    if os.path.exists(dst) or not os.path.exists(src):
+        return False
+    source = sqlite3.connect(f"file:{os.path.abspath(src)}?mode=ro", uri=True)
+    target = sqlite3.connect(dst + ".tmp")
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    os.replace(dst + ".tmp", dst)
+    return True
+
+
+class VectorBuffer:
+    """In-RAM-Vektormatrix mit Kapazitätsverdopplung (Append amortisiert O(1)).
+    Gleiche Schnittstelle wie VectorLog, damit LongTermMemory beide Backends gleich behandelt.
+    """
+
+    def __init__(self, dim: int, mat: Optional[np.ndarray] = None):
+        self.dim = dim
+        self._buf = np.zeros((0, dim), dtype="float32")
+        self.count = 0
+        if mat is not None:
+            self.append(mat)
+
+    def append(self, vecs: np.ndarray):
+        mat = np.asarray(vecs, dtype="float32").reshape(-1, self.dim)
+        need = self.count + len(mat)
+        if need > len(self._buf):
+            grown = np.zeros((max(need, 2 * len(self._buf), 1024), self.dim), dtype="float32")
+            grown[:self.count] = self._buf[:self.count]
+            self._buf = grown
+        self._buf[self.count:need] = mat
+        self.count = need
+
+    def matrix(self) -> np.ndarray:
+        return self._buf[:self.count]
+
+    def close(self):
+        pass
+
+
+class SQLiteMemoryStore:
+    """Metadaten + Embeddings in einer SQLite-Datei; rid = rowid (AUTOINCREMENT, nie wiederverwendet)."""
+
+    def __init__(self, path: str, dim: int, fsync: bool = False):
+        self.path = path
+        self.dim = dim
+        self.last_id = 0  # höchste bereits geladene rowid
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(f"PRAGMA synchronous={'FULL' if fsync else 'NORMAL'}")
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        with self._lock:
+            self.conn.execute(SCHEMA)
+            self.conn.execute(META_SCHEMA)
+            have = {row[1] for row in self.conn.execute("PRAGMA table_info(memories)")}
+            for col, kind in EXTRA_COLUMNS.items():
+                if col not in have:
+                    self.conn.execute(f"ALTER TABLE memories ADD COLUMN {col} {kind}")
+            for name, col in INDEXES.items():
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON memories({col})")
+
+    # -----------------------------
+    # Laden
+    # -----------------------------
+    def load(self, after: Optional[int] = None) -> Tuple[List[dict], np.ndarray, List[int]]:
+        """Lädt alle Zeilen mit rowid > `after` (Standard: `last_id`).
+
+        Gibt (Records, Matrix, fehlende) zurück; `fehlende` sind Positionen ohne passendes
+        Embedding (NULL oder andere Dimension) - deren Matrixzeilen sind null und müssen neu berechnet werden.
+        """
+        after = self.last_id if after is None else after
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT {_COLUMNS}, embedding FROM memories WHERE id > ? ORDER BY id", (after,)
+            ).fetchall()
+        records, blobs, missing = [], [], []
+        size = self.dim * 4
+        zero = bytes(size)
+        for i, row in enumerate(rows):
+            records.append(_record(row[:-1]))
+            blob = row[-1]
+            if blob is None or len(blob) != size:
+                missing.append(i)
+                blob = zero
+            blobs.append(blob)
+        # alle BLOBs auf einmal -> eine zusammenhängende Matrix
+        mat = np.frombuffer(b"".join(blobs), dtype="float32").reshape(len(rows), self.dim).copy()
+        if rows:
+            self.last_id = max(self.last_id, rows[-1][0])
+        return records, mat, missing
+
+    def get_meta(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM kimba_meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_meta(self, key: str, value: dict):
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO kimba_meta (key, value) VALUES (?, ?)", (key, json.dumps(value))
+            )
+
+    # -----------------------------
+    # Schreiben (je Aufruf eine Transaktion)
+    # -----------------------------
+    def insert(self, records: List[dict], mat: np.ndarray):
+        """Fügt Records + Embeddings ein und vergibt die rids (setzt `rid` in den Records)."""
+        mat = np.ascontiguousarray(mat, dtype="float32")
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'memories'").fetchone()
+                base = max(row[0] if row else 0, self.last_id)
+                for i, m in enumerate(records):
+                    m["rid"] = base + 1 + i
+                self.conn.executemany(
+                    "INSERT INTO memories (id, timestamp, content, mood, category, tags, uuid, project, fp, importance, "
+                    "seen_count, last_seen, embedding) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (m["rid"], _to_iso(m["timestamp"]), m["text"], m["mood"], m["category"],
+                         _tags_out(m["tags"]), m["uuid"], m.get("project"), m["fp"], m.get("importance", 0),
+                         m.get("seen", 1), _to_iso(m["last_seen"]) if m.get("last_seen") else None,
+                         mat[i].tobytes())
+                        for i, m in enumerate(records)
+                    ],
+                )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            if base == self.last_id:
+                # lückenlos an das Geladene angeschlossen -> Watermark nachziehen; liegen fremde Zeilen
+                # dazwischen, bleibt er stehen, damit load() sie noch liefert (eigene werden übersprungen)
+                self.last_id = base + len(records)
+
+    def update(self, records: Iterable[dict], mat: Optional[np.ndarray] = None):
+        """Schreibt uuid/fp (und optional neu berechnete Embeddings) für bestehende Zeilen zurück."""
+        records = list(records)
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(
+                    "UPDATE memories SET uuid = ?, fp = ? WHERE id = ?",
+                    [(m["uuid"], m["fp"], m["rid"]) for m in records],
+                )
+                if mat is not None:
+                    self.conn.executemany(
+                        "UPDATE memories SET embedding = ? WHERE id = ?",
+                        [(np.ascontiguousarray(mat[i], dtype="float32").tobytes(), m["rid"])
+                         for i, m in enumerate(records)],
+                    )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def touch(self, updates: Iterable[dict]):
+        """Merges von Near-Duplikaten: seen_count, last_seen und importance bestehender Zeilen."""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(
+                    "UPDATE memories SET seen_count = ?, last_seen = ?, importance = ? WHERE id = ?",
+                    [(u.get("seen", 1), _to_iso(u["last_seen"]) if u.get("last_seen") else None,
+                      u.get("importance", 0), u["rid"]) for u in updates],
+                )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def delete(self, rids: Iterable[int]):
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany("DELETE FROM memories WHERE id = ?", [(int(r),) for r in rids])
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute("DELETE FROM memories")
+
+    # -----------------------------
+    # Abfragen ohne In-Memory-Liste
+    # -----------------------------
+    def count(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM memories").fetchone()[0]
+
+    def category_counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self.conn.execute("SELECT category, COUNT(*) FROM memories GROUP BY category").fetchall()
+        return {cat: n for cat, n in rows}
+
+    def recent(
+        self,
+        limit: int = 10,
+        category: Optional[str] = None,
+        project: Optional[str] = None
+    ) -> List[dict]:
+        """Neueste Einträge (per Index auf timestamp), optional nach Kategorie/Projekt."""
+        where, args = [], []
+        if category is not None:
+            where.append("category = ?")
+            args.append(category)
+        if project is not None:
+            where.append("project = ?")
+            args.append(project)
+        sql = f"SELECT {_COLUMNS} FROM memories"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+        with self._lock:
+            rows = self.conn.execute(sql, (*args, limit)).fetchall()
+        return [_record(r) for r in rows]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
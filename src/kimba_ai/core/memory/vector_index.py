@@ -0,0 +1,449 @@
+# vector_index.py
+# Konfigurierbare FAISS-Index-Engine für das Langzeitgedächtnis
+# - flat: exakte Suche (kleine Stores)
+# - ivf / hnsw: ANN, sobald die Anzahl Vektoren `ann_threshold` überschreitet
+# - Training/Aufbau im Hintergrund-Thread, Suchen laufen solange auf dem alten Index
+# - Recall-Knöpfe: nprobe (IVF), efSearch (HNSW)
+# - Metrik: Inner Product auf L2-normalisierten Vektoren (= Cosine), optional L2
+# - Stabile IDs (IndexIDMap2 / IVF add_with_ids); Löschen per remove_ids (IVF)
+#   oder Tombstone-Menge, die bei der Suche per IDSelector ausgeblendet wird
+# - Vorgefilterte Suche: erlaubte ID-Menge als IDSelector (statt Overfetch + Nachfiltern)
+# - Optional komprimiert (quantize="sq8" / "pq"): Index hält nur Codes, die Top-Kandidaten
+#   werden mit den Originalvektoren (`fetch`, z.B. memmap) exakt nachsortiert
+# - Suchen teilen sich eine Lesesperre (parallel), Änderungen/Tausch nehmen die Schreibsperre
+
+import math
+import struct
+import threading
+from typing import Callable, Iterable, Optional, Tuple
+
+import numpy as np
+import faiss
+
+from src.kimba_ai.core.memory.rwlock import RWLock
+
+INDEX_MODES = ("auto", "flat", "ivf", "hnsw")
+QUANTIZERS = (None, "sq8", "pq")
+METRICS = {"ip": faiss.METRIC_INNER_PRODUCT, "l2": faiss.METRIC_L2}
+
+ANN_THRESHOLD   = 50_000   # ab hier wechselt "auto" auf ANN
+ANN_KIND        = "hnsw"   # Ziel-Modus für "auto": "ivf" oder "hnsw"
+IVF_NPROBE      = 16
+IVF_MIN_TRAIN   = 64 * 39  # darunter lohnt/klappt IVF-Training nicht -> flat
+IVF_RETRAIN_X   = 4        # IVF neu trainieren, wenn der Store um diesen Faktor gewachsen ist
+HNSW_M          = 32
+HNSW_EF_BUILD   = 40
+HNSW_EF_SEARCH  = 64
+TRAIN_SAMPLE    = 256      # Trainingsvektoren pro IVF-Liste (Obergrenze)
+# Kompression: sq8 = 1 Byte/Dimension, pq = PQ_M Bytes/Vektor (8 Bit je Teilvektor)
+PQ_M            = 48       # 384 / 48 = 8 Dimensionen je Teilvektor
+SQ_MIN_TRAIN    = 1_000    # darunter bleibt der Index unkomprimiert
+PQ_MIN_TRAIN    = 39 * 256 # k-means mit 256 Zentroiden je Teilraum braucht genug Punkte
+QUANT_SAMPLE    = 65_536   # Trainingsvektoren für SQ/PQ (Obergrenze)
+RERANK_FACTOR   = 4        # komprimierte Suche liefert k * RERANK_FACTOR Kandidaten
+
+
+def _ivf_nlist(n: int) -> int:
+    # Faustregel: ~4*sqrt(n) Listen, gerundet auf Zweierpotenz
+    return max(64, 1 << int(round(math.log2(4 * math.sqrt(max(n, 1))))))
+
+
+def _base(index):
+    """Eigentlicher Index unter einer IndexIDMap-Hülle."""
+    if isinstance(index, faiss.IndexIDMap):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def mode_of(index) -> str:
+    """Leitet den Modus aus dem FAISS-Objekt ab (verlässlicher als das Manifest)."""
+    base = _base(index)
+    if isinstance(base, faiss.IndexIVF):
+        return "ivf"
+    if isinstance(base, faiss.IndexHNSW):
+        return "hnsw"
+    return "flat"
+
+
+def quant_of(index) -> Optional[str]:
+    """Kompression des FAISS-Objekts: None (float32), "sq8" oder "pq"."""
+    base = _base(index)
+    if isinstance(base, faiss.IndexHNSW):
+        base = faiss.downcast_index(base.storage)
+    if isinstance(base, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)):
+        return "sq8"
+    if isinstance(base, (faiss.IndexPQ, faiss.IndexIVFPQ)):
+        return "pq"
+    return None
+
+
+def _sample(mat: np.ndarray, n: int) -> np.ndarray:
+    if n >= len(mat):
+        return np.ascontiguousarray(mat, dtype="float32")
+    rows = np.sort(np.random.default_rng(0).choice(len(mat), n, replace=False))
+    return np.ascontiguousarray(mat[rows], dtype="float32")
+
+
+def _ids(ids: Iterable[int]) -> np.ndarray:
+    if not isinstance(ids, np.ndarray):
+        ids = np.fromiter(ids, dtype="int64")
+    return np.ascontiguousarray(ids, dtype="int64")
+
+
+class VectorIndex:
+    """Hält den aktiven FAISS-Index und migriert automatisch zwischen flat/IVF/HNSW."""
+
+    def __init__(
+        self,
+        dim: int,
+        source: Callable[[], Tuple[np.ndarray, np.ndarray]],
+        mode: str = "auto",
+        ann_threshold: int = ANN_THRESHOLD,
+        ann_kind: str = ANN_KIND,
+        nprobe: int = IVF_NPROBE,
+        ef_search: int = HNSW_EF_SEARCH,
+        hnsw_m: int = HNSW_M,
+        background: bool = True,
+        metric: str = "ip",
+        quantize: Optional[str] = None,
+        rerank: int = RERANK_FACTOR,
+        fetch: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+    ):
+        """`source` liefert bei Bedarf (Vektormatrix, IDs) aller lebenden Einträge (für Training/Rebuild).
+        `quantize`: None, "sq8" (int8 je Dimension) oder "pq" (Produktquantisierung, PQ_M Bytes).
+        `fetch` liefert die Originalvektoren zu IDs (unbekannte IDs: Nullzeile) - damit werden die
+        `rerank`-fachen Kandidaten der komprimierten Suche exakt nachsortiert.
+        """
+        if mode not in INDEX_MODES:
+            raise ValueError(f"Unbekannter Index-Modus: {mode}")
+        if ann_kind not in ("ivf", "hnsw"):
+            raise ValueError(f"Unbekannter ANN-Typ: {ann_kind}")
+        if metric not in METRICS:
+            raise ValueError(f"Unbekannte Metrik: {metric}")
+        if quantize not in QUANTIZERS:
+            raise ValueError(f"Unbekannte Kompression: {quantize}")
+        self.dim = dim
+        self.source = source
+        self.mode = mode
+        self.ann_threshold = ann_threshold
+        self.ann_kind = ann_kind
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.hnsw_m = hnsw_m
+        self.background = background
+        self.metric = metric
+        self._faiss_metric = METRICS[metric]
+        self.quantize = quantize
+        self.rerank = max(1, rerank)
+        self.fetch = fetch
+
+        self.index = faiss.IndexIDMap2(self._flat())
+        self.trained_size = 0      # Store-Größe beim letzten IVF-Training
+        self.swapped = False       # wurde seit dem letzten Checkpoint migriert?
+        self.dead: set = set()     # gelöscht, aber physisch noch im Index (Tombstones)
+
+        self._lock = RWLock()  # read: Suchen/Serialisieren, write: add/delete/Tausch
+        self._builder: Optional[threading.Thread] = None
+        self._pending: list = []   # Adds während eines Hintergrund-Aufbaus
+        self._pending_dead: set = set()  # Löschungen während eines Hintergrund-Aufbaus
+        self._selector = None      # gecachter IDSelector für `dead`
+
+    # -----------------------------
+    # Aufbau
+    # -----------------------------
+    def _flat(self):
+        return faiss.IndexFlat(self.dim, self._faiss_metric)
+
+    def _target_mode(self, n: int) -> str:
+        if self.mode != "auto":
+            target = self.mode
+        else:
+            current = mode_of(self.index)
+            if current != "flat" and n >= self.ann_threshold // 2:
+                target = current  # Hysterese: nicht bei jeder Löschung zurückfallen
+            else:
+                target = self.ann_kind if n >= self.ann_threshold else "flat"
+        if target == "ivf" and n < IVF_MIN_TRAIN:
+            return "flat"
+        return target
+
+    def _target_quant(self, n: int) -> Optional[str]:
+        if self.quantize == "pq" and n >= PQ_MIN_TRAIN:
+            return "pq"
+        if self.quantize == "sq8" and n >= SQ_MIN_TRAIN:
+            return "sq8"
+        return None
+
+    def _new_index(self, mode: str, mat: np.ndarray, ids: np.ndarray):
+        n = len(mat)
+        quant = self._target_quant(n)
+        sq8 = faiss.ScalarQuantizer.QT_8bit
+        if mode == "ivf":
+            nlist = min(_ivf_nlist(n), max(1, n // 39))
+            if quant == "pq":
+                index = faiss.IndexIVFPQ(self._flat(), self.dim, nlist, PQ_M, 8, self._faiss_metric)
+            elif quant == "sq8":
+                index = faiss.IndexIVFScalarQuantizer(self._flat(), self.dim, nlist, sq8, self._faiss_metric)
+            else:
+                index = faiss.IndexIVFFlat(self._flat(), self.dim, nlist, self._faiss_metric)
+            index.train(_sample(mat, max(nlist * TRAIN_SAMPLE, QUANT_SAMPLE if quant else 0)))
+            index.nprobe = self.nprobe
+            # Hashtable-DirectMap: remove_ids kostet nur die betroffene Liste
+            index.set_direct_map_type(faiss.DirectMap.Hashtable)
+        elif mode == "hnsw":
+            if quant == "pq":
+                base = faiss.IndexHNSWPQ(self.dim, PQ_M, self.hnsw_m, 8, self._faiss_metric)
+            elif quant == "sq8":
+                base = faiss.IndexHNSWSQ(self.dim, sq8, self.hnsw_m, self._faiss_metric)
+            else:
+                base = faiss.IndexHNSWFlat(self.dim, self.hnsw_m, self._faiss_metric)
+            if quant:
+                base.train(_sample(mat, QUANT_SAMPLE))
+            base.hnsw.efConstruction = HNSW_EF_BUILD
+            base.hnsw.efSearch = self.ef_search
+            index = faiss.IndexIDMap2(base)
+        else:
+            if quant == "pq":
+                base = faiss.IndexPQ(self.dim, PQ_M, 8, self._faiss_metric)
+            elif quant == "sq8":
+                base = faiss.IndexScalarQuantizer(self.dim, sq8, self._faiss_metric)
+            else:
+                base = self._flat()
+            if quant:
+                base.train(_sample(mat, QUANT_SAMPLE))
+            index = faiss.IndexIDMap2(base)
+        if n:
+            index.add_with_ids(np.ascontiguousarray(mat, dtype="float32"), _ids(ids))
+        return index
+
+    def _build(self, mode: str, mat: np.ndarray, ids: np.ndarray):
+        new_index = self._new_index(mode, mat, ids)
+        with self._lock.write:
+            # Adds/Löschungen, die während des Aufbaus kamen, nachtragen und atomar tauschen
+            for block, block_ids in self._pending:
+                new_index.add_with_ids(block, block_ids)
+            self._pending = []
+            self.index = new_index
+            self.dead = set()
+            self._selector = None
+            self._builder = None
+            self.swapped = True
+            if mode == "ivf":
+                self.trained_size = new_index.ntotal
+            pending_dead, self._pending_dead = self._pending_dead, set()
+        if pending_dead:
+            self.delete(pending_dead)
+
+    def _needs_rebuild(self, n: int) -> Optional[str]:
+        target = self._target_mode(n)
+        current = mode_of(self.index)
+        if target != current:
+            return target
+        if current == "ivf" and n >= IVF_RETRAIN_X * max(self.trained_size, 1):
+            return "ivf"  # Retraining mit mehr Listen
+        if self._target_quant(n) != quant_of(self.index):
+            # Kompression an/aus (Konfiguration geändert oder genug Trainingsdaten erreicht);
+            # Hysterese wie beim Modus: komprimiert bleiben, solange n nicht unter die Hälfte fällt
+            if quant_of(self.index) is None or self._target_quant(2 * n) != quant_of(self.index):
+                return current
+        return None
+
+    def _start_build(self, target: str):
+        mat, ids = self.source()
+        if (target == "flat" and self._target_quant(len(mat)) is None) or not self.background:
+            self._build(target, mat, ids)
+            return
+        with self._lock.write:
+            self._pending = []
+            self._pending_dead = set()
+            self._builder = threading.Thread(target=self._build, args=(target, mat, ids), daemon=True)
+        self._builder.start()
+
+    def maybe_migrate(self):
+        """Prüft Schwellwerte und startet ggf. (Re-)Training/Migration."""
+        if self._builder is not None:
+            return
+        target = self._needs_rebuild(self.live)
+        if target is not None:
+            self._start_build(target)
+
+    def rebuild(self, mat: np.ndarray, ids: np.ndarray):
+        """Baut den Index im passenden Modus synchron neu auf."""
+        self.wait()
+        mode = self._target_mode(len(mat))
+        current = mode_of(self.index)
+        if (mode == current == "ivf" and self.index.is_trained and len(mat) >= self.index.nlist
+                and quant_of(self.index) == self._target_quant(len(mat))):
+            # trainierte Zentroiden behalten, nur Listen neu füllen
+            with self._lock.write:
+                self.index.reset()
+                self.dead = set()
+                self._selector = None
+                if len(mat):
+                    self.index.add_with_ids(np.ascontiguousarray(mat, dtype="float32"), _ids(ids))
+            return
+        self._build(mode, mat, ids)
+
+    def purge(self):
+        """Entfernt Tombstones physisch: flat per remove_ids, HNSW per (Hintergrund-)Neuaufbau."""
+        if not self.dead or self._builder is not None:
+            return
+        if mode_of(self.index) == "hnsw":
+            self._start_build("hnsw")
+            return
+        with self._lock.write:
+            self.index.remove_ids(faiss.IDSelectorBatch(_ids(self.dead)))
+            self.dead = set()
+            self._selector = None
+
+    def wait(self, timeout: Optional[float] = None):
+        """Wartet auf einen laufenden Hintergrund-Aufbau."""
+        builder = self._builder
+        if builder is not None:
+            builder.join(timeout)
+
+    # -----------------------------
+    # Nutzung
+    # -----------------------------
+    @property
+    def ntotal(self) -> int:
+        return int(self.index.ntotal)
+
+    @property
+    def live(self) -> int:
+        return self.ntotal - len(self.dead)
+
+    @property
+    def dead_ratio(self) -> float:
+        return len(self.dead) / self.ntotal if self.ntotal else 0.0
+
+    def add(self, mat: np.ndarray, ids: Iterable[int]):
+        mat = np.ascontiguousarray(mat, dtype="float32").reshape(-1, self.dim)
+        ids = _ids(ids)
+        with self._lock.write:
+            self.index.add_with_ids(mat, ids)
+            if self._builder is not None:
+                self._pending.append((mat, ids))
+        self.maybe_migrate()
+
+    def delete(self, ids: Iterable[int]):
+        """Löscht IDs: IVF sofort per remove_ids, flat/HNSW als Tombstone."""
+        ids = _ids(ids)
+        if not len(ids):
+            return
+        with self._lock.write:
+            if self._builder is not None:
+                self._pending_dead.update(ids.tolist())
+            if isinstance(self.index, faiss.IndexIVF):
+                self.index.remove_ids(faiss.IDSelectorArray(ids))
+            else:
+                self.dead.update(ids.tolist())
+                self._selector = None
+
+    def present(self, ids: Iterable[int]) -> np.ndarray:
+        """Teilmenge der IDs, die physisch im Index stehen (z.B. für nachträglich eingespielte Tombstones)."""
+        ids = _ids(ids)
+        with self._lock.read:
+            if not len(ids) or not hasattr(self.index, "id_map"):
+                return ids  # IVF: remove_ids ignoriert unbekannte IDs ohnehin
+            return ids[np.isin(ids, faiss.vector_to_array(self.index.id_map))]
+
+    def search(
+        self,
+        q: np.ndarray,
+        k: int,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        allow: Optional[Iterable[int]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Gibt (Scores, IDs) zurück; Tombstones werden per IDSelector übersprungen.
+        `allow`: nur diese IDs berücksichtigen (Vorfilter; darf keine Tombstones enthalten).
+        """
+        q = np.ascontiguousarray(q, dtype="float32").reshape(-1, self.dim)
+        if self.fetch is not None and quant_of(self.index) is not None:
+            return self._search_rerank(q, k, nprobe, ef_search, allow)
+        return self._search(q, k, nprobe, ef_search, allow)
+
+    def _search_rerank(self, q, k, nprobe, ef_search, allow) -> Tuple[np.ndarray, np.ndarray]:
+        """Komprimierte Suche mit k * rerank Kandidaten, dann exakte Scores aus den Originalvektoren."""
+        D, I = self._search(q, k * self.rerank, nprobe, ef_search, allow)
+        worst = -np.finfo("float32").max if self.metric == "ip" else np.finfo("float32").max
+        out_d = np.full((len(q), k), worst, dtype="float32")
+        out_i = np.full((len(q), k), -1, dtype="int64")
+        for row in range(len(q)):
+            ids = I[row][I[row] >= 0]
+            if not len(ids):
+                continue
+            vecs = self.fetch(ids)
+            if self.metric == "ip":
+                exact = vecs @ q[row]
+                top = np.argsort(-exact, kind="stable")[:k]
+            else:
+                exact = np.einsum("ij,ij->i", vecs - q[row], vecs - q[row])
+                top = np.argsort(exact, kind="stable")[:k]
+            out_d[row, :len(top)] = exact[top]
+            out_i[row, :len(top)] = ids[top]
+        return out_d, out_i
+
+    def _search(self, q, k, nprobe, ef_search, allow) -> Tuple[np.ndarray, np.ndarray]:
+        with self._lock.read:
+            index = self.index
+            base = _base(index)
+            if allow is not None:
+                sel = faiss.IDSelectorBatch(_ids(allow))
+            else:
+                if self.dead and self._selector is None:
+                    self._selector = faiss.IDSelectorNot(faiss.IDSelectorBatch(_ids(self.dead)))
+                sel = self._selector if self.dead else None
+            if isinstance(base, faiss.IndexIVF):
+                params = faiss.SearchParametersIVF(nprobe=nprobe or self.nprobe, sel=sel)
+            elif isinstance(base, faiss.IndexHNSW):
+                params = faiss.SearchParametersHNSW(efSearch=ef_search or self.ef_search, sel=sel)
+            else:
+                params = faiss.SearchParameters(sel=sel) if sel is not None else None
+            if params is not None:
+                return index.search(q, k, params=params)
+            return index.search(q, k)
+
+    # -----------------------------
+    # Persistenz
+    # -----------------------------
+    def serialize(self) -> bytes:
+        """Index + Tombstone-Menge (Header: Anzahl, dann int64-IDs)."""
+        with self._lock.read:
+            self.swapped = False
+            dead = _ids(sorted(self.dead))
+            return struct.pack("<q", len(dead)) + dead.tobytes() + faiss.serialize_index(self.index).tobytes()
+
+    def load(self, data: bytes, meta: Optional[dict] = None) -> bool:
+        """Übernimmt einen gespeicherten Index; `meta` stammt aus dem Manifest.
+        Gibt False zurück, wenn die Metrik nicht passt (Aufrufer baut dann neu auf).
+        """
+        (n_dead,) = struct.unpack_from("<q", data, 0)
+        dead = np.frombuffer(data, dtype="int64", count=n_dead, offset=8)
+        index = faiss.deserialize_index(np.frombuffer(data, dtype="uint8", offset=8 + 8 * n_dead))
+        if index.metric_type != self._faiss_metric:
+            return False
+        base = _base(index)
+        if isinstance(base, faiss.IndexIVF):
+            base.nprobe = self.nprobe
+        elif isinstance(base, faiss.IndexHNSW):
+            base.hnsw.efSearch = self.ef_search
+        self.index = index
+        self.dead = set(dead.tolist())
+        self._selector = None
+        self.trained_size = int((meta or {}).get("trained_size", index.ntotal))
+        return True
+
+    def manifest_entry(self) -> dict:
+        return {
+            "mode": mode_of(self.index),
+            "metric": self.metric,
+            "quantize": quant_of(self.index),
+            "config_mode": self.mode,
+            "ann_kind": self.ann_kind,
+            "trained_size": self.trained_size,
+            "nprobe": self.nprobe,
+            "ef_search": self.ef_search,
+            "tombstones": len(self.dead),
+        }
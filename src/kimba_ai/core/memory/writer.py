@@ -0,0 +1,124 @@
+# writer.py
+# Write-behind-Persistenz für das Langzeitgedächtnis
+# - Schreib-Operationen landen in einer Queue, ein Hintergrund-Thread committet sie gruppenweise
+# - Durability-Modi:
+#     sync    -> kein Thread, der Aufrufer persistiert selbst (bisheriges Verhalten)
+#     batched -> Group Commit: Aufrufer wartet, bis "seine" Gruppe geschrieben ist
+#     async   -> Aufrufer wartet nicht; Commit nach Größe (batch_size) oder Zeit (interval)
+# - flush() wartet auf alle bisher eingereichten Operationen, close() beendet den Thread
+
+import threading
+from typing import Callable, List, Optional
+
+DURABILITY_MODES = ("sync", "batched", "async")
+FLUSH_BATCH    = 256   # Operationen pro Gruppe, ab der sofort committet wird
+FLUSH_INTERVAL = 0.05  # Sekunden: spätestens dann wird eine angefangene Gruppe committet
+
+
+class WriteBehind:
+    """Sammelt Operationen und übergibt sie gruppenweise an `commit(ops)` (im Hintergrund-Thread).
+
+    `commit` wird auch ohne Operationen aufgerufen (Leerlauf), damit z.B. ein fsync-Intervall
+    eingehalten werden kann. Ein Fehler beim Commit wird beim nächsten wait()/flush()/close() einmal
+    erneut geworfen (danach läuft der Writer normal weiter).
+    """
+
+    def __init__(
+        self,
+        commit: Callable[[List[tuple]], None],
+        mode: str = "async",
+        batch_size: int = FLUSH_BATCH,
+        interval: float = FLUSH_INTERVAL
+    ):
+        if mode not in ("batched", "async"):
+            raise ValueError(f"WriteBehind braucht mode 'batched' oder 'async', nicht: {mode}")
+        self.commit = commit
+        self.mode = mode
+        self.batch_size = batch_size
+        self.interval = interval
+
+        self._ops: List[tuple] = []
+        self._cond = threading.Condition()
+        self._submitted = 0      # Tickets: laufende Nummer je Operation
+        self._committed = 0
+        self._flush_requested = False
+        self._closed = False
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name="kimba-write-behind", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        return self._submitted - self._committed
+
+    def submit(self, op: tuple) -> int:
+        """Reiht eine Operation ein; im Modus "batched" erst nach deren Commit zurück."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("WriteBehind ist bereits geschlossen")
+            self._ops.append(op)
+            self._submitted += 1
+            ticket = self._submitted
+            if self.mode == "batched" or len(self._ops) >= self.batch_size:
+                self._cond.notify_all()
+        if self.mode == "batched":
+            self.wait(ticket)
+        return ticket
+
+    def wait(self, ticket: Optional[int] = None, timeout: Optional[float] = None) -> bool:
+        """Wartet, bis alle Operationen bis `ticket` (Standard: alle eingereichten) committet sind."""
+        with self._cond:
+            target = self._submitted if ticket is None else ticket
+            done = self._cond.wait_for(lambda: self._committed >= target or self._error is not None, timeout)
+            self._raise_error()
+            return done
+
+    def _raise_error(self):
+        """Gespeicherten Commit-Fehler einmal melden (unter _cond bzw. nach Thread-Ende)."""
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Committet sofort alles Eingereichte und wartet darauf."""
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+        return self.wait(timeout=timeout)
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._raise_error()
+
+    def _ready(self) -> bool:
+        if self._closed or self._flush_requested:
+            return True
+        if self.mode == "batched":
+            return bool(self._ops)  # Group Commit: alles, was sich während des letzten Commits angesammelt hat
+        return len(self._ops) >= self.batch_size
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(self._ready, timeout=self.interval)
+                ops, self._ops = self._ops, []
+                self._flush_requested = False
+                closing = self._closed
+            error = None
+            try:
+                self.commit(ops)
+            except BaseException as e:
+                print(f"[WARN] Write-behind Commit fehlgeschlagen: {e}")
+                error = e
+            with self._cond:
+                if error is not None:
+                    self._error = error
+                self._committed += len(ops)
+                self._cond.notify_all()
+                if closing and not self._ops:
+                    return
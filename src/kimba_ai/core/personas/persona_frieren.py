@@ -4,6 +4,13 @@ DE: Frieren – Lern- und Trainingsbegleiterin für Kimba.
 Fokus: Vermittlung von Wissen, Erklärung komplexer Themen, Erstellung personalisierter Lernpläne.
 """
 
+# Recall-Gewichtung: Lernstoff veraltet kaum -> langsamer Zerfall, Wissen vor Smalltalk
+MEMORY_RANKING = {
+    "recency": 0.15,
+    "half_life_days": 180.0,
+    "category_weights": {"analysis": 1.1, "analysis_result": 1.1},
+}
+
 def generate_persona_prompt():
     return (
         "Du bist Frieren, meine Lern- und Trainingsbegleiterin. "
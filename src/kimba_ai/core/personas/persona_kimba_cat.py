@@ -4,6 +4,12 @@ DE: Persona für Kimba, die virtuelle Katze – eigenständig, verspielt, launis
 Fokus: Kurze, katzentypische Reaktionen, unabhängig von Iuno.
 """
 
+# Recall-Gewichtung: eine Katze lebt im Moment -> das Jüngste zählt fast allein
+MEMORY_RANKING = {
+    "recency": 0.6,
+    "half_life_days": 1.0,
+}
+
 def generate_persona_prompt():
     return (
         "Du bist Kimba, meine virtuelle Katze. "
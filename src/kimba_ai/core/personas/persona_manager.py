@@ -1,6 +1,8 @@
 import importlib
 import os
 
+from src.kimba_ai.core.memory.ranking import RankingProfile, DEFAULT_RANKING
+
 # Speicherort aller Personas
 PERSONA_DIR = "src/kimba_ai/core/personas"
 
@@ -33,6 +35,7 @@ class PersonaManager:
         self.active_persona_name = None
         self.active_persona = None
         self.cat_persona = None
+        self.rankings = {}  # Persona-Modul -> RankingProfile (optional MEMORY_RANKING im Modul)
 
         self.load_persona(DEFAULT_PERSONA)
 
@@ -47,6 +50,7 @@ class PersonaManager:
             module = importlib.import_module(module_path)
             persona_prompt = module.generate_persona_prompt()
             self.personas[persona_module_name] = persona_prompt
+            self.rankings[persona_module_name] = RankingProfile.from_dict(getattr(module, "MEMORY_RANKING", None))
             self.active_persona_name = persona_module_name
             self.active_persona = persona_prompt
             print(f"[PersonaManager] ✅ Hauptpersona geladen: {persona_module_name}")
@@ -74,6 +78,10 @@ class PersonaManager:
     def get_cat_prompt(self):
         return self.cat_persona
 
+    def get_memory_ranking(self):
+        """Ranking-Gewichte für den Recall der aktiven Persona (Standard, falls nicht definiert)."""
+        return self.rankings.get(self.active_persona_name, DEFAULT_RANKING)
+
     def get_persona_prompt(self, name: str):
         return self.personas.get(name)
 
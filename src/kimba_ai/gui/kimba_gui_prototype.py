@@ -253,28 +253,11 @@ class KimbaV3App(QWidget):
             importance=0
         )
 
-        # 2) Recall relevant memories
-        memory_hits = []
-        try:
-            hits = self.memory_manager.recall(user_text, limit=3)
-            for sim, mem in hits:
-                txt = mem.get("text", "")
-                cat = mem.get("category", "general")
-                prj = mem.get("project") or ""
-                memory_hits.append(f"- {txt} ({cat}{', ' + prj if prj else ''}; rel: {sim:.2f})")
-        except Exception as e:
-            memory_hits.append(f"[Memory recall error: {e}]")
-
-        # 3) Build augmented prompt
-        augmented = user_text
-        if memory_hits:
-            augmented = "[Memories]\n" + "\n".join(memory_hits) + f"\n\n[User]\n{user_text}"
-
-        # 4) Ask the active persona
-        response = self.llm.ask_persona(self.active_persona, augmented)
+        # 2) Ask the active persona - the router recalls memories once (threshold + persona ranking)
+        response = self.llm.ask_persona(self.active_persona, user_text)
         self.add_message(self.active_persona, response)
 
-        # 5) Save persona reply
+        # 3) Save persona reply
         self.memory_manager.remember(
             speaker="persona",
             text=response,
@@ -293,17 +276,8 @@ class KimbaV3App(QWidget):
                     "Verbesserungen und Clean-Code-Punkte:\n\n" + content
                 )
 
-                # Recall for analysis request too
-                memory_hits = []
-                try:
-                    hits = self.memory_manager.recall(prompt, limit=3)
-                    for sim, mem in hits:
-                        memory_hits.append(f"- {mem.get('text','')} (rel: {sim:.2f})")
-                except Exception:
-                    pass
-
-                augmented = prompt if not memory_hits else "[Memories]\n" + "\n".join(memory_hits) + "\n\n" + prompt
-                response = self.llm.ask_persona(self.active_persona, augmented)
+                # Recall for analysis request too (in the router, with threshold + persona ranking)
+                response = self.llm.ask_persona(self.active_persona, prompt)
                 self.add_message(self.active_persona, f"📊 Analyse von {os.path.basename(self.current_file_path)}:\n\n{response}")
 
                 # Save analysis request + result (mark a bit more important)
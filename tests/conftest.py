@@ -0,0 +1,57 @@
+# conftest.py
+# Gemeinsame Test-Hilfen: Repo-Wurzel in sys.path (Importe als src.kimba_ai...), Stores mit dem
+# Hashing-Embedder (kein Modell-Download) in einem temporären Verzeichnis, Arbeitsverzeichnis für die
+# relativen Standardpfade (memory/, memory/sessions)
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.kimba_ai.core.memory.longterm import LongTermMemory  # noqa: E402
+from src.kimba_ai.core.memory.embedders import HashingEmbedder  # noqa: E402
+from src.kimba_ai.core.memory import session  # noqa: E402
+
+
+class CountingEmbedder(HashingEmbedder):
+    """Hashing-Embedder, der seine Aufrufe mitschreibt (Anzahl Texte je encode())."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def encode(self, texts, batch_size=64):
+        self.calls.append(len(texts))
+        return super().encode(texts, batch_size)
+
+
+@pytest.fixture
+def counting_embedder():
+    return CountingEmbedder()
+
+
+@pytest.fixture
+def make_store(tmp_path):
+    """Fabrik für LongTermMemory-Instanzen in tmp_path; alle werden am Testende geschlossen."""
+    stores = []
+
+    def make(**options):
+        options.setdefault("memory_dir", str(tmp_path / "memory"))
+        options.setdefault("embedder", "hashing")
+        store = LongTermMemory(**options)
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        store.close()
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """tmp_path als Arbeitsverzeichnis, mit memory/sessions (Session-Dateien, MemoryManager)."""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(session.SESSION_DIR, exist_ok=True)
+    return tmp_path
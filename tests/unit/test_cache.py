@@ -0,0 +1,63 @@
+# Tests: Query-Embedding- und Ergebnis-Cache (cache.py, LongTermMemory.semantic_search)
+
+from src.kimba_ai.core.memory import cache
+from src.kimba_ai.core.memory.cache import LRUCache, normalize_query
+
+
+def test_lru_evicts_least_recently_used():
+    lru = LRUCache(2)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    assert lru.get("a") == 1
+    lru.put("c", 3)
+    assert lru.get("b") is None and lru.get("a") == 1 and lru.get("c") == 3
+    assert lru.stats() == {"size": 2, "hits": 3, "misses": 1}
+
+
+def test_ttl_expires_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    lru = LRUCache(4, ttl=30.0)
+    lru.put("q", "treffer")
+    now[0] += 29.0
+    assert lru.get("q") == "treffer"
+    now[0] += 2.0
+    assert lru.get("q") is None and len(lru) == 0
+
+
+def test_zero_size_disables_the_cache():
+    lru = LRUCache(0)
+    lru.put("a", 1)
+    assert lru.get("a") is None
+
+
+def test_normalize_query_only_touches_whitespace():
+    assert normalize_query("  Wo ist\tmein   Hund? ") == "Wo ist mein Hund?"
+
+
+def test_repeated_recall_encodes_once(make_store, counting_embedder):
+    store = make_store(embedder=counting_embedder)
+    store.add_memories([f"cache eintrag {i}" for i in range(5)])
+    counting_embedder.calls.clear()
+
+    first = store.semantic_search("cache eintrag 2", 3)
+    assert store.semantic_search("cache  eintrag 2 ", 3) == first
+    assert store.semantic_search("cache eintrag 2", 3, min_score=0.99) == first[:1]  # gleicher Eintrag
+    assert counting_embedder.calls == [1]
+    stats = store.cache_stats()
+    assert stats["embeddings"]["misses"] == 1 and stats["embeddings"]["hits"] == 0  # Ergebnis-Treffer: kein Lookup
+    assert stats["results"]["misses"] == 1 and stats["results"]["hits"] == 2
+
+
+def test_writes_invalidate_results_but_keep_embeddings(make_store, counting_embedder):
+    store = make_store(embedder=counting_embedder)
+    store.add_memories(["alter eintrag"])
+    store.semantic_search("neuer eintrag", 1)
+    store.add_memory("neuer eintrag")
+    counting_embedder.calls.clear()
+
+    assert store.semantic_search("neuer eintrag", 1)[0][1]["text"] == "neuer eintrag"
+    assert counting_embedder.calls == []  # Query-Embedding aus dem Cache
+    uid = store.semantic_search("neuer eintrag", 1)[0][1]["uuid"]
+    store.delete_memory(uid)
+    assert store.semantic_search("neuer eintrag", 1)[0][1]["text"] == "alter eintrag"
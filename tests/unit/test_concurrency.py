@@ -0,0 +1,177 @@
+# Tests: Leser/Schreiber-Sperre und LongTermMemory unter Nebenläufigkeit (user-018)
+# - Belastungstest: N Threads suchen (semantisch, hybrid, lexikalisch), fügen hinzu und löschen
+#   gleichzeitig, während im Hintergrund kompaktiert wird; jedes Ergebnis muss einen konsistenten
+#   Stand zeigen, danach (und nach erneutem Öffnen) müssen die Invarianten des Stores gelten
+# - Laufzeit je Variante: KIMBA_STRESS_SECONDS (Standard 1.5 s) - für längere Läufe per Umgebung erhöhen
+
+import os
+import time
+import random
+import threading
+import traceback
+from collections import Counter
+
+import pytest
+
+from src.kimba_ai.core.memory.rwlock import RWLock
+
+STRESS_SECONDS = float(os.environ.get("KIMBA_STRESS_SECONDS", "1.5"))
+SEED_MEMORIES = 1_000
+PINNED = 100  # werden nie gelöscht -> jede Suche nach ihrem Text muss sie selbst finden
+THREADS = {"search": 4, "add": 2, "delete": 2, "misc": 1}
+
+
+def _text(i: int) -> str:
+    return f"eintrag {i} thema{i % 97} datei_{i}.py"
+
+
+class Stress:
+    def __init__(self, mem, pinned: dict, seconds: float):
+        self.mem = mem
+        self.pinned = pinned  # Text -> uuid
+        self.deadline = time.monotonic() + seconds
+        self.ops = Counter()
+        self.errors = []
+        self.next_id = SEED_MEMORIES
+        self.id_lock = threading.Lock()
+
+    def _fail(self, msg: str):
+        self.errors.append(msg)
+
+    def _run(self, name: str, step):
+        rng = random.Random(name)
+        try:
+            while time.monotonic() < self.deadline and len(self.errors) < 20:
+                step(rng)
+                self.ops[name.split("#")[0]] += 1
+        except Exception:
+            self._fail(f"{name}: {traceback.format_exc()}")
+
+    def search(self, rng):
+        text, uid = rng.choice(list(self.pinned.items()))
+        kind = rng.randrange(3)
+        if kind == 0:
+            hits = self.mem.semantic_search(text, limit=5)
+        elif kind == 1:
+            hits = self.mem.hybrid_search(text, limit=5, lexical_only=False)
+        else:
+            hits = self.mem.lexical_search(text.split()[-1], limit=5)
+        for score, m in hits:
+            if m is None or not m.get("text"):
+                self._fail(f"search: unvollständiger Treffer {m!r}")
+        scores = [s for s, _ in hits]
+        if scores != sorted(scores, reverse=True):
+            self._fail(f"search: nicht absteigend sortiert {scores}")
+        if kind == 0 and (not hits or hits[0][1]["uuid"] != uid or hits[0][0] < 0.999):
+            self._fail(f"search: '{text}' findet sich nicht selbst: {[(s, m['text']) for s, m in hits[:2]]}")
+        if self.mem.get_memory(uid) is None:
+            self._fail(f"get_memory: gepinnter Eintrag {uid} fehlt")
+
+    def add(self, rng):
+        with self.id_lock:
+            start = self.next_id
+            self.next_id += rng.randint(1, 16)
+            stop = self.next_id
+        self.mem.add_memories([_text(i) for i in range(start, stop)])
+
+    def delete(self, rng):
+        victims = [m["uuid"] for m in self.mem.recent(limit=20) if m["text"] not in self.pinned]
+        if victims:
+            self.mem.delete_memories(rng.sample(victims, min(len(victims), rng.randint(1, 4))))
+
+    def misc(self, rng):
+        if self.mem.stats()["count_memories"] < PINNED:
+            self._fail("stats: weniger Einträge als gepinnt")
+
+    def run(self):
+        threads = [
+            threading.Thread(target=self._run, args=(f"{kind}#{i}", getattr(self, kind)), daemon=True)
+            for kind, n in THREADS.items() for i in range(n)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(STRESS_SECONDS + 60)
+            assert not t.is_alive(), "Thread hängt (Deadlock?)"
+
+
+def _invariants(mem, label: str) -> list:
+    """Lookups, Index und Metadaten müssen denselben Bestand beschreiben."""
+    problems = []
+    live = [m for m in mem.memories if m is not None]
+    if len(live) != len(mem._pos):
+        problems.append(f"{label}: {len(live)} lebende Einträge, aber {len(mem._pos)} UUID-Lookups")
+    if mem.index.live != len(live):
+        problems.append(f"{label}: Index enthält {mem.index.live} lebende Vektoren, Store {len(live)}")
+    for rid, pos in mem._rid_pos.items():
+        if mem.memories[pos] is None or mem.memories[pos]["rid"] != rid:
+            problems.append(f"{label}: rid {rid} zeigt auf falsche Position {pos}")
+            break
+    return problems
+
+
+@pytest.mark.parametrize("backend,durability", [
+    ("segments", "sync"), ("segments", "async"), ("sqlite", "sync"),
+])
+def test_parallel_search_add_delete_stays_consistent(make_store, tmp_path, backend, durability):
+    memory_dir = str(tmp_path / f"{backend}-{durability}")
+    mem = make_store(
+        memory_dir=memory_dir, backend=backend, durability=durability,
+        compact_ratio=0.05  # häufige Hintergrund-Kompaktierungen während der Last
+    )
+    uids = mem.add_memories([_text(i) for i in range(SEED_MEMORIES)])
+    stress = Stress(mem, {_text(i): uids[i] for i in range(PINNED)}, STRESS_SECONDS)
+    stress.run()
+
+    mem.close()  # wartet auf Kompaktierung/Index-Migration
+    errors = stress.errors + _invariants(mem, "nach Last")
+    assert stress.ops["search"] and stress.ops["add"] and stress.ops["delete"]
+
+    reopened = make_store(memory_dir=memory_dir, backend=backend)
+    errors += _invariants(reopened, "nach Neustart")
+    if len(reopened._pos) != len(mem._pos):
+        errors.append(f"nach Neustart: {len(reopened._pos)} statt {len(mem._pos)} Einträgen")
+    assert not errors, "\n".join(errors[:20])
+
+
+def test_rwlock_readers_share_writers_exclude():
+    lock = RWLock()
+    inside, peak = [0], [0]
+    guard = threading.Lock()
+
+    def reader():
+        with lock.read:
+            with guard:
+                inside[0] += 1
+                peak[0] = max(peak[0], inside[0])
+            time.sleep(0.05)
+            with guard:
+                inside[0] -= 1
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert peak[0] > 1
+
+    order = []
+    with lock.write:
+        t = threading.Thread(target=lambda: (lock.acquire_read(), order.append("reader"), lock.release_read()))
+        t.start()
+        time.sleep(0.05)
+        order.append("writer")
+    t.join()
+    assert order == ["writer", "reader"]
+
+
+def test_rwlock_reentrancy_and_no_upgrade():
+    lock = RWLock()
+    with lock.write:
+        with lock.write:
+            with lock.read:  # der Schreiber darf lesen
+                pass
+    with lock.read:
+        with lock.read:
+            with pytest.raises(RuntimeError):
+                lock.acquire_write()
@@ -0,0 +1,84 @@
+# Tests: Near-Duplikate beim Einfügen (dedupe.py, LongTermMemory(dedupe=...))
+
+import pytest
+
+from src.kimba_ai.core.memory.dedupe import DedupePolicy, MinHashLSH
+
+BASE = "Ich trinke morgens gern Kaffee mit Milch"
+LONG = " ".join(f"Kapitel {i} erzählt von Kimba und dem langen Weg durch den Wald." for i in range(12))
+
+
+def _live(store):
+    return [m for m in store.memories if m is not None]
+
+
+def test_vector_near_duplicate_is_merged(make_store):
+    store = make_store(dedupe={})
+    assert store.add_memory(BASE, timestamp=1000)
+    assert not store.add_memory(BASE + "!", timestamp=2000, importance=2)  # anderer Fingerprint, gleicher Vektor
+    (m,) = _live(store)
+    assert (m["seen"], m["last_seen"], m["importance"], m["timestamp"]) == (2, 2000, 2, 1000)
+    assert store.add_memory("Völlig anderes Thema: Steuererklärung")
+
+
+def test_scope_separates_projects_and_categories(make_store):
+    store = make_store(dedupe={})
+    store.add_memory(BASE, project="a")
+    assert store.add_memory(BASE + "!", project="b")
+    assert store.add_memory(BASE + "?", project="a", category="code")
+    assert len(_live(store)) == 3
+
+
+def test_duplicates_within_one_batch_collapse(make_store):
+    store = make_store(dedupe={})
+    uuids = store.add_memories([BASE, "etwas ganz anderes", BASE + "!", BASE + "?"])
+    assert uuids[0] and uuids[1] and uuids[2] is None and uuids[3] is None
+    assert store.get_memory(uuids[0])["seen"] == 3
+
+
+def test_merges_survive_reopen_and_compaction(make_store):
+    store = make_store(dedupe={})
+    store.add_memory(BASE)
+    store.add_memory(BASE + "!")
+    store.close()
+    reopened = make_store(dedupe={})
+    assert _live(reopened)[0]["seen"] == 2
+    reopened.add_memory(BASE + "?")
+    reopened.compact()
+    assert _live(reopened)[0]["seen"] == 3
+    reopened.close()
+    assert _live(make_store())[0]["seen"] == 3
+
+
+def test_long_texts_use_minhash_without_encoding(make_store, counting_embedder):
+    store = make_store(embedder=counting_embedder, dedupe={"threshold": None})
+    assert store.add_memory(LONG)
+    calls = len(counting_embedder.calls)
+    assert not store.add_memory(LONG.replace("Kapitel 7", "Kapitel sieben"))
+    assert len(counting_embedder.calls) == calls and _live(store)[0]["seen"] == 2
+    assert store.add_memory(" ".join(reversed(LONG.split())))  # gleiche Wörter, andere Shingles
+
+
+def test_without_dedupe_near_duplicates_are_kept(make_store):
+    store = make_store()
+    store.add_memories([BASE, BASE + "!"])
+    assert len(_live(store)) == 2
+
+
+def test_policy_validation():
+    assert DedupePolicy.from_dict({"threshold": 0.9}).threshold == 0.9
+    with pytest.raises(ValueError):
+        DedupePolicy.from_dict({"treshold": 0.9})
+    with pytest.raises(ValueError):
+        DedupePolicy(threshold=1.5)
+    assert not DedupePolicy(min_chars=10).use_minhash("kurz")
+
+
+def test_minhash_lsh_candidates_and_removal():
+    lsh = MinHashLSH()
+    lsh.add(1, lsh.signature(LONG))
+    sig = lsh.signature(LONG + " Ende.")
+    assert [rid for _, rid in lsh.candidates(sig, 0.8)] == [1]
+    lsh.remove(1)
+    assert lsh.candidates(sig, 0.8) == [] and len(lsh) == 0 and not lsh.buckets
+    assert lsh.signature("!!!") is None
@@ -0,0 +1,140 @@
+# Tests: Micro-Batching-Dienst für Embeddings (embed_service.py)
+
+import threading
+
+import numpy as np
+import pytest
+
+from src.kimba_ai.core.memory.embed_service import EmbeddingService, shared_service
+from src.kimba_ai.core.memory.embedders import HashingEmbedder
+
+
+class GatedEmbedder(HashingEmbedder):
+    """Schreibt jeden Batch mit; `gate` hält den Encode-Thread an, bis der Test ihn freigibt."""
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.entered = threading.Event()
+        self.fail = False
+
+    def encode(self, texts, batch_size=64):
+        self.batches.append(list(texts))
+        self.entered.set()
+        self.gate.wait(5)
+        if self.fail:
+            raise RuntimeError("Modell kaputt")
+        return super().encode(texts, batch_size)
+
+
+@pytest.fixture
+def gated():
+    return GatedEmbedder()
+
+
+@pytest.fixture
+def make_service():
+    services = []
+
+    def make(embedder, **options):
+        service = EmbeddingService(embedder, **options)
+        services.append(service)
+        return service
+
+    yield make
+    for service in services:
+        service.close()
+
+
+def _hold(embedder, service):
+    """Encode-Thread in einem ersten Batch festhalten (danach sammelt sich alles für den nächsten)."""
+    embedder.gate.clear()
+    first = service.submit(["blockiert"], "bulk")
+    assert embedder.entered.wait(5)
+    return first
+
+
+def test_concurrent_requests_share_one_forward_pass(gated, make_service):
+    service = make_service(gated, window_ms=200)
+    texts = [f"text {i}" for i in range(10)]
+    futures = [service.submit([t], "interactive") for t in texts]
+    out = np.vstack([f.result(5) for f in futures])
+    assert len(gated.batches) == 1 and sorted(gated.batches[0]) == sorted(texts)
+    assert np.array_equal(out, HashingEmbedder().encode(texts))
+    stats = service.stats()
+    assert stats["batches"] == 1 and stats["batch_size_max"] == 10 and stats["queues"]["interactive"]["requests"] == 10
+
+
+def test_identical_texts_are_encoded_once(gated, make_service):
+    service = make_service(gated, window_ms=200)
+    a = service.submit(["gleich", "anders"])
+    b = service.submit(["gleich"])
+    assert np.array_equal(a.result(5)[0], b.result(5)[0])
+    assert sorted(gated.batches[0]) == ["anders", "gleich"]
+    assert service.stats()["unique_texts"] == 2 and service.stats()["texts"] == 3
+
+
+def test_interactive_requests_overtake_bulk_slices(gated, make_service):
+    service = make_service(gated, window_ms=1, max_batch=4)
+    first = _hold(gated, service)
+    bulk = service.submit([f"bulk {i}" for i in range(12)], "bulk")
+    query = service.submit(["suche"], "interactive")
+    gated.gate.set()
+    first.result(5)
+    assert query.result(5).shape == (1, 384) and bulk.result(5).shape == (12, 384)
+    assert gated.batches[1][0] == "suche"
+    assert all(len(b) <= 4 for b in gated.batches)
+    assert np.array_equal(bulk.result(5), HashingEmbedder().encode([f"bulk {i}" for i in range(12)]))
+
+
+def test_backpressure_blocks_bulk_submits(gated, make_service):
+    service = make_service(gated, window_ms=1, max_pending=4)
+    first = _hold(gated, service)
+    waiting = service.submit([f"w{i}" for i in range(4)], "bulk")
+    with pytest.raises(TimeoutError):
+        service.submit(["zu viel"], "bulk", timeout=0.05)
+    service.submit(["suche"], "interactive")  # interaktiv nie gebremst
+    gated.gate.set()
+    first.result(5), waiting.result(5)
+    assert service.stats()["blocked_submits"] == 1
+
+
+def test_encode_errors_reach_the_callers(gated, make_service):
+    service = make_service(gated, window_ms=1)
+    gated.fail = True
+    with pytest.raises(RuntimeError, match="Modell kaputt"):
+        service.encode(["x"])
+    gated.fail = False
+    assert service.encode(["y"]).shape == (1, 384)  # Dienst läuft weiter
+    assert service.stats()["errors"] == 1
+
+
+def test_close_drains_and_rejects_new_work(gated, make_service):
+    service = make_service(gated, window_ms=1000)
+    pending = service.submit(["noch offen"])
+    service.close()
+    assert pending.result(1).shape == (1, 384)
+    with pytest.raises(RuntimeError):
+        service.submit(["zu spät"])
+    with pytest.raises(ValueError):
+        make_service(gated, max_batch=0)
+
+
+def test_shared_service_is_one_per_config():
+    a = shared_service(HashingEmbedder(seed=77))
+    assert shared_service(HashingEmbedder(seed=77)) is a
+    assert shared_service(HashingEmbedder(seed=78)) is not a
+    assert shared_service(a) is a
+
+
+def test_stores_share_the_batcher(make_store, tmp_path):
+    one = make_store(batching=True, memory_dir=str(tmp_path / "a"))
+    two = make_store(batching=True, memory_dir=str(tmp_path / "b"))
+    assert one.embedder is two.embedder
+    one.add_memories(["eins", "zwei"])
+    two.add_memory("drei")
+    assert two.semantic_search("drei", 1)[0][1]["text"] == "drei"
+    stats = one.cache_stats()["batching"]
+    assert stats["queues"]["bulk"]["requests"] >= 2 and stats["queues"]["interactive"]["requests"] >= 1
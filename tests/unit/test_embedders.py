@@ -0,0 +1,74 @@
+# Tests: austauschbare Embedding-Backends (embedders.py)
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from src.kimba_ai.core.memory.embedders import (
+    HashingEmbedder, ModelEmbedder, OnnxEmbedder, SentenceTransformerEmbedder, make_embedder, load_embedding_config,
+    EMBEDDING_CONFIG, EMBED_DIM
+)
+
+
+def test_hashing_is_deterministic_and_lexical():
+    a, b = HashingEmbedder(), make_embedder("hashing")
+    texts = ["Der Hund spielt im Garten", "der  HUND spielt im garten!", "Aktienkurse steigen"]
+    va, vb = a.encode(texts), b.encode(texts)
+    assert va.shape == (3, EMBED_DIM) and va.dtype == np.float32
+    assert np.array_equal(va, vb)
+    assert np.array_equal(va[0], va[1])  # casefold + nur Wortzeichen
+    assert not np.array_equal(va[0], va[2])
+    assert not a.encode([""]).any()
+
+
+def test_hashing_options_change_the_space():
+    text = ["wort eins wort zwei"]
+    base = HashingEmbedder().encode(text)
+    assert not np.array_equal(HashingEmbedder(seed=3).encode(text), base)
+    assert not np.array_equal(HashingEmbedder(bigrams=False).encode(text), base)
+    assert HashingEmbedder(seed=3).name == "hashing-384-s3"
+    assert HashingEmbedder(dim=64).encode(text).shape == (1, 64)
+
+
+def test_make_embedder_accepts_names_configs_and_objects():
+    assert isinstance(make_embedder({"backend": "hashing", "seed": 2}), HashingEmbedder)
+    custom = HashingEmbedder()
+    assert make_embedder(custom) is custom
+    with pytest.raises(ValueError):
+        make_embedder("word2vec")
+
+
+def test_model_backends_load_lazily():
+    st = make_embedder({"backend": "sentence-transformers", "device": "cpu"})
+    assert isinstance(st, SentenceTransformerEmbedder) and st._model is None
+    onnx = make_embedder({"backend": "onnx", "quantize": None})
+    assert isinstance(onnx, OnnxEmbedder) and onnx._session is None
+    assert onnx.config["quantize"] is None
+    with pytest.raises(ValueError):
+        OnnxEmbedder(quantize="int4")
+
+
+def test_config_file_selects_the_backend(workdir):
+    assert load_embedding_config()["backend"] == "sentence-transformers"  # fehlende Datei
+    os.makedirs(os.path.dirname(EMBEDDING_CONFIG))
+    with open(EMBEDDING_CONFIG, "w", encoding="utf-8") as f:
+        json.dump({"backend": "hashing", "seed": 5}, f)
+    assert make_embedder().name == "hashing-384-s5"
+
+
+def test_model_adapter_wraps_encode_objects():
+    class Stub:
+        def encode(self, texts, batch_size=64, convert_to_numpy=True):
+            return [[1.0] * EMBED_DIM for _ in texts]
+
+    embedder = ModelEmbedder(Stub(), name="stub")
+    assert embedder.encode(["a", "b"]).shape == (2, EMBED_DIM) and embedder.config is None
+
+
+def test_store_rejects_mismatching_dimension(make_store):
+    with pytest.raises(ValueError):
+        make_store(embedder={"backend": "hashing", "dim": 128})
+    store = make_store(embedder={"backend": "hashing", "seed": 4})
+    assert store.model_name == "hashing-384-s4"
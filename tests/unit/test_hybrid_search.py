@@ -0,0 +1,96 @@
+# Tests: BM25-Index und hybride Suche mit Reciprocal Rank Fusion (user-013)
+
+import pytest
+
+from src.kimba_ai.core.memory.lexical_index import LexicalIndex, tokenize, looks_like_identifier
+from src.kimba_ai.core.memory.longterm import RRF_K
+from src.kimba_ai.core.memory.ranking import RankingProfile
+
+NOTES = [
+    "auto_analyzer meldet ModuleNotFoundError in core/memory.py",
+    "code_assistant hat die Funktion load_config umbenannt",
+    "Wir waren heute im Park spazieren und das Wetter war schön",
+    "Der Hund hat im Garten gebellt",
+    "Kimba spricht über Musik und Gitarren",
+]
+
+
+@pytest.fixture
+def store(make_store):
+    store = make_store()
+    store.add_memories([{"text": t, "importance": i % 3} for i, t in enumerate(NOTES)])
+    return store
+
+
+def test_tokenizer_keeps_identifiers_and_their_parts():
+    tokens = tokenize("auto_analyzer ModuleNotFoundError core/memory.py")
+    assert {"auto_analyzer", "auto", "analyzer", "modulenotfounderror", "module", "error",
+            "core/memory.py", "memory", "py"} <= set(tokens)
+    assert looks_like_identifier("auto_analyzer")
+    assert looks_like_identifier("ModuleNotFoundError")
+    assert not looks_like_identifier("wie war das wetter")
+
+
+def test_lexical_index_add_remove():
+    lex = LexicalIndex()
+    lex.add(1, "auto_analyzer läuft")
+    lex.add(2, "code_assistant läuft")
+    assert [rid for _, rid in lex.search("auto_analyzer", 5)] == [1]
+    lex.remove(1, "auto_analyzer läuft")
+    assert lex.search("auto_analyzer", 5) == []
+    assert [rid for _, rid in lex.search("läuft", 5)] == [2]
+
+
+def test_identifier_query_uses_the_lexical_path_on_the_fused_scale(store, monkeypatch):
+    monkeypatch.setattr(store, "_encode_query", lambda q: pytest.fail("Bezeichner-Query ohne Encode erwartet"))
+    hits = store.hybrid_search("auto_analyzer", 3)
+    assert hits[0][1]["text"] == NOTES[0]
+    assert hits[0][0] == pytest.approx(1.0)
+    assert all(0.0 < s <= 1.0 for s, _ in hits)
+
+
+def test_hybrid_scores_are_normalized_rrf(store):
+    hits = store.hybrid_search("Hund Garten", 5, lexical_only=False)
+    assert hits[0][1]["text"] == NOTES[3]
+    assert hits[0][0] == pytest.approx(1.0)  # Platz 1 in beiden Listen
+    assert all(0.0 < s <= 1.0 for s, _ in hits)
+    assert [s for s, _ in hits] == sorted((s for s, _ in hits), reverse=True)
+    # Einträge nur in der Vektorliste (kein BM25-Treffer, Platz >= 2) liegen unter der Hälfte
+    only_vector = [s for s, m in hits if "Hund" not in m["text"] and "Garten" not in m["text"]]
+    assert only_vector and all(s <= (RRF_K + 1) / (2 * (RRF_K + 2)) + 1e-9 for s in only_vector)
+
+
+def test_min_score_applies_to_the_fused_score_in_both_paths(store):
+    assert store.hybrid_search("auto_analyzer", 5, min_score=0.99)[0][1]["text"] == NOTES[0]
+    assert len(store.hybrid_search("auto_analyzer", 5, min_score=0.99)) == 1
+    hybrid = store.hybrid_search("Hund Garten", 5, lexical_only=False, min_score=0.6)
+    assert [m["text"] for _, m in hybrid] == [NOTES[3]]
+
+
+def test_ranking_is_applied_to_hybrid_results(store):
+    boost = RankingProfile(similarity=0.0, recency=0.0, importance=1.0, category_weights={})
+    ranked = store.hybrid_search("Park Hund Garten Musik", 3, lexical_only=False, ranking=boost)
+    importances = [m["importance"] for _, m in ranked]
+    assert importances == sorted(importances, reverse=True)
+
+
+def test_manager_recall_passes_ranking_to_hybrid(store, monkeypatch):
+    from src.kimba_ai.core.memory.manager import MemoryManager
+    seen = {}
+
+    def hybrid_search(query, limit, **kwargs):
+        seen.update(kwargs)
+        return []
+
+    manager = MemoryManager.__new__(MemoryManager)  # ohne Session-Dateien im Arbeitsverzeichnis
+    manager.longterm_memory = store
+    monkeypatch.setattr(store, "hybrid_search", hybrid_search)
+    profile = RankingProfile()
+    manager.recall("auto_analyzer", hybrid=True, ranking=profile, min_score=0.5)
+    assert seen["ranking"] is profile and seen["min_score"] == 0.5
+
+
+def test_lexical_index_follows_deletes(store):
+    uuid = store.hybrid_search("code_assistant", 1)[0][1]["uuid"]
+    store.delete_memory(uuid)
+    assert all(m["uuid"] != uuid for _, m in store.hybrid_search("code_assistant", 5))
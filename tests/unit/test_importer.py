@@ -0,0 +1,158 @@
+# Tests: Streaming-Import externer Texte/Chats (importer.py)
+
+import os
+import json
+import datetime
+
+import pytest
+
+from src.kimba_ai.core.memory import importer
+from src.kimba_ai.core.memory.importer import (
+    read_text, read_jsonl, read_chat, chunk_pieces, import_file, import_paths, load_checkpoint, detect_format
+)
+
+
+def _write(path, text):
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def _texts(store):
+    return [m["text"] for m in store.memories if m is not None]
+
+
+def test_text_and_markdown_readers_split_paragraphs(tmp_path):
+    path = _write(tmp_path / "a.md", "# Titel\nerste zeile\nzweite zeile\n\n\nabsatz zwei\n## Teil\nunter teil\n")
+    assert [t for t, _, _ in read_text(path)] == [
+        "# Titel erste zeile zweite zeile", "absatz zwei ## Teil unter teil"
+    ]
+    pieces = list(read_text(path, markdown=True))
+    assert [t for t, _, _ in pieces] == ["# Titel erste zeile zweite zeile", "absatz zwei", "## Teil unter teil"]
+    # Offsets: Weiterlesen ab dem Offset eines Stücks liefert genau den Rest
+    assert [t for t, _, _ in read_text(path, pieces[1][2], markdown=True)] == ["## Teil unter teil"]
+    assert detect_format(path) == "md" and detect_format("x.log") == "txt"
+
+
+def test_jsonl_reader_takes_text_speaker_and_metadata(tmp_path, capsys):
+    path = _write(tmp_path / "a.jsonl", "\n".join([
+        json.dumps({"role": "user", "content": "hallo", "tags": ["t"], "timestamp": "2024-03-12T18:04:00Z"}),
+        "kaputt{",
+        json.dumps({"text": "ohne sprecher", "category": "notiz", "importance": 1}),
+        json.dumps({"text": "   "}),
+    ]))
+    pieces = list(read_jsonl(path))
+    assert [t for t, _, _ in pieces] == ["user: hallo", "ohne sprecher"]
+    assert pieces[0][1] == {"tags": ["t"], "timestamp": 1710266640}
+    assert pieces[1][1] == {"category": "notiz", "importance": 1}
+    assert "ungültige JSON-Zeile" in capsys.readouterr().out
+
+
+def test_chat_reader_handles_export_formats(tmp_path):
+    path = _write(tmp_path / "chat.txt", "\n".join([
+        "Kopfzeile des Exports",
+        "[12.03.24, 18:04:11] Anna: Hallo",
+        "noch eine zeile",
+        "12.03.24, 18:05 - Ben: Hi Anna",
+        "Carla: ohne datum",
+    ]))
+    pieces = list(read_chat(path))
+    assert [t for t, _, _ in pieces] == [
+        "Kopfzeile des Exports", "Anna: Hallo noch eine zeile", "Ben: Hi Anna", "Carla: ohne datum"
+    ]
+    assert pieces[1][1]["timestamp"] == int(datetime.datetime(2024, 3, 12, 18, 4, 11).timestamp())
+    assert pieces[2][1]["timestamp"] == int(datetime.datetime(2024, 3, 12, 18, 5).timestamp())
+    assert pieces[3][1] == {}
+
+
+def test_chunker_bounds_size_and_overlaps():
+    words = [f"wort{i:03d}" for i in range(300)]
+    pieces = [(" ".join(words[i:i + 10]), {}, (i + 10) * 100) for i in range(0, 300, 10)]
+    chunks = list(chunk_pieces(iter(pieces), size=200, overlap=40))
+    assert all(len(t) <= 200 for t, _, _ in chunks)
+    for (prev, _, _), (cur, _, _) in zip(chunks, chunks[1:]):
+        assert prev.split()[-1] in cur.split()[:6]  # Überlappung mit dem Ende des Vorgängers
+    assert {w for t, _, _ in chunks for w in t.split()} == set(words)
+    assert chunks[-1][2] == 30_000
+    with pytest.raises(ValueError):
+        list(chunk_pieces(iter(pieces), size=100, overlap=100))
+
+
+def test_chunker_keeps_metadata_groups_apart_and_splits_long_text():
+    pieces = [("a " * 10, {"project": "x"}, 1), ("b " * 10, {"project": "y"}, 2),
+              ("Satz eins. " * 40, {}, 3)]
+    chunks = list(chunk_pieces(iter(pieces), size=120, overlap=20))
+    assert chunks[0][1] == {"project": "x"} and "b" not in chunks[0][0]
+    assert chunks[1][1] == {"project": "y"} and "a" not in chunks[1][0].split()
+    long_parts = chunks[2:]
+    assert len(long_parts) > 1 and all(len(t) <= 120 for t, _, _ in long_parts)
+
+
+def test_import_file_commits_chunks_with_defaults(make_store, tmp_path):
+    store = make_store()
+    path = _write(tmp_path / "notes.txt", "\n\n".join(f"absatz nummer {i} " * 5 for i in range(50)))
+    reports = []
+    state = import_file(store, path, project="buch", tags=["import"], chunk_size=300, overlap=50,
+                        batch_size=4, progress=reports.append)
+    assert state["done"] and state["offset"] == os.path.getsize(path)
+    assert state["imported"] == state["chunks"] == len(_texts(store)) > 4
+    m = store.memories[0]
+    assert (m["category"], m["project"], m["tags"]) == ("import", "buch", ["import"])
+    assert reports[-1] is state
+    # zweiter Lauf: Checkpoint sagt "fertig" -> nichts doppelt
+    again = import_file(store, path, progress=None)
+    assert again["imported"] == state["imported"] and len(_texts(store)) == state["imported"]
+
+
+def test_interrupted_import_resumes_after_the_last_commit(make_store, tmp_path, monkeypatch):
+    monkeypatch.setattr(importer, "CHECKPOINT_EVERY", 0.0)
+    store = make_store()
+    path = _write(tmp_path / "chat.jsonl", "\n".join(json.dumps({"text": f"nachricht {i}"}) for i in range(40)))
+    original = store.add_memories
+    calls = []
+
+    def failing(items, **kw):
+        calls.append(len(items))
+        if len(calls) == 3:
+            raise RuntimeError("abgebrochen")
+        return original(items, **kw)
+
+    monkeypatch.setattr(store, "add_memories", failing)
+    with pytest.raises(RuntimeError):
+        import_file(store, path, chunk_size=20, overlap=0, batch_size=5, progress=None)
+    assert load_checkpoint(store.memory_dir, path)["imported"] == 10
+
+    monkeypatch.setattr(store, "add_memories", original)
+    state = import_file(store, path, chunk_size=20, overlap=0, batch_size=5, progress=None)
+    assert state["done"] and state["imported"] == 40
+    assert sorted(_texts(store)) == sorted(f"nachricht {i}" for i in range(40))
+
+
+def test_changed_file_discards_the_checkpoint(make_store, tmp_path, capsys):
+    store = make_store()
+    path = _write(tmp_path / "a.txt", "erste fassung")
+    import_file(store, path, progress=None)
+    _write(tmp_path / "a.txt", "zweite fassung")
+    state = import_file(store, path, progress=None)
+    assert "Checkpoint verworfen" in capsys.readouterr().out
+    assert state["imported"] == 1 and sorted(_texts(store)) == ["erste fassung", "zweite fassung"]
+
+
+def test_import_paths_walks_directories(make_store, tmp_path):
+    store = make_store()
+    folder = tmp_path / "daten"
+    (folder / "sub").mkdir(parents=True)
+    _write(folder / "a.txt", "text a")
+    _write(folder / "sub" / "b.md", "# text b")
+    _write(folder / "ignoriert.bin", "binär")
+    results = import_paths(store, [str(folder)], progress=None)
+    assert len(results) == 2 and sorted(_texts(store)) == ["# text b", "text a"]
+
+
+def test_worker_processes_produce_the_same_vectors(make_store, tmp_path):
+    path = _write(tmp_path / "w.txt", "\n\n".join(f"worker absatz {i}" for i in range(12)))
+    inline = make_store(memory_dir=str(tmp_path / "inline"))
+    pooled = make_store(memory_dir=str(tmp_path / "pooled"))
+    import_file(inline, path, chunk_size=30, overlap=0, batch_size=4, progress=None)
+    import_file(pooled, path, chunk_size=30, overlap=0, batch_size=4, workers=1, progress=None)
+    assert _texts(pooled) == _texts(inline)
+    assert abs(inline.embeddings - pooled.embeddings).max() < 1e-6
@@ -0,0 +1,122 @@
+# Tests: SQLite-Backend des LongTermMemory (user-010)
+
+import hashlib
+import sqlite3
+
+import numpy as np
+
+from src.kimba_ai.core.memory.longterm import LongTermMemory, SHIPPED_DB, EMBED_DIM
+from src.kimba_ai.core.memory.segments import unpack_index
+from src.kimba_ai.core.memory.sqlite_store import SQLiteMemoryStore
+
+NEAR = "Kimba trinkt morgens gern einen Kaffee mit Hafermilch"
+
+
+def _sha(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def test_shipped_db_is_imported_once_and_left_unchanged(make_store, tmp_path):
+    before = _sha(SHIPPED_DB)
+    db_path = str(tmp_path / "kimba.db")
+    store = make_store(backend="sqlite", db_path=db_path, seed_db=SHIPPED_DB)
+
+    assert store.stats()["count_memories"] == 21
+    assert store.semantic_search("hallo iuno", 1)[0][1]["text"] == "hallo iuno"
+    assert _sha(SHIPPED_DB) == before
+
+    # 1536-D-Embeddings der Vorlage wurden in der Kopie durch 384-D ersetzt
+    with sqlite3.connect(db_path) as conn:
+        sizes = {len(blob) for (blob,) in conn.execute("SELECT embedding FROM memories")}
+    assert sizes == {EMBED_DIM * 4}
+
+    assert store.add_memory("neuer eintrag nach dem import")
+    store.close()
+    reopened = make_store(backend="sqlite", db_path=db_path, seed_db=SHIPPED_DB)  # keine zweite Kopie
+    assert reopened.stats()["count_memories"] == 22
+
+
+def test_without_seed_the_database_starts_empty(make_store, tmp_path):
+    store = make_store(backend="sqlite")
+    assert store.stats()["count_memories"] == 0
+    assert store.stats()["paths"]["db"] == str(tmp_path / "memory" / "longterm_memories.db")
+
+
+def test_refresh_loads_rows_written_by_another_instance(make_store, tmp_path):
+    db_path = str(tmp_path / "shared.db")
+    reader = make_store(backend="sqlite", db_path=db_path, memory_dir=str(tmp_path / "a"))
+    writer = make_store(backend="sqlite", db_path=db_path, memory_dir=str(tmp_path / "b"))
+    writer.add_memories([f"eintrag nummer {i}" for i in range(5)])
+
+    assert reader.refresh() == 5
+    assert reader.refresh() == 0
+    assert reader.semantic_search("eintrag nummer 3", 1)[0][1]["text"] == "eintrag nummer 3"
+
+
+def test_recent_and_categories_come_from_sql(make_store):
+    store = make_store(backend="sqlite")
+    store.add_memories([
+        {"text": f"notiz {i}", "category": "code" if i % 2 else "chat", "timestamp": 1_700_000_000 + i}
+        for i in range(6)
+    ])
+    assert store.stats()["categories"] == {"code": 3, "chat": 3}
+    assert [m["text"] for m in store.recent(2, category="code")] == ["notiz 5", "notiz 3"]
+
+
+def test_delete_removes_rows_and_vectors_stay_aligned(make_store):
+    store = make_store(backend="sqlite")
+    uuids = store.add_memories([f"text {i}" for i in range(10)])
+    assert store.delete_memories(uuids[:4]) == 4
+    store.compact()
+    assert store.stats()["count_memories"] == 6
+    hits = store.semantic_search("text 7", 1)
+    assert hits[0][1]["text"] == "text 7"
+    assert np.isclose(hits[0][0], 1.0, atol=1e-5)
+
+
+def _header(store):
+    with open(store._db_index_path(), "rb") as f:
+        return unpack_index(f.read())[0]
+
+
+def test_merged_duplicates_use_no_rowids_and_header_is_exact(make_store, tmp_path, monkeypatch):
+    db_path = str(tmp_path / "shared.db")
+    store = make_store(backend="sqlite", db_path=db_path, dedupe={"threshold": 0.8})
+    uuids = store.add_memories([NEAR, NEAR + "!", NEAR + "?", "Steuererklärung bis Juli abgeben"])
+    assert uuids[1] is None and uuids[2] is None
+    assert sorted(m["rid"] for m in store.memories) == [1, 2]
+    assert store._next_rid == 3 and store._db.last_id == 2
+    store.close()
+    assert _header(store) == 2
+
+    # Zeilen eines anderen Prozesses nach dem Snapshot: werden nachgetragen, kein Neuaufbau
+    other = make_store(backend="sqlite", db_path=db_path, memory_dir=str(tmp_path / "b"))
+    other.add_memories(["eintrag vom anderen prozess", "noch einer"])
+    rebuilds = []
+    monkeypatch.setattr(LongTermMemory, "_rebuild_faiss", lambda self: rebuilds.append(self))
+    reopened = make_store(backend="sqlite", db_path=db_path)
+    assert rebuilds == [] and reopened.index.live == 4
+    assert reopened.semantic_search("noch einer", 1)[0][1]["text"] == "noch einer"
+
+
+def test_insert_advances_the_loaded_watermark_only_without_gap(tmp_path):
+    path = str(tmp_path / "store.db")
+    mine, other = SQLiteMemoryStore(path, EMBED_DIM), SQLiteMemoryStore(path, EMBED_DIM)
+
+    def recs(*texts):
+        return [{"text": t, "timestamp": 1_700_000_000, "mood": "neutral", "category": "allgemein",
+                 "tags": [], "uuid": t, "fp": t} for t in texts]
+
+    mat = np.zeros((2, EMBED_DIM), dtype="float32")
+    mine.insert(recs("a", "b"), mat)
+    assert mine.last_id == 2
+    assert mine.load()[0] == []
+
+    other.insert(recs("fremd"), mat[:1])   # rowid 3, von `mine` noch nicht geladen
+    mine.insert(recs("c"), mat[:1])        # rowid 4 -> Lücke, Watermark bleibt
+    assert mine.last_id == 2
+    assert [r["text"] for r in mine.load()[0]] == ["fremd", "c"]
+    assert mine.last_id == 4
+    mine.close()
+    other.close()
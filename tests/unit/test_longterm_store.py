@@ -0,0 +1,279 @@
+# Tests: Segment-Logs des LongTermMemory (Append, Wiederöffnen, Migration des alten Formats)
+
+import os
+import json
+import pickle
+
+import numpy as np
+import pytest
+
+from src.kimba_ai.core.memory.longterm import EMBED_DIM, MEMORY_JSON, EMBED_PKL
+
+
+def _texts(store):
+    return sorted(m["text"] for m in store.memories if m is not None)
+
+
+def test_add_appends_one_row_per_memory(make_store):
+    store = make_store()
+    paths = store.stats()["paths"]
+    for i in range(3):
+        assert store.add_memory(f"erinnerung {i}", category="test")
+        assert os.path.getsize(paths["vectors"]) == (i + 1) * EMBED_DIM * 4
+    with open(paths["meta"], encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert [m["text"] for m in lines] == ["erinnerung 0", "erinnerung 1", "erinnerung 2"]
+
+
+def test_reopen_restores_memories_and_index(make_store):
+    store = make_store()
+    store.add_memories([f"notiz über thema {i}" for i in range(20)])
+    store.close()
+
+    reopened = make_store()
+    assert reopened.stats()["count_memories"] == 20
+    assert reopened.stats()["index_ntotal"] == 20
+    assert reopened.semantic_search("notiz über thema 7", 1)[0][1]["text"] == "notiz über thema 7"
+    assert reopened.add_memory("nach dem neustart")
+    reopened.close()
+    assert len(_texts(make_store())) == 21
+
+
+def test_reopen_after_unclean_exit_replays_the_log(make_store):
+    store = make_store()
+    store.add_memories(["vor dem absturz 1", "vor dem absturz 2"])
+    store.flush()
+    # kein close(): Index-Snapshot fehlt, Manifest ist nicht "clean"
+    reopened = make_store(memory_dir=store.memory_dir)
+    assert _texts(reopened) == ["vor dem absturz 1", "vor dem absturz 2"]
+    store._closed = True  # das "abgestürzte" Objekt nicht mehr schreiben lassen
+
+
+def test_legacy_json_and_pickle_are_migrated(make_store, tmp_path):
+    memory_dir = tmp_path / "memory"
+    memory_dir.mkdir()
+    memories = [{"uuid": f"u{i}", "timestamp": 1_700_000_000 + i, "text": f"alt {i}", "category": "allgemein",
+                 "mood": "neutral", "tags": [], "project": None} for i in range(4)]
+    with open(memory_dir / os.path.basename(MEMORY_JSON), "w", encoding="utf-8") as f:
+        json.dump(memories, f)
+    with open(memory_dir / os.path.basename(EMBED_PKL), "wb") as f:
+        pickle.dump([np.random.rand(EMBED_DIM).astype("float32") for _ in memories], f)
+
+    store = make_store()
+    assert _texts(store) == ["alt 0", "alt 1", "alt 2", "alt 3"]
+    assert store.get_memory("u2")["text"] == "alt 2"
+    assert os.path.exists(memory_dir / (os.path.basename(MEMORY_JSON) + ".migrated"))
+    assert not os.path.exists(memory_dir / os.path.basename(EMBED_PKL))
+
+
+def test_batch_import_encodes_and_persists_once(make_store, counting_embedder):
+    store = make_store(embedder=counting_embedder)
+    items = [f"batch eintrag {i}" for i in range(10)] + [
+        "", "batch eintrag 3", {"text": "mit metadaten", "category": "code", "project": "kimba", "tags": ["x"]}
+    ]
+    uuids = store.add_memories(items, batch_size=4)
+
+    assert counting_embedder.calls == [11]  # ein Encode; leerer Text und Duplikat ausgelassen
+    assert uuids[10] is None and uuids[11] is None
+    assert len([u for u in uuids if u]) == 11
+    meta = store.get_memory(uuids[12])
+    assert (meta["category"], meta["project"], meta["tags"]) == ("code", "kimba", ["x"])
+    with open(store.stats()["paths"]["meta"], encoding="utf-8") as f:
+        assert len(f.readlines()) == 11
+
+
+def test_batch_import_with_precomputed_vectors_skips_encode(make_store, counting_embedder):
+    store = make_store(embedder=counting_embedder)
+    vecs = np.eye(3, EMBED_DIM, dtype="float32") * 5.0
+    uuids = store.add_memories(["a", "b", "c"], vectors=vecs)
+
+    assert counting_embedder.calls == [] and all(uuids)
+    assert np.allclose(np.linalg.norm(store.embeddings, axis=1), 1.0)  # normalisiert abgelegt
+    with pytest.raises(ValueError):
+        store.add_memories(["d"], vectors=np.zeros((2, EMBED_DIM)))
+
+
+def test_fingerprint_dedupe_ignores_case_and_whitespace(make_store, counting_embedder):
+    store = make_store(embedder=counting_embedder)
+    assert store.add_memory("Kimba mag  Kaffee")
+    assert not store.add_memory("kimba MAG kaffee ")
+    assert counting_embedder.calls == [1]  # bekanntes Duplikat ohne Encode verworfen
+    assert store.stats()["count_memories"] == 1
+
+    (uid,) = [m["uuid"] for m in store.memories if m is not None]
+    assert store.delete_memory(uid)
+    assert store.add_memory("kimba mag kaffee")  # nach dem Löschen wieder erlaubt
+    store.close()
+
+    reopened = make_store(embedder=counting_embedder)
+    assert not reopened.add_memory("KIMBA MAG KAFFEE")
+
+
+def test_scores_are_cosine_similarities(make_store):
+    store = make_store()
+    texts = ["der hund spielt im garten", "die katze schläft im garten", "aktienkurse steigen heute"]
+    store.add_memories(texts)
+    hits = store.semantic_search("der hund spielt im garten", 3)
+
+    assert hits[0][1]["text"] == texts[0] and hits[0][0] == pytest.approx(1.0, abs=1e-5)
+    assert [s for s, _ in hits] == sorted((s for s, _ in hits), reverse=True)
+    vecs = store.embedder.encode(texts)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    expected = {t: float(vecs[0] @ v) for t, v in zip(texts, vecs)}
+    for score, m in hits:
+        assert score == pytest.approx(expected[m["text"]], abs=1e-5)
+    assert store.semantic_search("der hund spielt im garten", 3, min_score=0.99) == hits[:1]
+
+
+def test_unnormalized_store_is_migrated_to_cosine(make_store):
+    store = make_store()
+    store.add_memories(["kurz", "ein etwas längerer text"])
+    paths = store.stats()["paths"]
+    store.close()
+    raw = np.fromfile(paths["vectors"], dtype="float32").reshape(-1, EMBED_DIM) * 7.0
+    raw.tofile(paths["vectors"])
+    with open(paths["manifest"], encoding="utf-8") as f:
+        manifest = json.load(f)
+    manifest["metric"] = "l2"
+    with open(paths["manifest"], "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+    reopened = make_store()
+    assert np.allclose(np.linalg.norm(reopened.embeddings, axis=1), 1.0, atol=1e-5)
+    assert reopened.semantic_search("kurz", 1)[0][0] == pytest.approx(1.0, abs=1e-5)
+
+
+def test_delete_writes_tombstones_and_survives_reopen(make_store):
+    store = make_store()
+    uuids = store.add_memories([f"löschtest {i}" for i in range(10)])
+    assert store.delete_memories(uuids[:3] + ["unbekannt"]) == 3
+    assert not store.delete_memory(uuids[0])
+    assert os.path.getsize(store.stats()["paths"]["tombstones"]) == 3 * 8
+    assert store.get_memory(uuids[0]) is None
+    assert all(m["uuid"] not in uuids[:3] for _, m in store.semantic_search("löschtest 1", 10))
+    store.close()
+
+    reopened = make_store()
+    assert reopened.stats()["count_memories"] == 7
+    assert reopened.get_memory(uuids[1]) is None and reopened.get_memory(uuids[5]) is not None
+
+
+def test_compaction_drops_deleted_rows(make_store):
+    store = make_store()
+    uuids = store.add_memories([f"zeile {i}" for i in range(20)])
+    store.delete_memories(uuids[::2])
+    generation = store.generation
+    store.compact()
+
+    stats = store.stats()
+    assert store.generation == generation + 1
+    assert stats["tombstones"] == 0 and stats["index_ntotal"] == 10
+    assert os.path.getsize(stats["paths"]["vectors"]) == 10 * EMBED_DIM * 4
+    assert store.get_memory(uuids[1])["text"] == "zeile 1"
+    assert store.semantic_search("zeile 3", 1)[0][1]["uuid"] == uuids[3]
+
+
+def test_delete_where_by_category_and_age(make_store):
+    store = make_store()
+    now = 1_700_000_000
+    store.add_memories([
+        {"text": "alt chat", "category": "chat", "timestamp": now - 100},
+        {"text": "neu chat", "category": "chat", "timestamp": now},
+        {"text": "alt code", "category": "code", "timestamp": now - 100},
+    ])
+    assert store.delete_where(category="chat", before=now) == 1
+    assert store.delete_where(before=now) == 1
+    assert _texts(store) == ["neu chat"]
+    with pytest.raises(ValueError):
+        store.delete_where()
+
+
+def test_embeddings_are_a_read_only_memmap_over_the_log(make_store):
+    store = make_store()
+    store.add_memories(["erste zeile", "zweite zeile"])
+    mat = store.embeddings
+    assert isinstance(mat, np.memmap) and mat.shape == (2, EMBED_DIM) and not mat.flags.writeable
+    assert mat.filename == os.path.abspath(store.stats()["paths"]["vectors"])
+    expected = store.embedder.encode(["zweite zeile"])[0]
+    assert np.allclose(mat[1], expected / np.linalg.norm(expected))
+
+    store.add_memory("dritte zeile")
+    assert store.embeddings.shape == (3, EMBED_DIM)  # nach dem Append neu gemappt
+    assert np.array_equal(mat, store.embeddings[:2])  # alte View bleibt gültig
+    assert not any(name.endswith(".pkl") for name in os.listdir(store.memory_dir))
+
+
+def _mark_unclean(store):
+    path = store.manifest_path
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    manifest["clean"] = False
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+
+def test_recovery_recomputes_only_damaged_rows(make_store, counting_embedder):
+    store = make_store(embedder=counting_embedder)
+    store.add_memories([f"basis {i}" for i in range(5)])
+    store.compact()  # Basis mit Blockprüfsummen im Manifest
+    store.add_memories([f"tail {i}" for i in range(5)])  # Tail mit Zeilen-CRC
+    paths = store.stats()["paths"]
+    good = np.array(store.embeddings)
+    store.close()
+    _mark_unclean(store)
+    raw = np.fromfile(paths["vectors"], dtype="float32").reshape(-1, EMBED_DIM)
+    raw[[2, 7]] = 0.5
+    raw.tofile(paths["vectors"])
+
+    counting_embedder.calls.clear()
+    reopened = make_store(embedder=counting_embedder)
+    assert counting_embedder.calls == [2]
+    assert np.allclose(reopened.embeddings, good, atol=1e-6)
+
+
+def test_clean_manifest_skips_the_checksum_pass(make_store, counting_embedder):
+    store = make_store(embedder=counting_embedder)
+    store.add_memories([f"eintrag {i}" for i in range(5)])
+    store.close()
+    counting_embedder.calls.clear()
+    make_store(embedder=counting_embedder)
+    assert counting_embedder.calls == []
+
+
+def test_torn_logs_are_repaired_on_open(make_store, counting_embedder):
+    store = make_store(embedder=counting_embedder)
+    store.add_memories([f"eintrag {i}" for i in range(4)])
+    paths = store.stats()["paths"]
+    store.close()
+    _mark_unclean(store)
+    with open(paths["meta"], "a", encoding="utf-8") as f:
+        f.write('{"uuid": "halb", "text": "abgeris')  # Absturz mitten in der Metadaten-Zeile
+    with open(paths["vectors"], "ab") as f:
+        f.write(np.ones(EMBED_DIM + 7, dtype="float32").tobytes())  # Vektor ohne Metadaten + halber Record
+
+    counting_embedder.calls.clear()
+    reopened = make_store(embedder=counting_embedder)
+    assert counting_embedder.calls == []
+    assert reopened.stats()["count_memories"] == 4 and reopened.embeddings.shape == (4, EMBED_DIM)
+    assert os.path.getsize(paths["vectors"]) == 4 * EMBED_DIM * 4
+
+
+def test_missing_vector_tail_is_recomputed(make_store, counting_embedder):
+    store = make_store(embedder=counting_embedder)
+    store.add_memories([f"eintrag {i}" for i in range(6)])
+    paths = store.stats()["paths"]
+    store.close()
+    _mark_unclean(store)
+    with open(paths["vectors"], "r+b") as f:
+        f.truncate(4 * EMBED_DIM * 4)
+
+    counting_embedder.calls.clear()
+    reopened = make_store(embedder=counting_embedder)
+    assert counting_embedder.calls == [2]
+    assert reopened.semantic_search("eintrag 5", 1)[0][1]["text"] == "eintrag 5"
+
+
+def test_other_embedder_only_warns(make_store, capsys):
+    make_store().close()
+    make_store(embedder={"backend": "hashing", "seed": 1})
+    assert "stammen von 'hashing-384'" in capsys.readouterr().out
@@ -0,0 +1,75 @@
+# Tests: [Memories]-Block für Chat/Analyse - ein Recall pro Anfrage mit Schwelle und Persona-Ranking
+
+import pytest
+
+from src.kimba_ai.core.memory.manager import MemoryManager, MEMORY_BLOCK
+from src.kimba_ai.core.memory.ranking import RankingProfile
+
+MIN_SCORE = 0.35  # wie router.MEMORY_MIN_SCORE
+
+
+@pytest.fixture
+def manager(workdir, make_store):
+    manager = MemoryManager(session_index=False, archive_after_days=None, batching=False)
+    manager.longterm_memory.close()
+    manager.longterm_memory = make_store()  # Hashing-Embedder statt sentence-transformers
+    lt = manager.longterm_memory
+    lt.add_memory("Kimba mag Pizza mit Tomaten und Basilikum", category="essen", project="kimba")
+    lt.add_memory("Kimba mag Pizza am Freitag", category="plan")
+    lt.add_memory("Das Build nutzt pyproject und pytest", category="code")
+    yield manager
+    manager.session_memory.save_to_json()
+
+
+def _memory_lines(prompt):
+    block, _, _ = prompt.partition("\n\n[User]\n")
+    return block.splitlines()[1:]
+
+
+def test_below_threshold_hit_is_not_injected(manager):
+    prompt = manager.memory_prompt("Kimba mag Pizza", min_score=MIN_SCORE)
+    assert prompt.startswith(MEMORY_BLOCK + "\n") and prompt.endswith("\n\n[User]\nKimba mag Pizza")
+    lines = _memory_lines(prompt)
+    assert len(lines) == 2 and not any("pytest" in line for line in lines)
+    # ohne Schwelle landet der schwache Treffer im Prompt
+    assert any("pytest" in line for line in _memory_lines(manager.memory_prompt("Kimba mag Pizza")))
+
+
+def test_no_hit_above_threshold_returns_plain_text(manager):
+    assert manager.memory_prompt("Kimba mag Pizza", min_score=0.99) == "Kimba mag Pizza"
+
+
+def test_persona_ranking_orders_the_block(manager):
+    plain = _memory_lines(manager.memory_prompt("Kimba mag Pizza", min_score=MIN_SCORE))
+    assert "am Freitag" in plain[0]
+    ranked = _memory_lines(manager.memory_prompt(
+        "Kimba mag Pizza", min_score=MIN_SCORE, ranking=RankingProfile(category_weights={"essen": 3.0})
+    ))
+    assert "Tomaten" in ranked[0] and "(essen, kimba; rel:" in ranked[0]
+    assert not any("pytest" in line for line in ranked)
+
+
+def test_active_persona_ranking_is_used(manager):
+    from src.kimba_ai.core.personas import persona_frieren
+    from src.kimba_ai.core.personas.persona_manager import PersonaManager
+    personas = PersonaManager()
+    personas.set_active_persona("Frieren")  # wie router.ask_persona() vor dem Recall
+    prompt = manager.memory_prompt("Kimba mag Pizza", min_score=MIN_SCORE, ranking=personas.get_memory_ranking())
+    expected = RankingProfile.from_dict(persona_frieren.MEMORY_RANKING)
+    assert prompt == manager.memory_prompt("Kimba mag Pizza", min_score=MIN_SCORE, ranking=expected)
+    assert prompt != manager.memory_prompt("Kimba mag Pizza", min_score=MIN_SCORE)
+
+
+def test_router_uses_threshold_and_persona_ranking(manager):
+    pytest.importorskip("transformers")
+    from src.kimba_ai.core.llm.router import KimbaLLMRouter, MEMORY_MIN_SCORE
+
+    class Personas:
+        def get_memory_ranking(self):
+            return RankingProfile(category_weights={"essen": 3.0})
+
+    router = KimbaLLMRouter.__new__(KimbaLLMRouter)  # ohne Modell-Laden
+    router.memory_manager, router.persona_manager = manager, Personas()
+    router.memory_min_score = MEMORY_MIN_SCORE
+    lines = _memory_lines(router._augment_with_memories("Kimba mag Pizza"))
+    assert "Tomaten" in lines[0] and not any("pytest" in line for line in lines)
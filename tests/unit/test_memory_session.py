@@ -0,0 +1,83 @@
+# Tests: SessionMemory - Wichtigkeits-Lanes, Eviction und öffentliche dict-Sicht (user-022)
+
+import json
+
+import pytest
+
+from src.kimba_ai.core.memory.session import SessionMemory, session_path
+
+
+def _contents(messages):
+    return [m["content"] for m in messages]
+
+
+def test_getters_return_plain_dicts(workdir):
+    s = SessionMemory()
+    s.add("user", "hallo", importance=1, tags=["gruß"], category="chat")
+    s.add("persona", "hi!")
+    for getter in (s.get_all, s.get_important, lambda: s.messages, lambda: list(s)):
+        out = getter()
+        assert all(type(m) is dict for m in out)
+        json.dumps(out)
+    assert s.get_all()[0]["tags"] == ["gruß"]
+
+
+def test_important_messages_survive_max_entries(workdir):
+    s = SessionMemory(max_entries=5)
+    for i in range(12):
+        s.add("user", f"m{i}", importance=1 if i in (0, 3, 7) else 0)
+    assert len(s) == 5
+    # wie vorher: alle wichtigen bleiben, dazu die neuesten normalen - chronologisch
+    assert _contents(s.get_all()) == ["m0", "m3", "m7", "m10", "m11"]
+    assert _contents(s.get_important()) == ["m0", "m3", "m7"]
+
+
+def test_important_only_session_may_exceed_max_entries_up_to_the_cap(workdir):
+    s = SessionMemory(max_entries=3, max_important=5)
+    for i in range(8):
+        s.add("user", f"w{i}", importance=2 if i == 1 else 1)
+    s.add("user", "normal")
+    assert len(s) == 5
+    # Obergrenze: älteste der niedrigsten wichtigen Stufe fällt zuerst, "sehr wichtig" bleibt
+    assert _contents(s.get_all()) == ["w1", "w4", "w5", "w6", "w7"]
+    assert _contents(s.get_important(2)) == ["w1"]
+
+
+def test_eviction_is_replayed_identically_after_reload(workdir):
+    s = SessionMemory(max_entries=50)
+    for i in range(300):
+        s.add("user" if i % 2 else "persona", f"nachricht {i}", importance=(i % 7 == 0) + (i % 21 == 0))
+        if i % 40 == 0:
+            s.save_to_json()
+    s.save_to_json()
+    loaded = SessionMemory(max_entries=50)
+    assert loaded.load_from_json(session_path(s.session_id))
+    assert loaded.get_all() == s.get_all()
+    assert len(loaded) == len(s)
+
+
+def test_reset_and_markdown(workdir):
+    s = SessionMemory(title="Projekt")
+    s.add("user", "frage", category="request", project="kimba", mood="neugierig")
+    md = s.export_markdown()
+    assert "# Projekt" in md and "proj:kimba" in md and "mood:neugierig" in md
+    s.reset("neu")
+    assert len(s) == 0 and s.get_all() == [] and s.title == "neu"
+
+
+@pytest.mark.parametrize("content", ["", "   "])
+def test_empty_content_is_ignored(workdir, content):
+    s = SessionMemory()
+    assert s.add("user", content) is False
+    assert len(s) == 0
+
+
+def test_manager_get_session_is_json_serializable(workdir):
+    from src.kimba_ai.core.memory.manager import MemoryManager
+    manager = MemoryManager(session_index=False, archive_after_days=None, batching=False)
+    try:
+        manager.remember("user", "merk dir das", importance=0)
+        json.dumps(manager.get_session())
+        assert manager.get_session()[0]["content"] == "merk dir das"
+    finally:
+        manager.close()
@@ -0,0 +1,73 @@
+# Tests: Nachsortierung nach Ähnlichkeit, Aktualität, Wichtigkeit und Kategorie (ranking.py)
+
+import time
+import importlib
+
+import numpy as np
+import pytest
+
+from src.kimba_ai.core.memory.ranking import RankingProfile, MAX_IMPORTANCE
+
+NOW = 1_700_000_000.0
+DAY = 86_400.0
+
+
+def _mem(days_old=0.0, importance=0, category="allgemein", **extra):
+    return {"timestamp": NOW - days_old * DAY, "importance": importance, "category": category, **extra}
+
+
+def test_scores_match_the_formula():
+    profile = RankingProfile(similarity=1.0, recency=0.3, half_life_days=10.0, importance=0.2,
+                             category_weights={"code": 2.0})
+    mems = [_mem(0), _mem(10, importance=1), _mem(20, importance=2, category="code"), _mem(-5)]
+    sims = np.array([0.5, 0.5, 0.4, 0.1])
+    expected = []
+    for s, m in zip(sims, mems):
+        age = max(NOW - m["timestamp"], 0.0) / DAY
+        score = s + 0.3 * 0.5 ** (age / 10.0) + 0.2 * m["importance"] / MAX_IMPORTANCE
+        expected.append(score * (2.0 if m["category"] == "code" else 1.0))
+    assert np.allclose(profile.scores(sims, mems, now=NOW), expected)
+
+
+def test_recency_and_importance_break_similarity_ties():
+    profile = RankingProfile()
+    hits = [(0.8, _mem(60, text="alt")), (0.8, _mem(1, text="neu")), (0.8, _mem(60, importance=2, text="wichtig"))]
+    ranked = profile.rank(hits, 3, now=NOW)
+    assert [m["text"] for _, m in ranked] == ["neu", "wichtig", "alt"]
+    assert [s for s, _ in ranked] == sorted((s for s, _ in ranked), reverse=True)
+    assert len(profile.rank(hits, 1, now=NOW)) == 1 and profile.rank([], 3) == []
+
+
+def test_last_seen_refreshes_recency():
+    profile = RankingProfile(similarity=0.0)
+    confirmed = _mem(90, last_seen=NOW - DAY)
+    assert profile.scores(np.zeros(2), [_mem(90), confirmed], now=NOW)[1] > 0.25
+
+
+def test_from_dict_validates_options():
+    assert RankingProfile.from_dict({"recency": 0.6, "half_life_days": 1.0}).recency == 0.6
+    assert RankingProfile.from_dict(None).key() == RankingProfile().key()
+    with pytest.raises(ValueError):
+        RankingProfile.from_dict({"recncy": 0.6})
+    with pytest.raises(ValueError):
+        RankingProfile(half_life_days=0)
+
+
+@pytest.mark.parametrize("module", ["persona_frieren", "persona_kimba_cat"])
+def test_persona_profiles_are_valid(module):
+    persona = importlib.import_module(f"src.kimba_ai.core.personas.{module}")
+    RankingProfile.from_dict(persona.MEMORY_RANKING)
+
+
+def test_store_ranks_a_larger_candidate_pool(make_store):
+    store = make_store()
+    now = time.time()  # semantic_search rankt gegen die aktuelle Zeit
+    store.add_memories(
+        [{"text": f"kaffee notiz {i}", "timestamp": int(now - 400 * DAY)} for i in range(10)]
+        + [{"text": "kaffee notiz von heute", "timestamp": int(now)}]
+    )
+    plain = store.semantic_search("kaffee notiz 3", 1)
+    assert plain[0][1]["text"] == "kaffee notiz 3"
+    profile = RankingProfile(similarity=0.1, recency=1.0, half_life_days=1.0, pool=20)
+    ranked = store.semantic_search("kaffee notiz 3", 1, ranking=profile)
+    assert ranked[0][1]["text"] == "kaffee notiz von heute"
@@ -0,0 +1,87 @@
+# Tests: vorgefilterte Suche (project/category/mood/tags/Zeitraum)
+
+import pytest
+
+from src.kimba_ai.core.memory import longterm
+
+T0 = 1_700_000_000
+
+
+@pytest.fixture
+def store(make_store):
+    store = make_store()
+    items = []
+    for i in range(60):
+        items.append({
+            "text": f"projekt notiz nummer {i}",
+            "project": "kimba" if i % 3 == 0 else "andere",
+            "category": ("code", "chat", "idee")[(i // 2) % 3],
+            "mood": "froh" if i % 4 == 0 else "neutral",
+            "tags": ["a", "b"] if i % 5 == 0 else ["a"],
+            "timestamp": T0 + i * 60,
+        })
+    store.add_memories(items)
+    return store
+
+
+def _check(hits, **expect):
+    assert hits
+    for _, m in hits:
+        for key, value in expect.items():
+            if key == "tags":
+                assert set(value) <= set(m["tags"])
+            elif key == "since":
+                assert m["timestamp"] >= value
+            elif key == "until":
+                assert m["timestamp"] <= value
+            elif isinstance(value, list):
+                assert m[key] in value
+            else:
+                assert m[key] == value
+
+
+@pytest.mark.parametrize("exact_max", [longterm.EXACT_SCAN_MAX, 0])  # exakter Scan bzw. ANN + IDSelector
+def test_filters_are_applied_before_the_vector_search(store, monkeypatch, exact_max):
+    monkeypatch.setattr(longterm, "EXACT_SCAN_MAX", exact_max)
+    query = "projekt notiz nummer 1"
+    cases = [
+        dict(project="kimba"),
+        dict(category=["code", "idee"]),
+        dict(mood="froh", project="kimba"),
+        dict(tags=["a", "b"]),
+        dict(since=T0 + 10 * 60, until=T0 + 20 * 60),
+    ]
+    for filters in cases:
+        hits = store.semantic_search(query, 100, **filters)
+        _check(hits, **filters)
+        expected = sum(1 for m in store.memories if all(
+            (set(v) <= set(m[k])) if k == "tags" else
+            (m["timestamp"] >= v) if k == "since" else
+            (m["timestamp"] <= v) if k == "until" else
+            (m[k] in v) if isinstance(v, list) else m[k] == v
+            for k, v in filters.items()
+        ))
+        assert len(hits) == expected, filters
+
+
+def test_since_until_are_inclusive(store):
+    hits = store.semantic_search("notiz", 100, since=T0 + 60, until=T0 + 120)
+    assert sorted(m["timestamp"] for _, m in hits) == [T0 + 60, T0 + 120]
+
+
+def test_no_match_returns_empty(store):
+    assert store.semantic_search("notiz", 5, project="gibtsnicht") == []
+    assert store.lexical_search("notiz", 5, project="gibtsnicht") == []
+
+
+def test_filters_follow_deletes(store):
+    kimba = [m["uuid"] for m in store.memories if m["project"] == "kimba"]
+    store.delete_memories(kimba[:-1])
+    hits = store.semantic_search("notiz", 100, project="kimba")
+    assert [m["uuid"] for _, m in hits] == kimba[-1:]
+
+
+def test_recent_uses_the_metadata_index(store):
+    recent = store.recent(3, category="code", project="kimba")
+    assert recent and all(m["category"] == "code" and m["project"] == "kimba" for m in recent)
+    assert [m["timestamp"] for m in recent] == sorted((m["timestamp"] for m in recent), reverse=True)
@@ -0,0 +1,118 @@
+# Tests: Archiv-Stufe für inaktive Sessions (user-025)
+
+import os
+import time
+
+import pytest
+
+from src.kimba_ai.core.memory import session
+from src.kimba_ai.core.memory.session import SessionMemory, session_path, _journal_path, _offsets_path
+from src.kimba_ai.core.memory.session_archive import SessionArchive, read_archived
+from src.kimba_ai.core.memory.session_index import SessionIndex
+from src.kimba_ai.core.memory.session_reader import SessionReader
+
+
+def _session(title, count, index=None):
+    s = SessionMemory(title=title, index=index)
+    for i in range(count):
+        s.add("user", f"{title} nachricht {i}", tags=["alt"] if i == 0 else [])
+    s.compact()
+    s.add("persona", f"{title} antwort")  # landet im Journal
+    s.save_to_json()
+    return s
+
+
+def _age(session_id, days):
+    """Session-Dateien `days` Tage in die Vergangenheit datieren."""
+    then = time.time() - days * 86400
+    path = session_path(session_id)
+    for p in (path, _journal_path(path), _offsets_path(path)):
+        if os.path.exists(p):
+            os.utime(p, (then, then))
+
+
+@pytest.fixture
+def index(workdir):
+    idx = SessionIndex(session_dir=session.SESSION_DIR, path=os.path.join(session.SESSION_DIR, "idx.db"))
+    yield idx
+    idx.close()
+
+
+def test_idle_sessions_are_packed_and_removed(workdir, index):
+    old = _session("Urlaub", 5, index)
+    fresh = _session("Heute", 3, index)
+    _age(old.session_id, 40)
+    archive = SessionArchive(codec="gzip")
+
+    assert archive.archive(30, index=index) == 1
+    path = session_path(old.session_id)
+    assert not any(os.path.exists(p) for p in (path, _journal_path(path), _offsets_path(path)))
+    assert os.path.exists(session_path(fresh.session_id))
+    assert old.session_id in archive and fresh.session_id not in archive
+
+    (entry,) = archive.entries()
+    assert entry["title"] == "Urlaub" and entry["messages"] == 6 and entry["codec"] == "gzip"
+    assert entry["segment"].endswith(".gz")
+    assert archive.read(old.session_id)["messages"] == old.get_all()
+    # zweiter Lauf: nichts mehr zu tun
+    assert archive.archive(30, index=index) == 0
+
+
+def test_archived_sessions_stay_readable(workdir):
+    old = _session("Projekt", 12)
+    _age(old.session_id, 40)
+    SessionArchive().archive(30)
+
+    loaded = SessionMemory()
+    assert loaded.load_from_json(session_path(old.session_id))
+    assert loaded.title == "Projekt" and loaded.get_all() == old.get_all()
+    assert read_archived(old.session_id)["messages"] == old.get_all()
+    assert read_archived("gibtsnicht") is None
+
+    reader = SessionReader.for_session(old.session_id, page_size=5)
+    assert len(reader) == 13
+    assert reader.page(0) == old.get_all()[-5:]
+
+
+def test_index_keeps_archived_sessions_searchable(workdir, index):
+    old = _session("Garten", 4, index)
+    _age(old.session_id, 40)
+    SessionArchive().archive(30, index=index)
+
+    hits = index.search("Garten", limit=10)
+    assert len(hits) == 5 and {m["session_id"] for _, m in hits} == {old.session_id}
+    assert index.sync() == 0  # fehlende Dateien lösen keine Neuindizierung aus
+    assert index.search(tags="alt")[0][1]["session_id"] == old.session_id
+
+
+def test_reactivated_session_gets_an_active_snapshot(workdir):
+    old = _session("Wieder", 3)
+    _age(old.session_id, 40)
+    archive = SessionArchive()
+    archive.archive(30)
+
+    resumed = SessionMemory()
+    assert resumed.load_from_json(session_path(old.session_id))
+    resumed.add("user", "weiter geht's")
+    resumed.save_to_json()
+    assert os.path.exists(session_path(old.session_id))
+
+    loaded = SessionMemory()
+    loaded.load_from_json(session_path(old.session_id))
+    assert [m["content"] for m in loaded.get_all()][-2:] == ["Wieder antwort", "weiter geht's"]
+    assert len(SessionReader.for_session(old.session_id)) == 5
+    # die aktive Datei ist frisch -> wird nicht erneut archiviert
+    assert archive.archive(30) == 0
+
+
+def test_excluded_session_is_not_archived(workdir):
+    old = _session("Aktiv", 2)
+    _age(old.session_id, 40)
+    archive = SessionArchive()
+    assert archive.archive(30, exclude=(old.session_id,)) == 0
+    assert os.path.exists(session_path(old.session_id))
+
+
+def test_unknown_codec_is_rejected(workdir):
+    with pytest.raises(ValueError):
+        SessionArchive(codec="lz4")
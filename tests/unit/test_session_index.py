@@ -0,0 +1,139 @@
+# Tests: Suchindex über alle Sessions (session_index.py)
+
+import os
+import datetime
+
+import pytest
+
+from src.kimba_ai.core.memory import session
+from src.kimba_ai.core.memory.session import SessionMemory, session_path
+from src.kimba_ai.core.memory.session_index import SessionIndex
+
+
+def _msg(i, content, day=1, **fields):
+    return {"id": f"m{i}", "timestamp": f"2025-03-{day:02d}T10:00:00", "speaker": "user", "content": content,
+            "importance": 0, "tags": [], "category": "allgemein", "mood": "neutral", "project": None, **fields}
+
+
+@pytest.fixture
+def make_index(workdir):
+    indexes = []
+
+    def make(**options):
+        options.setdefault("path", os.path.join(session.SESSION_DIR, "idx.db"))
+        index = SessionIndex(session_dir=session.SESSION_DIR, **options)
+        indexes.append(index)
+        return index
+
+    yield make
+    for index in indexes:
+        index.close()
+
+
+@pytest.fixture
+def index(make_index):
+    index = make_index()
+    index.add_messages("s1", "Garten", [
+        _msg(1, "Die Tomaten im Garten brauchen Wasser", day=1, category="garten", tags=["pflanzen"]),
+        _msg(2, "Config liegt in settings_local.py", day=2, category="code", project="kimba", importance=2),
+        _msg(3, "Tomaten Tomaten Tomaten", day=3, speaker="persona", mood="froh", tags=["pflanzen", "witz"]),
+    ])
+    index.add_messages("s2", "Arbeit", [
+        _msg(4, "Meeting zum Garten-Projekt", day=4, project="kimba"),
+        _msg(5, "Kaffee holen", day=5),
+    ])
+    return index
+
+
+def _ids(hits):
+    return [m["id"] for _, m in hits]
+
+
+def test_full_text_search_ranks_by_bm25(index):
+    hits = index.search("tomaten")
+    assert _ids(hits) == ["m3", "m1"]
+    assert hits[0][0] > hits[1][0] and hits[0][1]["title"] == "Garten"
+    assert _ids(index.search("settings_local.py")) == ["m2"]
+    assert set(_ids(index.search("Gärten"))) == {"m1", "m4"}  # remove_diacritics: ä ~ a
+    assert index.search("!!!") == index.search(limit=10)  # keine Tokens -> neueste
+
+
+def test_filters_narrow_the_search(index):
+    assert _ids(index.search(speaker="persona")) == ["m3"]
+    assert _ids(index.search("garten", project="kimba")) == ["m4"]
+    assert _ids(index.search(tags=["pflanzen", "witz"])) == ["m3"]
+    assert _ids(index.search(category=["code", "garten"])) == ["m2", "m1"]
+    assert _ids(index.search(session_id="s2")) == ["m5", "m4"]
+    assert _ids(index.search(min_importance=1)) == ["m2"]
+    assert _ids(index.search(mood="froh")) == ["m3"]
+    assert _ids(index.search(since="2025-03-02T00:00:00", until=datetime.datetime(2025, 3, 3, 23, 0))) == ["m3", "m2"]
+
+
+def test_without_query_newest_first(index):
+    assert _ids(index.search(limit=3)) == ["m5", "m4", "m3"]
+    assert all(score == 0.0 for score, _ in index.search(limit=3))
+
+
+def test_known_messages_are_skipped_and_sessions_removed(index):
+    assert index.add_messages("s1", None, [_msg(1, "Die Tomaten im Garten brauchen Wasser")]) == 0
+    assert index.stats()["messages"] == 5 and index.stats()["sessions"] == 2
+    assert index.remove_session("s1") == 3
+    assert index.search("tomaten") == [] and index.stats()["sessions"] == 1
+
+
+def test_session_memory_feeds_the_index_on_save(make_index):
+    index = make_index()
+    s = SessionMemory(title="Live", index=index)
+    s.add("user", "Wo ist mein Schlüssel?", tags=["suche"])
+    s.save_to_json()
+    s.add("persona", "Der Schlüssel liegt auf dem Tisch")
+    s.save_to_json()
+    hits = index.search("schlüssel")
+    assert len(hits) == 2 and {m["session_id"] for _, m in hits} == {s.session_id}
+    assert index.sync() == 0  # Dateistand ist bereits indiziert
+
+
+def test_sync_reads_only_changed_session_files(make_index):
+    s = SessionMemory(title="Extern")
+    for i in range(3):
+        s.add("user", f"externe nachricht {i}")
+    s.save_to_json()
+    index = make_index()
+    assert index.sync() == 3
+    assert index.sync() == 0
+    s.add("user", "noch eine nachricht")
+    s.save_to_json()
+    assert index.sync() == 1
+    index.close()
+    assert make_index().sync() == 0  # Stand überlebt den Neustart
+    assert os.path.exists(session_path(s.session_id))
+
+
+def test_semantic_search_fuses_text_and_vectors(make_index):
+    index = make_index(embedder="hashing", batching=False)
+    index.add_messages("s1", "T", [
+        _msg(1, "katze schläft auf dem sofa"), _msg(2, "hund bellt laut"), _msg(3, "die katze jagt eine maus"),
+    ])
+    hits = index.search("katze sofa", semantic=True)
+    assert _ids(hits)[0] == "m1" and set(_ids(hits)) >= {"m1", "m3"}
+    assert index.stats()["embedded"] == 3
+    assert _ids(index.search("katze", semantic=True, session_id="s2")) == []
+
+    index.add_messages("s1", None, [_msg(4, "katze auf dem sofa")])
+    assert "m4" in _ids(index.search("katze sofa", semantic=True))
+
+
+def test_semantic_search_needs_an_embedder(index):
+    with pytest.raises(ValueError):
+        index.search("tomaten", semantic=True)
+
+
+def test_embedder_change_recomputes_embeddings(make_index, capsys):
+    index = make_index(embedder="hashing", batching=False)
+    index.add_messages("s1", "T", [_msg(1, "text eins")])
+    index.search("text", semantic=True)
+    index.close()
+    other = make_index(embedder={"backend": "hashing", "seed": 9}, batching=False)
+    assert "Embedder gewechselt" in capsys.readouterr().out
+    assert other.stats()["embedded"] == 0
+    assert _ids(other.search("text", semantic=True)) == ["m1"]
@@ -0,0 +1,104 @@
+# Tests: Session-Journal (append-only) mit Snapshot-Kompaktierung (user-021)
+
+import os
+import json
+import shutil
+
+from src.kimba_ai.core.memory import session
+from src.kimba_ai.core.memory.session import SessionMemory, session_path, _journal_path
+
+
+def _lines(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def _reload(s, **options):
+    loaded = SessionMemory(**options)
+    assert loaded.load_from_json(session_path(s.session_id))
+    return loaded
+
+
+def test_save_appends_only_new_messages(workdir):
+    s = SessionMemory()
+    s.add("user", "erste")
+    path = s.save_to_json()  # erster Save: Snapshot
+    snapshot = open(path, "rb").read()
+    assert not os.path.exists(_journal_path(path))
+
+    s.add("persona", "zweite")
+    s.add("user", "dritte")
+    s.save_to_json()
+    s.save_to_json()  # nichts Neues -> keine weitere Zeile
+    assert open(path, "rb").read() == snapshot
+    assert [(e["seq"], e["content"]) for e in _lines(_journal_path(path))] == [(2, "zweite"), (3, "dritte")]
+    assert _reload(s).get_all() == s.get_all()
+
+
+def test_journal_is_compacted_into_the_snapshot(workdir, monkeypatch):
+    monkeypatch.setattr(session, "JOURNAL_MIN", 4)
+    s = SessionMemory()
+    s.add("user", "start")
+    path = s.save_to_json()
+    for i in range(100):
+        s.add("user", f"nachricht {i}")
+        s.save_to_json()
+        journal = len(_lines(_journal_path(path)))
+        # Journal höchstens so lang wie der Snapshot-Anteil -> Snapshot wächst geometrisch
+        assert journal < max(4, len(s) - journal)
+    with open(path, "r", encoding="utf-8") as f:
+        assert json.load(f)["seq"] > 50
+    assert _reload(s).get_all() == s.get_all()
+
+
+def test_torn_last_line_is_dropped_and_truncated(workdir):
+    s = SessionMemory()
+    s.add("user", "a")
+    path = s.save_to_json()
+    s.add("user", "b")
+    s.save_to_json()
+    with open(_journal_path(path), "a", encoding="utf-8") as f:
+        f.write('{"seq": 3, "content": "abgeriss')  # Absturz mitten im Anhängen
+
+    loaded = _reload(s)
+    assert [m["content"] for m in loaded.get_all()] == ["a", "b"]
+    loaded.add("user", "c")
+    loaded.save_to_json()
+    assert [m["content"] for m in _reload(loaded).get_all()] == ["a", "b", "c"]
+
+
+def test_stale_journal_after_crash_during_compaction_is_skipped(workdir):
+    s = SessionMemory()
+    s.add("user", "a")
+    path = s.save_to_json()
+    for c in "bcd":
+        s.add("user", c)
+    s.save_to_json()
+    stale = str(workdir / "stale.jsonl")
+    shutil.copy(_journal_path(path), stale)
+    s.compact()
+    # Absturz zwischen neuem Snapshot und dem Löschen des Journals simulieren
+    shutil.copy(stale, _journal_path(path))
+
+    assert [m["content"] for m in _reload(s).get_all()] == ["a", "b", "c", "d"]
+
+
+def test_legacy_indented_snapshot_still_loads(workdir):
+    path = session_path("alt00001")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"session_id": "alt00001", "title": "Alt", "messages": [
+            {"id": "1", "timestamp": "2025-01-01T10:00:00", "speaker": "user", "content": "hallo",
+             "importance": 0, "tags": [], "category": None, "mood": None, "project": None},
+        ]}, f, indent=2)
+    s = SessionMemory()
+    assert s.load_from_json(path)
+    assert s.title == "Alt" and s.get_all()[0]["content"] == "hallo"
+    s.add("user", "weiter")
+    s.save_to_json()
+    assert [m["content"] for m in _reload(s).get_all()] == ["hallo", "weiter"]
+
+
+def test_missing_session_returns_false(workdir):
+    assert SessionMemory().load_from_json(session_path("gibtsnicht")) is False
@@ -0,0 +1,124 @@
+# Tests: seitenweises Lesen gespeicherter Sessions (user-024)
+
+import os
+import json
+import shutil
+
+import pytest
+
+from src.kimba_ai.core.memory import session
+from src.kimba_ai.core.memory.session import SessionMemory, session_path, _journal_path, _offsets_path
+from src.kimba_ai.core.memory.session_reader import SessionReader
+
+
+@pytest.fixture
+def saved(workdir, monkeypatch):
+    """Session mit 130 Nachrichten: Snapshot (100) + Journal (30)."""
+    monkeypatch.setattr(session, "JOURNAL_MIN", 64)
+    s = SessionMemory(title="Lang")
+    for i in range(100):
+        s.add("user" if i % 2 else "persona", f"nachricht {i}", importance=i % 3, tags=[f"t{i % 5}"])
+    s.compact()
+    for i in range(100, 130):
+        s.add("user", f"nachricht {i}")
+    s.save_to_json()
+    assert os.path.exists(_journal_path(session_path(s.session_id)))
+    return s
+
+
+def _contents(messages):
+    return [m["content"] for m in messages]
+
+
+def test_pages_tail_and_slices_match_the_session(saved):
+    reader = SessionReader.for_session(saved.session_id, page_size=40)
+    expected = saved.get_all()
+    assert len(reader) == 130 and reader.page_count == 4
+    assert reader.title == "Lang"
+    assert reader.messages() == expected
+    assert reader.tail() == expected[-40:]
+    assert reader.tail(5) == expected[-5:]
+    assert reader.page(0) == expected[90:130]
+    assert reader.page(3) == expected[:10]
+    assert [m for page in reversed(list(reader.pages())) for m in page] == expected
+    assert reader[95:105] == expected[95:105]  # über die Grenze Snapshot/Journal
+    assert reader[-1] == expected[-1] and reader[0] == expected[0]
+    assert list(reader) == expected
+    with pytest.raises(IndexError):
+        reader.page(4)
+    with pytest.raises(IndexError):
+        reader[130]
+
+
+def test_missing_or_stale_offsets_are_rebuilt(saved):
+    path = session_path(saved.session_id)
+    os.remove(_offsets_path(path))
+    assert SessionReader(path).messages() == saved.get_all()
+
+    saved.compact()  # neue Offset-Datei, dann Snapshot ohne sie ersetzen -> veraltet
+    stale = _offsets_path(path) + ".bak"
+    shutil.copy(_offsets_path(path), stale)
+    saved.add("user", "nach dem snapshot")
+    saved.compact()
+    shutil.copy(stale, _offsets_path(path))
+    assert SessionReader(path).messages() == saved.get_all()
+
+
+def test_refresh_picks_up_appended_journal_lines(saved):
+    reader = SessionReader.for_session(saved.session_id, page_size=10)
+    saved.add("persona", "neu 1")
+    saved.add("persona", "neu 2")
+    saved.save_to_json()
+    assert reader.refresh() == 132
+    assert _contents(reader.tail(2)) == ["neu 1", "neu 2"]
+
+    saved.compact()  # Journal geleert, Snapshot neu
+    assert reader.refresh() == 132
+    assert reader.messages() == saved.get_all()
+
+
+def test_torn_and_stale_journal_lines_are_ignored(saved):
+    path = session_path(saved.session_id)
+    journal = _journal_path(path)
+    with open(journal, "a", encoding="utf-8") as f:
+        f.write('{"seq": 999, "content": "abger')
+    assert len(SessionReader(path)) == 130
+
+    shutil.copy(journal, journal + ".bak")
+    saved.compact()
+    shutil.copy(journal + ".bak", journal)  # Absturz vor dem Löschen des Journals
+    reader = SessionReader(path)
+    assert reader.messages() == saved.get_all()
+
+
+def test_legacy_snapshot_is_read(workdir):
+    path = session_path("legacy01")
+    messages = [{"id": str(i), "timestamp": "2025-01-01T10:00:00", "speaker": "user", "content": f"m{i}",
+                 "importance": 0, "tags": [], "category": None, "mood": None, "project": None} for i in range(7)]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"session_id": "legacy01", "title": "Alt", "messages": messages}, f, indent=2)
+    reader = SessionReader(path, page_size=3)
+    assert reader.page_count == 3
+    assert _contents(reader.page(0)) == ["m4", "m5", "m6"]
+    assert reader.messages() == messages
+
+
+def test_empty_session_and_invalid_page_size(workdir):
+    s = SessionMemory()
+    path = s.compact()
+    reader = SessionReader(path)
+    assert len(reader) == 0 and reader.messages() == [] and list(reader.pages()) == []
+    with pytest.raises(ValueError):
+        SessionReader(path, page_size=0)
+
+
+def test_manager_open_session_saves_and_reads_the_current_session(workdir):
+    from src.kimba_ai.core.memory.manager import MemoryManager
+    manager = MemoryManager(session_index=False, archive_after_days=None, batching=False)
+    try:
+        for i in range(5):
+            manager.remember("user", f"zeile {i}")
+        reader = manager.open_session(page_size=2)
+        assert _contents(reader.page(0)) == ["zeile 3", "zeile 4"]
+    finally:
+        manager.close()
@@ -0,0 +1,125 @@
+# Tests: Index-Modi flat / IVF / HNSW und Migration (vector_index.py)
+
+import numpy as np
+import pytest
+
+from src.kimba_ai.core.memory import vector_index
+from src.kimba_ai.core.memory.vector_index import VectorIndex, IVF_MIN_TRAIN, SQ_MIN_TRAIN, mode_of, quant_of
+
+DIM = 384
+
+
+def _data(n, seed=0):
+    mat = np.random.default_rng(seed).standard_normal((n, DIM)).astype("float32")
+    mat /= np.linalg.norm(mat, axis=1, keepdims=True)
+    return mat, np.arange(n, dtype="int64") * 10  # IDs != Positionen
+
+
+def _index(mat, ids, **options):
+    index = VectorIndex(DIM, lambda: (mat, ids), background=False, **options)
+    index.rebuild(mat, ids)
+    return index
+
+
+@pytest.mark.parametrize("mode", ["flat", "ivf", "hnsw"])
+def test_modes_find_stored_vectors(mode):
+    mat, ids = _data(IVF_MIN_TRAIN + 100)
+    index = _index(mat, ids, mode=mode, nprobe=64)
+    assert mode_of(index.index) == mode
+    D, I = index.search(mat[:20], 3)
+    assert (I[:, 0] == ids[:20]).mean() >= 0.95
+    assert np.allclose(D[I[:, 0] == ids[:20], 0], 1.0, atol=1e-4)  # Inner Product = Cosine
+
+
+def test_ivf_needs_enough_training_data():
+    mat, ids = _data(100)
+    assert mode_of(_index(mat, ids, mode="ivf").index) == "flat"
+
+
+def test_auto_migrates_to_ann_at_threshold():
+    mat, ids = _data(300)
+    index = _index(mat[:199], ids[:199], mode="auto", ann_threshold=200, ann_kind="hnsw")
+    assert mode_of(index.index) == "flat"
+    index.source = lambda: (mat[:200], ids[:200])
+    index.add(mat[199:200], ids[199:200])
+    assert mode_of(index.index) == "hnsw" and index.swapped and index.live == 200
+
+
+@pytest.mark.parametrize("mode", ["flat", "ivf", "hnsw"])
+def test_deleted_ids_are_not_returned(mode):
+    mat, ids = _data(IVF_MIN_TRAIN + 100)
+    index = _index(mat, ids, mode=mode, nprobe=64)
+    index.delete(ids[:5])
+    index.source = lambda: (mat[5:], ids[5:])  # wie der Store: nur lebende Einträge
+    assert index.live == len(ids) - 5
+    _, I = index.search(mat[:5], 5)
+    assert not np.isin(I, ids[:5]).any()
+    index.purge()
+    assert index.ntotal == index.live == len(ids) - 5  # HNSW: synchroner Neuaufbau (background=False)
+
+
+def test_serialize_round_trip_keeps_mode_and_tombstones():
+    mat, ids = _data(500)
+    index = _index(mat, ids, mode="hnsw")
+    index.delete([ids[0]])
+    copy = VectorIndex(DIM, lambda: (mat, ids), background=False, mode="hnsw")
+    assert copy.load(index.serialize(), index.manifest_entry())
+    assert mode_of(copy.index) == "hnsw" and copy.live == 499
+    assert copy.search(mat[:1], 1)[1][0, 0] != ids[0]
+
+
+def test_store_index_mode_survives_reopen(make_store):
+    store = make_store(index_config={"mode": "hnsw", "background": False})
+    store.add_memories([f"eintrag {i}" for i in range(50)])
+    assert store.stats()["index_mode"] == "hnsw"
+    store.close()
+    reopened = make_store(index_config={"mode": "hnsw", "background": False})
+    assert reopened.stats()["index_mode"] == "hnsw"
+    assert reopened.semantic_search("eintrag 12", 1)[0][1]["text"] == "eintrag 12"
+
+
+def test_invalid_options_are_rejected():
+    with pytest.raises(ValueError):
+        VectorIndex(DIM, lambda: None, mode="lsh")
+    with pytest.raises(ValueError):
+        VectorIndex(DIM, lambda: None, ann_kind="flat")
+
+
+def _fetch(mat, ids):
+    pos = {int(i): p for p, i in enumerate(ids)}
+    return lambda rids: np.stack([mat[pos[int(r)]] for r in rids])
+
+
+@pytest.mark.parametrize("mode,quantize", [("flat", "sq8"), ("hnsw", "sq8"), ("flat", "pq")])
+def test_quantized_index_reranks_with_exact_scores(monkeypatch, mode, quantize):
+    # PQ-Training mit weniger Punkten als empfohlen (faiss warnt nur) - hält den Test kurz
+    monkeypatch.setattr(vector_index, "PQ_MIN_TRAIN", 2048)
+    mat, ids = _data(2048 if quantize == "pq" else SQ_MIN_TRAIN + 200)
+    index = _index(mat, ids, mode=mode, quantize=quantize, fetch=_fetch(mat, ids))
+    assert quant_of(index.index) == quantize
+    D, I = index.search(mat[:20], 3)
+    assert (I[:, 0] == ids[:20]).mean() >= 0.9
+    hit = I[:, 0] == ids[:20]
+    assert np.allclose(D[hit, 0], 1.0, atol=1e-5)  # exakt nachsortiert, nicht der Näherungswert
+    plain = _index(mat, ids, mode=mode)
+    assert len(index.serialize()) < len(plain.serialize()) / 2
+
+
+def test_small_stores_stay_uncompressed():
+    mat, ids = _data(SQ_MIN_TRAIN - 1)
+    index = _index(mat, ids, quantize="sq8")
+    assert quant_of(index.index) is None
+    index.source = lambda: (np.vstack([mat, mat[:1]]), np.append(ids, 99_999))
+    index.add(mat[:1], [99_999])
+    assert quant_of(index.index) == "sq8"
+
+
+def test_store_with_quantized_index_returns_exact_cosine(make_store):
+    options = {"index_config": {"quantize": "sq8", "background": False}}
+    store = make_store(**options)
+    store.add_memories([f"quantisierter eintrag nummer {i} mit text" for i in range(SQ_MIN_TRAIN + 50)])
+    assert store.stats()["index_quantize"] == "sq8"
+    score, m = store.semantic_search("quantisierter eintrag nummer 77 mit text", 1)[0]
+    assert m["text"] == "quantisierter eintrag nummer 77 mit text" and score == pytest.approx(1.0, abs=1e-5)
+    store.close()
+    assert make_store(**options).stats()["index_quantize"] == "sq8"
@@ -0,0 +1,113 @@
+# Tests: Write-behind-Persistenz, Group Commit und fsync-Policy (user-011)
+
+import threading
+import time
+
+import pytest
+
+import src.kimba_ai.core.memory.longterm as longterm
+from src.kimba_ai.core.memory import segments
+from src.kimba_ai.core.memory.writer import WriteBehind
+
+
+def test_batched_mode_groups_concurrent_submits():
+    groups = []
+    gate = threading.Event()
+
+    def commit(ops):
+        if ops:
+            gate.wait(1.0)  # erster Commit hält an, währenddessen sammeln sich die übrigen
+            groups.append(list(ops))
+
+    writer = WriteBehind(commit, mode="batched", interval=0.01)
+    threads = [threading.Thread(target=writer.submit, args=(("op", i),)) for i in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    gate.set()
+    for t in threads:
+        t.join()
+    writer.close()
+
+    assert sum(len(g) for g in groups) == 8
+    assert len(groups) < 8
+    assert writer.pending == 0
+
+
+def test_async_mode_commits_on_size_and_flush():
+    committed = []
+    writer = WriteBehind(lambda ops: committed.extend(ops), mode="async", batch_size=4, interval=10.0)
+    for i in range(4):
+        writer.submit(("op", i))
+    assert writer.wait(timeout=1.0)
+    assert len(committed) == 4
+
+    writer.submit(("op", 4))
+    writer.flush(timeout=1.0)
+    assert len(committed) == 5
+    writer.close()
+
+
+def test_commit_error_is_raised_once():
+    calls = []
+
+    def commit(ops):
+        if ops:
+            calls.append(ops)
+            if len(calls) == 1:
+                raise OSError("disk voll")
+
+    writer = WriteBehind(commit, mode="async", interval=0.01)
+    writer.submit(("op", 1))
+    with pytest.raises(OSError):
+        writer.flush(timeout=1.0)
+    writer.submit(("op", 2))
+    assert writer.flush(timeout=1.0)
+    writer.close()
+
+
+@pytest.mark.parametrize("durability", ["batched", "async"])
+def test_write_behind_store_persists_everything_on_close(make_store, tmp_path, durability):
+    memory_dir = str(tmp_path / durability)
+    store = make_store(memory_dir=memory_dir, durability=durability, flush_interval=0.01)
+    uuids = store.add_memories([f"eintrag {i}" for i in range(50)])
+    store.delete_memories(uuids[:10])
+    store.close()
+
+    reopened = make_store(memory_dir=memory_dir)
+    assert reopened.stats()["count_memories"] == 40
+    assert reopened.get_memory(uuids[0]) is None
+    assert reopened.get_memory(uuids[-1])["text"] == "eintrag 49"
+
+
+def test_idle_fsync_does_not_race_with_compaction(make_store, monkeypatch):
+    # Leerlauf-fsync des Write-behind-Threads läuft, während compact() die Log-Handles wechselt:
+    # früher schloss compact() die Handles unter dem laufenden fsync (-> Fehler in jedem flush/close)
+    monkeypatch.setattr(longterm, "FSYNC_INTERVAL", 3600.0)
+    store = make_store(durability="async", fsync="interval", flush_interval=0.005)
+    store.add_memory("ungesynct im log")
+    store._writer.flush()
+
+    entered, closed = threading.Event(), threading.Event()
+    original_sync, original_close = segments._sync, store._close_logs
+
+    def blocking_sync(f, fsync):
+        if threading.current_thread().name == "kimba-write-behind" and not entered.is_set():
+            entered.set()
+            closed.wait(0.5)  # mit Log-Sperre wartet compact() stattdessen auf uns
+        original_sync(f, fsync)
+
+    def close_logs():
+        original_close()
+        closed.set()
+
+    monkeypatch.setattr(segments, "_sync", blocking_sync)
+    monkeypatch.setattr(store, "_close_logs", close_logs)
+    monkeypatch.setattr(longterm, "FSYNC_INTERVAL", 0.0)  # nächster Leerlauf-Commit synct
+    assert entered.wait(2.0)
+    store.compact()
+
+    store.flush()  # würde einen im Thread gespeicherten Fehler werfen
+    store.add_memory("nach der kompaktierung")
+    store.close()
+    assert make_store(memory_dir=store.memory_dir).stats()["count_memories"] == 2